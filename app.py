@@ -1,8 +1,6 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import uuid
+import importlib
 from datetime import datetime
 import warnings
 from pathlib import Path
@@ -17,9 +15,31 @@ st.set_page_config(
 )
 
 # Importar módulos personalizados
-from utils.data_loader import load_data, process_data, validate_columns, load_from_excel
-from utils.calculations import calculate_cobertura, calculate_wape, categorize_cobertura
-from pages import page_principal, page_estado_coberturas, page_evolucion_futura, page_wape
+from utils.data_loader import process_data, validate_columns
+from utils.filters import default_dates, filter_dataset
+from utils.matrices import dataset_fingerprint
+from utils.safety_stock import DEFAULT_SERVICE_LEVEL, apply_safety_stock_thresholds
+from utils.replenishment import origin_parameters
+from utils.segmentation import add_segment_columns
+from utils.granularity import GRANULARIDADES
+from utils.search import search_materials, DEFAULT_LIMIT
+from utils.cache import cached_safety_stock, cached_abc_xyz, cached_material_index, background_upload, load_data, session_workbook_version
+from utils.widgets import upload_panel, upload_size_report, watch_upload, show_notices, performance_panel
+from utils.timing import ETAPA_PAGINA, annotate, end_section, finish_trace, section, stage, start_trace
+
+# Páginas (etiqueta del menú -> módulo de pages). Cada módulo se importa recién al abrir su página:
+# plotly express y los cálculos de las páginas no se cargan para la pantalla de bienvenida
+PAGINAS = {
+    "📊 Principal": "page_principal",
+    "🎯 Estado de Coberturas": "page_estado_coberturas",
+    "📈 Evolución Futura": "page_evolucion_futura",
+    "📉 WAPE (Kg-L)": "page_wape",
+    "🧪 Escenarios": "page_escenarios",
+    "🎲 Riesgo de Quiebre": "page_riesgo_quiebre",
+    "🛒 Reposición": "page_reposicion",
+    "🌳 Jerarquía": "page_jerarquia",
+    "🔀 Comparar Versiones": "page_comparacion",
+}
 
 # Estilos personalizados
 st.markdown("""
@@ -56,6 +76,7 @@ def main():
     st.markdown("---")
     
     # --- Funcionalidad de carga de archivo ---
+    section("Carga de datos")
     st.sidebar.header("📂 Cargar Datos")
     uploaded_file = st.sidebar.file_uploader(
         "Sube tu archivo Excel aquí",
@@ -66,25 +87,49 @@ def main():
 
     df = None
     data_source_message = ""
+    nombre_archivo = ""
 
-    # 1. Prioridad: Archivo subido por el usuario
+    # 1. Prioridad: Archivo subido por el usuario (leído en segundo plano, hoja por hoja)
     if uploaded_file is not None:
-        try:
-            df = load_from_excel(uploaded_file)
-            data_source_message = f"Archivo subido: **{uploaded_file.name}**"
-        except Exception as e:
-            st.error(f"❌ Error al leer el archivo subido: {e}")
+        carga = background_upload(uploaded_file)
+        nombre_archivo = uploaded_file.name
+        if carga['estado'] == 'error':
+            st.error(f"❌ Error al leer el archivo subido: {carga['error']}")
+            upload_size_report(carga)
             return
+        if carga['resultado'] is not None:
+            df = carga['resultado']
+            data_source_message = f"Archivo subido: **{uploaded_file.name}**"
+        else:
+            with st.sidebar:
+                upload_panel(carga)
+            if carga['vista_previa'] is None:
+                st.info(f"⏳ Leyendo **{uploaded_file.name}**. El dashboard se mostrará apenas termine la hoja de Forecast.")
+                watch_upload(carga, bloqueante=True)
+                return
+            # Vista previa: solo Forecast; el dataset completo la reemplaza al terminar
+            df = carga['vista_previa']
+            data_source_message = f"Vista previa (solo Forecast): **{uploaded_file.name}**"
+            st.info("👀 Vista previa con la hoja de Forecast. El inventario se incorporará automáticamente al terminar la carga.")
+            with st.sidebar:
+                watch_upload(carga)
     
     # 2. Si no hay archivo subido, buscar en la carpeta 'data'
     else:
-        df = load_data() # Usa la función cacheada de data_loader
-        if df is not None and not df.empty:
-            # Intentar obtener el nombre del archivo local para mostrarlo
-            data_path = Path(__file__).parent / "data"
-            excel_files = list(data_path.glob("*.xlsx")) + list(data_path.glob("*.xls"))
-            if excel_files:
-                data_source_message = f"Archivo local: **{excel_files[0].name}**"
+        # Versión del libro fijada para esta sesión (un libro nuevo en data no cambia los datos a mitad de sesión)
+        version, version_nueva = session_workbook_version()
+        df, avisos = load_data(version) # Función cacheada (lee el precálculo si existe)
+        show_notices(avisos)
+        if version_nueva is not None:
+            modificado = datetime.fromtimestamp(version_nueva[2] / 1e9).strftime('%d-%m-%Y %H:%M')
+            st.sidebar.info(f"🔄 Hay una versión nueva del libro: **{Path(version_nueva[0]).name}** ({modificado})")
+            if st.sidebar.button("Usar la versión nueva"):
+                st.session_state['version_libro'] = version_nueva
+                st.rerun()
+        if df is not None and not df.empty and version is not None:
+            # Nombre del archivo local para mostrarlo
+            nombre_archivo = Path(version[0]).name
+            data_source_message = f"Archivo local: **{nombre_archivo}**"
 
     # Si después de ambos métodos no hay datos, mostrar mensaje y salir.
     if df is None or df.empty:
@@ -119,22 +164,23 @@ def main():
     # Procesar y mostrar el dashboard
     try:
         # Procesar datos
-        df = process_data(df)
+        avisos = []
+        df = process_data(df, avisos)
+        show_notices(avisos)
+        fingerprint = dataset_fingerprint(df)
         
         # Sidebar con filtros
+        section("Filtros")
         st.sidebar.header("🔍 Filtros")
         
         # Filtro de fecha
-        if 'Fecha' in df.columns:
-            fechas_disponibles = sorted(df['Fecha'].dropna().unique())
-            if fechas_disponibles:
-                fecha_seleccionada = st.sidebar.multiselect(
-                    "Fecha Año/Mes",
-                    options=fechas_disponibles,
-                    default=fechas_disponibles[-3:] if len(fechas_disponibles) >= 3 else fechas_disponibles
-                )
-            else:
-                fecha_seleccionada = []
+        fechas_disponibles, fechas_por_defecto = default_dates(df)
+        if fechas_disponibles:
+            fecha_seleccionada = st.sidebar.multiselect(
+                "Fecha Año/Mes",
+                options=fechas_disponibles,
+                default=fechas_por_defecto
+            )
         else:
             fecha_seleccionada = []
         
@@ -149,43 +195,98 @@ def main():
         else:
             origen_seleccionado = ["Todas"]
         
-        # Filtro de material
+        # Filtro de material: búsqueda por código o descripción sobre un índice precalculado (sin límite de SKUs)
         if 'Material' in df.columns:
-            materiales = sorted(df['Material'].dropna().unique())
+            indice = cached_material_index(df, fingerprint)
+            etiquetas = indice['etiquetas'] if indice else {}
+            busqueda = st.sidebar.text_input("Buscar material", placeholder="Código o descripción")
+            if busqueda:
+                coincidencias = list(search_materials(indice, busqueda, limit=None))
+            else:
+                coincidencias = list(indice['materiales'][indice['orden_codigos'][:DEFAULT_LIMIT]]) if indice else []
+            
+            # Las opciones son la selección actual más las primeras coincidencias de la búsqueda
+            seleccion_actual = [m for m in st.session_state.get('material_seleccionado', []) if m != "Todos"]
+            opciones = list(dict.fromkeys(seleccion_actual + coincidencias[:DEFAULT_LIMIT]))
             material_seleccionado = st.sidebar.multiselect(
                 "Material",
-                options=["Todos"] + list(materiales[:50]),  # Limitar para performance
-                default=["Todos"]
+                options=["Todos"] + opciones,
+                default=["Todos"],
+                key="material_seleccionado",
+                format_func=lambda m: etiquetas.get(m, str(m))
             )
+            if busqueda and coincidencias:
+                if st.sidebar.checkbox(f"Filtrar por las {len(coincidencias):,} coincidencias"):
+                    material_seleccionado = coincidencias
         else:
             material_seleccionado = ["Todos"]
         
+        # Segmentación ABC/XYZ (precalculada una vez por dataset)
+        base_abc = st.sidebar.selectbox("Clasificación ABC por", options=["FCST", "Inventario"])
+        df = add_segment_columns(df, cached_abc_xyz(df, fingerprint, base_abc))
+        
+        if 'ABC' in df.columns:
+            abc_seleccionado = st.sidebar.multiselect("Clase ABC", options=["Todas", "A", "B", "C"], default=["Todas"])
+            xyz_seleccionado = st.sidebar.multiselect("Clase XYZ", options=["Todas", "X", "Y", "Z"], default=["Todas"])
+        else:
+            abc_seleccionado, xyz_seleccionado = ["Todas"], ["Todas"]
+        
+        # Columna de agrupación para las distribuciones de cada página
+        opciones_grupo = [c for c in ['Origen', 'Segmento', 'ABC', 'XYZ', 'ABC-XYZ'] if c in df.columns]
+        group_col = st.sidebar.selectbox("Agrupar por", options=opciones_grupo) if opciones_grupo else 'Origen'
+        
+        # Granularidad de tiempo de los gráficos de evolución (se re-agrupa sin recalcular los datos)
+        granularidad = st.sidebar.selectbox("Granularidad", options=GRANULARIDADES)
+        
         # Filtro de estado de cobertura
         estado_cob = st.sidebar.selectbox(
             "Estado Cob(D)",
             options=["Todas", "Cob < 45", "Cob < 90", "Cob > 90"]
         )
         
-        # Aplicar filtros
-        df_filtered = df.copy()
-        
-        if fecha_seleccionada and 'Fecha' in df.columns:
-            df_filtered = df_filtered[df_filtered['Fecha'].isin(fecha_seleccionada)]
+        # Parámetros de reposición por Origen (lead time y múltiplo): se editan en Reposición y también
+        # los usan los umbrales por SKU, así que existen desde el primer rerun con sus valores por defecto
+        origenes_parametros = sorted(df['Origen'].dropna().unique()) if 'Origen' in df.columns else []
+        st.session_state['parametros_origen'] = (
+            origin_parameters(origenes_parametros, st.session_state.get('parametros_origen'))
+            if origenes_parametros else None
+        )
         
-        if "Todas" not in origen_seleccionado and 'Origen' in df.columns:
-            df_filtered = df_filtered[df_filtered['Origen'].isin(origen_seleccionado)]
+        # Umbrales de cobertura: fijos o por SKU según stock de seguridad.
+        # La comparación de versiones usa el libro con umbrales fijos, igual que la otra versión
+        df_umbral_fijo = df
+        modo_umbral = st.sidebar.radio(
+            "Umbrales Cob(D)",
+            options=["Fijos (45/90)", "Por SKU (stock de seguridad)"],
+            help="Por SKU: el estado crítico usa lead time + stock de seguridad de cada SKU, y la alerta el doble."
+        )
+        if modo_umbral != "Fijos (45/90)" and 'Cob(D)' in df.columns:
+            nivel_servicio = st.sidebar.slider(
+                "Nivel de servicio", min_value=0.80, max_value=0.99,
+                value=DEFAULT_SERVICE_LEVEL, step=0.01, key="nivel_servicio"
+            )
+            parametros = st.session_state['parametros_origen']
+            tabla_ss = cached_safety_stock(
+                df, fingerprint, nivel_servicio,
+                parametros.to_json(orient='records') if parametros is not None else None
+            )
+            df = apply_safety_stock_thresholds(df, tabla_ss)
         
-        if "Todos" not in material_seleccionado and 'Material' in df.columns:
-            df_filtered = df_filtered[df_filtered['Material'].isin(material_seleccionado)]
+        # Aplicar filtros ("Todas"/"Todos" = sin filtro)
+        df_filtered = filter_dataset(
+            df,
+            fechas=fecha_seleccionada,
+            origenes=None if "Todas" in origen_seleccionado else origen_seleccionado,
+            materiales=None if "Todos" in material_seleccionado else material_seleccionado,
+            abc=None if "Todas" in abc_seleccionado else abc_seleccionado,
+            xyz=None if "Todas" in xyz_seleccionado else xyz_seleccionado,
+        )
         
         # Navegación de páginas
         st.sidebar.markdown("---")
         st.sidebar.header("📄 Navegación")
         
-        page = st.sidebar.radio(
-            "Selecciona una página:",
-            ["📊 Principal", "🎯 Estado de Coberturas", "📈 Evolución Futura", "📉 WAPE (Kg-L)"]
-        )
+        page = st.sidebar.radio("Selecciona una página:", list(PAGINAS))
         
         # --- Botón de Exportar a PDF ---
         st.sidebar.markdown("---")
@@ -238,15 +339,26 @@ def main():
             </div>
         """, unsafe_allow_html=True)
         
-        # Mostrar página seleccionada
-        if page == "📊 Principal":
-            page_principal.show(df_filtered, estado_cob)
-        elif page == "🎯 Estado de Coberturas":
-            page_estado_coberturas.show(df_filtered, estado_cob)
-        elif page == "📈 Evolución Futura":
-            page_evolucion_futura.show(df_filtered, estado_cob)
-        elif page == "📉 WAPE (Kg-L)":
-            page_wape.show(df_filtered)
+        # Mostrar página seleccionada (su módulo se importa la primera vez que se abre)
+        end_section()
+        annotate(pagina=PAGINAS[page], filas=len(df_filtered))
+        with stage(ETAPA_PAGINA + PAGINAS[page], filas=len(df_filtered)):
+            pagina = importlib.import_module(f"pages.{PAGINAS[page]}")
+            if page == "📊 Principal":
+                pagina.show(df_filtered, estado_cob, granularidad)
+            elif page in ("🎯 Estado de Coberturas", "📈 Evolución Futura"):
+                pagina.show(df_filtered, estado_cob, group_col, granularidad)
+            elif page == "📉 WAPE (Kg-L)":
+                pagina.show(df_filtered, df_historia=df, group_col=group_col, granularidad=granularidad)
+            elif page in ("🎲 Riesgo de Quiebre", "🛒 Reposición", "🧪 Escenarios"):
+                # La proyección parte del mes en curso sobre el libro completo; los filtros eligen qué se muestra
+                pagina.show(df_filtered, df_historia=df)
+            elif page == "🔀 Comparar Versiones":
+                # La comparación usa el libro completo (sin filtros ni umbrales por SKU) para no confundir
+                # filtros o umbrales con cambios entre versiones
+                pagina.show(df_umbral_fijo, nombre_archivo)
+            else:
+                pagina.show(df_filtered)
         
         # Información del dataset
         st.sidebar.markdown("---")
@@ -265,4 +377,11 @@ def main():
         st.exception(e)
 
 if __name__ == "__main__":
-    main()
+    # Traza del rerun (etapas, cálculos, secciones y caché) para el panel de rendimiento,
+    # rendimiento/trazas.jsonl y rendimiento/metricas.prom (ver utils/timing.py)
+    start_trace(sesion=st.session_state.setdefault('sesion_traza', uuid.uuid4().hex[:8]))
+    try:
+        main()
+    finally:
+        traza = finish_trace()
+    performance_panel(traza)
@@ -25,6 +25,9 @@ if not exist "data\*.xlsx" if not exist "data\*.xls" (
     timeout /t 5
 )
 
+REM Iniciar el trabajador de precalculo (vigila la carpeta data) en otra ventana minimizada
+start "Precalculo Dashboard ACO" /min python vigilar_datos.py
+
 REM Iniciar Streamlit
 echo Abriendo dashboard en navegador...
 echo.
@@ -0,0 +1,37 @@
+"""
+Genera un libro Master ACOL sintético (hojas Fcst Actual, StockACOL y Master Actual con el formato del real)
+para probar el dashboard y medir su rendimiento sin datos reales.
+
+Uso:
+    python generar_libro.py data/sintetico.xlsx --skus 5000 --meses 24
+    python generar_libro.py libro.xlsx --lotes 5 --columnas-basura 20 --inicio 2025-01 --semilla 3
+"""
+import argparse
+import sys
+import time
+
+from utils.synthetic import synthetic_workbook
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un libro Master ACOL sintético")
+    parser.add_argument('salida', help="Archivo .xlsx a crear")
+    parser.add_argument('--skus', type=int, default=1000, help="Cantidad de SKUs del Forecast")
+    parser.add_argument('--meses', type=int, default=18, help="Meses del horizonte (columnas de mes del Forecast)")
+    parser.add_argument('--lotes', type=int, default=3, help="Máximo de lotes por SKU en StockACOL")
+    parser.add_argument('--columnas-basura', type=int, default=5, help="Columnas sin uso en cada hoja")
+    parser.add_argument('--inicio', help="Primer mes AAAA-MM (por defecto la mitad del horizonte queda en el pasado)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla aleatoria (mismo libro con la misma semilla)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    dimensiones = synthetic_workbook(args.salida, args.skus, args.meses, args.lotes, args.columnas_basura,
+                                     args.inicio, args.semilla)
+    for hoja, (filas, columnas) in dimensiones.items():
+        print(f"  {hoja:<15} {filas:>8} filas × {columnas} columnas")
+    print(f"Libro generado en {args.salida} ({time.perf_counter() - inicio:.1f} s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
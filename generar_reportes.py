@@ -0,0 +1,72 @@
+"""
+Generación de reportes sin Streamlit: las cuatro páginas (Principal, Estado de Coberturas,
+Evolución Futura y WAPE) para cada Origen y cada estado de cobertura, en HTML y PDF.
+
+Uso:
+    python generar_reportes.py
+    python generar_reportes.py --archivo "data/Master ACOL FEB-2026 V2.xlsx" --salida reportes --granularidad Trimestre
+    python generar_reportes.py --formatos html --workers 4
+
+El PDF requiere kaleido (pip install kaleido) y un navegador Chrome disponible; sin él solo se genera HTML.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utils.data_loader import AVISO_ADVERTENCIA, AVISO_ERROR, find_local_workbook, load_from_excel, process_data
+from utils.granularity import GRANULARIDADES
+from utils.reports import REPORT_FORMATS, generate_reports, pdf_available, report_combinations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera reportes HTML/PDF por Origen y estado de cobertura")
+    parser.add_argument('--archivo', help="Libro Excel (por defecto, el que carga el dashboard desde la carpeta data)")
+    parser.add_argument('--salida', help="Carpeta de salida (por defecto reportes/<AAAA-MM-DD>)")
+    parser.add_argument('--agrupar', default='Origen', help="Columna de agrupación de los reportes (por defecto Origen)")
+    parser.add_argument('--granularidad', default='Mes', choices=GRANULARIDADES)
+    parser.add_argument('--formatos', nargs='+', default=list(REPORT_FORMATS), choices=REPORT_FORMATS)
+    parser.add_argument('--workers', type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+    args = parser.parse_args()
+
+    archivo = Path(args.archivo) if args.archivo else find_local_workbook()
+    if archivo is None or not archivo.exists():
+        print("No se encontró el libro Excel. Usa --archivo o guarda el archivo en la carpeta data.", file=sys.stderr)
+        return 1
+
+    if 'pdf' in args.formatos and not pdf_available():
+        print("kaleido no está instalado: se generará solo HTML (pip install kaleido para PDF).", file=sys.stderr)
+
+    inicio = time.perf_counter()
+    avisos = []
+    df = load_from_excel(archivo, avisos=avisos)
+    if df is not None and not df.empty:
+        df = process_data(df, avisos)
+    for aviso in avisos:
+        if aviso['nivel'] in (AVISO_ADVERTENCIA, AVISO_ERROR):
+            print(aviso['mensaje'], file=sys.stderr)
+    if df is None or df.empty:
+        print(f"No se pudieron leer datos de {archivo}", file=sys.stderr)
+        return 1
+
+    salida = args.salida or str(Path(__file__).parent / "reportes" / pd.Timestamp.now().strftime('%Y-%m-%d'))
+    combinaciones = report_combinations(df, args.agrupar)
+    print(f"{archivo.name}: {len(df):,} filas, {len(combinaciones)} combinaciones -> {salida}")
+
+    resultados = generate_reports(
+        df, salida, group_col=args.agrupar, granularidad=args.granularidad,
+        formatos=args.formatos, combinaciones=combinaciones, max_workers=args.workers
+    )
+
+    errores = sorted({e for r in resultados for e in r['errores']})
+    for error in errores:
+        print(error, file=sys.stderr)
+    n_archivos = sum(len(r['archivos']) for r in resultados)
+    print(f"{len(resultados)} reportes ({n_archivos} archivos) en {time.perf_counter() - inicio:.1f} s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
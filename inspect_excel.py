@@ -1,7 +1,13 @@
+import sys
 import pandas as pd
 import numpy as np
 
-file_path = r'data\Master  ACOL FEB-2026 V2.xlsx'
+from utils.data_loader import find_local_workbook
+
+# Libro a inspeccionar: el indicado por argumento o el más reciente de data/
+file_path = sys.argv[1] if len(sys.argv) > 1 else find_local_workbook()
+if file_path is None:
+    sys.exit('No se encontró un libro en data/ (uso: python %s <archivo.xlsx>)' % sys.argv[0])
 
 # Leer sin header para inspeccionar
 df_raw = pd.read_excel(file_path, header=None, nrows=30)
@@ -0,0 +1,49 @@
+"""
+Mide el arranque del dashboard por etapas y lo compara con el presupuesto (utils/startup.py):
+importación de módulos, pantalla de bienvenida, primera vista con datos, healthcheck del servidor
+y, opcionalmente, arranque en frío de la imagen Docker. Cada medición se agrega a rendimiento/arranque.jsonl.
+
+Uso:
+    python medir_arranque.py
+    python medir_arranque.py --docker dashboard-aco      (después de docker build -t dashboard-aco .)
+    python medir_arranque.py --sin-servidor --sin-historial
+
+Termina con código 1 si alguna etapa excede su presupuesto (apto para CI).
+"""
+import argparse
+import sys
+
+from utils.startup import STARTUP_BUDGET, STARTUP_HISTORY, append_history, check_budget, measure_startup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque del dashboard contra su presupuesto")
+    parser.add_argument('--docker', metavar='IMAGEN', help="Medir también el arranque en frío de esta imagen Docker")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Intentos por etapa (se informa el mínimo)")
+    parser.add_argument('--sin-servidor', action='store_true', help="No medir el healthcheck de streamlit run")
+    parser.add_argument('--historial', default=str(STARTUP_HISTORY), help="Archivo JSONL del historial de mediciones")
+    parser.add_argument('--sin-historial', action='store_true', help="No guardar la medición en el historial")
+    args = parser.parse_args()
+
+    medicion = measure_startup(args.repeticiones, docker=args.docker, servidor=not args.sin_servidor)
+
+    excedido = False
+    for etapa, segundos, limite, ok in check_budget(medicion['etapas'], STARTUP_BUDGET):
+        valor = 'sin respuesta' if segundos is None else f"{segundos:7.2f} s"
+        print(f"  {etapa:<15} {valor:>14}   presupuesto {limite:5.1f} s   {'OK' if ok else 'EXCEDIDO'}")
+        excedido |= not ok
+    if medicion['diferidos']:
+        print(f"Módulos cargados en la pantalla de bienvenida que deberían cargarse al abrir una página: "
+              f"{', '.join(medicion['diferidos'])}", file=sys.stderr)
+        excedido = True
+    for error in medicion['errores']:
+        print(error, file=sys.stderr)
+
+    if not args.sin_historial:
+        append_history(medicion, args.historial)
+        print(f"Medición agregada a {args.historial}")
+    return 1 if excedido or medicion['errores'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
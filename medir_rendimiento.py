@@ -0,0 +1,61 @@
+"""
+Mide la carga, cada cálculo y lo que calcula cada página sobre un libro sintético (utils/benchmark.py)
+y compara con la línea base guardada en rendimiento/linea_base.json.
+
+Uso:
+    python medir_rendimiento.py --guardar-base              (primera vez: guarda la línea base)
+    python medir_rendimiento.py                             (compara con la línea base)
+    python medir_rendimiento.py --tamaño grande --filtro pagina.
+    python medir_rendimiento.py --tolerancia 0.5 --csv resultados.csv
+
+Termina con código 1 si algún caso es más lento que la línea base más allá de la tolerancia (apto para CI).
+"""
+import argparse
+import sys
+
+from utils.benchmark import (
+    BASELINE_PATH, BENCHMARK_SIZES, DEFAULT_REPETICIONES, DEFAULT_SIZE, TOLERANCIA,
+    compare_baseline, load_baseline, prepare_context, run_benchmarks, save_baseline
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del dashboard sobre libros sintéticos")
+    parser.add_argument('--tamaño', choices=list(BENCHMARK_SIZES), default=DEFAULT_SIZE, help="Tamaño del libro sintético")
+    parser.add_argument('--repeticiones', type=int, default=DEFAULT_REPETICIONES, help="Corridas por caso (se informa el mínimo)")
+    parser.add_argument('--filtro', help="Medir solo los casos cuyo nombre contenga este texto (ej. carga., pagina.wape)")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA, help="Fracción más lenta que la base tolerada")
+    parser.add_argument('--base', default=str(BASELINE_PATH), help="Archivo JSON de líneas base")
+    parser.add_argument('--guardar-base', action='store_true', help="Guardar los resultados como nueva línea base")
+    parser.add_argument('--csv', help="Guardar la comparación en este archivo CSV")
+    args = parser.parse_args()
+
+    print(f"Preparando libro sintético '{args.tamaño}' ({BENCHMARK_SIZES[args.tamaño]['n_skus']} SKUs)...")
+    ctx = prepare_context(args.tamaño)
+    resultados = run_benchmarks(ctx, args.repeticiones, args.filtro)
+
+    base = load_baseline(args.tamaño, args.base)
+    tabla = compare_baseline(resultados, base, args.tolerancia)
+    for fila in tabla.itertuples(index=False):
+        base_txt = '' if fila[1] is None else f"{fila[1] * 1000:10.1f} ms"
+        actual_txt = 'error' if fila[2] is None else f"{fila[2] * 1000:10.1f} ms"
+        cambio = '' if fila[3] != fila[3] else f"{fila[3]:+7.1f} %"
+        print(f"  {fila[0]:<38} {base_txt:>13} {actual_txt:>13} {cambio:>9}   {fila[4]}")
+    if args.csv:
+        tabla.to_csv(args.csv, index=False)
+
+    if base is None:
+        print(f"No hay línea base para '{args.tamaño}' en {args.base}", file=sys.stderr)
+    regresiones = tabla[tabla['Estado'].isin(['regresión', 'error'])]
+    for caso in regresiones['Caso']:
+        print(f"REGRESIÓN: {caso}", file=sys.stderr)
+
+    if args.guardar_base:
+        save_baseline(ctx, resultados, args.base)
+        print(f"Línea base de '{args.tamaño}' guardada en {args.base}")
+        return 0
+    return 1 if not regresiones.empty else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from utils.data_loader import DATA_DIR
+from utils.matrices import dataset_fingerprint
+from utils.versions import version_label
+from utils.exports import export_key
+from utils.cache import cached_workbook, cached_version_diff
+from utils.widgets import export_buttons, plot_chart
+
+def show(df, nombre_actual=''):
+    """
+    Página de Comparación de Versiones - Diferencias entre el libro cargado y otra versión
+    (SKUs nuevos/eliminados, deltas de FCST e inventario y cambios de estado de cobertura)
+    """
+    st.header("🔀 Comparación de Versiones")
+
+    if df.empty:
+        st.warning("No hay datos para comparar")
+        return
+
+    # Origen de la otra versión: archivos de la carpeta data o un archivo subido
+    data_path = DATA_DIR
+    locales = []
+    if data_path.exists():
+        locales = sorted(
+            p for p in list(data_path.glob("*.xlsx")) + list(data_path.glob("*.xls"))
+            if p.name != nombre_actual
+        )
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        opciones = [p.name for p in locales] + ["Subir archivo..."]
+        seleccion = st.selectbox("Versión a comparar", options=opciones)
+    with col2:
+        es_anterior = st.radio(
+            "La versión seleccionada es",
+            options=["Anterior (V1)", "Posterior (V2)"],
+            horizontal=True
+        ) == "Anterior (V1)"
+
+    otro_df = None
+    otro_nombre = seleccion
+    if seleccion == "Subir archivo...":
+        archivo = st.file_uploader("Libro a comparar", type=['xlsx', 'xls'], key="archivo_comparacion")
+        if archivo is None:
+            st.info("Sube otra versión del libro (ej. 'FEB-2026 V1') para compararla con la cargada.")
+            return
+        otro_nombre = archivo.name
+        otro_df = cached_workbook(archivo, f"{archivo.name}:{archivo.size}")
+    else:
+        ruta = data_path / seleccion
+        otro_df = cached_workbook(ruta, f"{ruta}:{ruta.stat().st_mtime}")
+
+    if otro_df is None or otro_df.empty:
+        st.error("No se pudieron leer datos del libro seleccionado")
+        return
+
+    if es_anterior:
+        df_v1, df_v2, nombre_v1, nombre_v2 = otro_df, df, otro_nombre, nombre_actual
+    else:
+        df_v1, df_v2, nombre_v1, nombre_v2 = df, otro_df, nombre_actual, otro_nombre
+
+    fingerprint_v1, fingerprint_v2 = dataset_fingerprint(df_v1), dataset_fingerprint(df_v2)
+    diff = cached_version_diff(df_v1, fingerprint_v1, df_v2, fingerprint_v2)
+    if diff is None:
+        st.error("Ambas versiones requieren columnas Material y Fecha")
+        return
+
+    etiqueta_v1 = version_label(nombre_v1) or "V1"
+    etiqueta_v2 = version_label(nombre_v2) or "V2"
+    st.caption(f"V1 = **{etiqueta_v1}** → V2 = **{etiqueta_v2}**")
+
+    resumen = diff['resumen']
+
+    # Fila 1: KPIs
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("SKUs V2", f"{resumen['skus_v2']:,}", f"{resumen['skus_v2'] - resumen['skus_v1']:+,}")
+    with col2:
+        st.metric("SKUs Nuevos / Eliminados", f"{resumen['nuevos']:,} / {resumen['eliminados']:,}")
+    with col3:
+        st.metric("SKUs Modificados", f"{resumen['modificados']:,}")
+    with col4:
+        st.metric(
+            "Cambio de Estado Cob", f"{resumen['cambio_estado']:,}",
+            f"{resumen['pasan_a_critico']:,} pasan a Cob < 45", delta_color="inverse"
+        )
+    with col5:
+        if 'total_FCST_v1' in resumen:
+            delta_fcst = resumen['total_FCST_v2'] - resumen['total_FCST_v1']
+            st.metric("Δ FCST Total (KL)", f"{delta_fcst:+,.0f}")
+
+    # Fila 2: Deltas por mes
+    st.markdown("---")
+    por_mes = diff['por_mes']
+    metrica = st.radio(
+        "Métrica", options=[c for c in ['FCST', 'Inv Kg-L', 'Despachos KL'] if f'{c} V1' in por_mes.columns],
+        horizontal=True
+    )
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=por_mes['Fecha'], y=por_mes[f'{metrica} V1'], name=etiqueta_v1, marker_color='#B0BEC5'))
+    fig.add_trace(go.Bar(x=por_mes['Fecha'], y=por_mes[f'{metrica} V2'], name=etiqueta_v2, marker_color='#4A90E2'))
+    fig.add_trace(go.Scatter(
+        x=por_mes['Fecha'], y=por_mes[f'Δ {metrica}'], name='Δ', mode='lines+markers',
+        line=dict(color='#FF6B00', width=3), yaxis='y2'
+    ))
+    fig.update_layout(
+        height=350,
+        barmode='group',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        xaxis=dict(title="Mes"),
+        yaxis=dict(title=metrica),
+        yaxis2=dict(title="Δ", overlaying='y', side='right'),
+        hovermode='x unified'
+    )
+    plot_chart(fig, cache_key=f"comparacion_mes:{fingerprint_v1}:{fingerprint_v2}:{metrica}:{etiqueta_v1}:{etiqueta_v2}")
+
+    # Fila 3: Detalle por SKU
+    st.markdown("---")
+    por_sku = diff['por_sku']
+    orden = 'Δ FCST' if 'Δ FCST' in por_sku.columns else por_sku.columns[1]
+    por_sku = por_sku.reindex(por_sku[orden].abs().sort_values(ascending=False).index)
+
+    tab1, tab2, tab3, tab4 = st.tabs(["✏️ Modificados", "🆕 Nuevos", "🗑️ Eliminados", "🚦 Cambio de Estado"])
+    with tab1:
+        st.dataframe(por_sku[por_sku['Cambio'] == 'Modificado'], use_container_width=True, height=400, hide_index=True)
+    with tab2:
+        st.dataframe(por_sku[por_sku['Cambio'] == 'Nuevo'], use_container_width=True, height=400, hide_index=True)
+    with tab3:
+        st.dataframe(por_sku[por_sku['Cambio'] == 'Eliminado'], use_container_width=True, height=400, hide_index=True)
+    with tab4:
+        st.dataframe(por_sku[por_sku['Cambio Estado'] != ''], use_container_width=True, height=400, hide_index=True)
+
+    detalle = diff['detalle']
+    export_buttons(
+        detalle[detalle['Cambio'] != 'Sin cambio'],
+        f"diferencias_{etiqueta_v1}_{etiqueta_v2}".replace(' ', '_'),
+        key="export_comparacion", huella=export_key(fingerprint_v1, fingerprint_v2), fecha_col='Fecha'
+    )
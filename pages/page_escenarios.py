@@ -0,0 +1,144 @@
+import json
+
+import numpy as np
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from utils.matrices import dataset_fingerprint
+from utils.scenarios import scenario_summary, scenarios_from_table
+from utils.cache import cached_matrices, cached_scenarios
+from utils.widgets import plot_chart
+from utils.timing import section
+
+# Tabla inicial de ejemplo para el editor de escenarios
+ESCENARIOS_EJEMPLO = pd.DataFrame([
+    {'Escenario': 'FCST +15%', 'Dimensión': 'Todas', 'Valor': '', 'Factor FCST': 1.15,
+     'Umbral crítico': 45, 'Umbral alerta': 90},
+    {'Escenario': 'Umbrales 60/120', 'Dimensión': 'Todas', 'Valor': '', 'Factor FCST': 1.0,
+     'Umbral crítico': 60, 'Umbral alerta': 120},
+])
+
+def show(df, df_historia=None):
+    """
+    Página de simulación de escenarios (what-if) sobre FCST y umbrales de cobertura
+    df_historia: dataset completo (sin filtros). Los escenarios se proyectan sobre él desde el mes
+    en curso; los filtros de la barra lateral (df) eligen los SKUs y meses que se resumen.
+    """
+    st.header("🧪 Simulación de Escenarios")
+
+    if df.empty:
+        st.warning("No hay datos para mostrar con los filtros seleccionados")
+        return
+
+    if not {'Material', 'Fecha', 'FCST', 'Inv Kg-L'}.issubset(df.columns):
+        st.warning("⚠️ Se requieren columnas de Material, Fecha, FCST e Inventario para simular escenarios.")
+        return
+
+    if df_historia is None:
+        df_historia = df
+
+    dimensiones = ['Todas'] + [c for c in ['Origen', 'Segmento', 'Material'] if c in df_historia.columns]
+
+    st.markdown("""
+    Define uno o más escenarios. Las filas con el mismo nombre se combinan en un solo escenario
+    (ej. FCST +15% para un Origen y -10% para otro). El escenario **Base** se incluye siempre.
+    Todos se proyectan desde el inventario actual y el mes en curso.
+    """)
+
+    df_escenarios = st.data_editor(
+        ESCENARIOS_EJEMPLO,
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Dimensión': st.column_config.SelectboxColumn(options=dimensiones, required=True),
+            'Factor FCST': st.column_config.NumberColumn(min_value=0.0, step=0.05, format="%.2f"),
+            'Umbral crítico': st.column_config.NumberColumn(min_value=0, step=5),
+            'Umbral alerta': st.column_config.NumberColumn(min_value=0, step=5),
+        },
+        key="editor_escenarios"
+    )
+
+    escenarios = scenarios_from_table(df_escenarios)
+    fingerprint = dataset_fingerprint(df_historia)
+    escenarios_json = json.dumps(escenarios, sort_keys=True)
+    resultado = cached_scenarios(df_historia, fingerprint, escenarios_json)
+
+    if resultado is None:
+        st.info("No hay datos suficientes para simular escenarios")
+        return
+
+    # Vista: SKUs filtrados y meses proyectados dentro del filtro de fechas (si no hay, todo el horizonte)
+    matrices = cached_matrices(df_historia, fingerprint)
+    filas = np.isin(matrices['materiales'], df['Material'].unique())
+    fechas = resultado['fechas']
+    meses = fechas.isin(pd.DatetimeIndex(df['Fecha'].dropna().unique()))
+    if not meses.any():
+        meses = np.ones(len(fechas), dtype=bool)
+    resumen, criticos_mes = scenario_summary(resultado, filas, meses)
+    huella_vista = dataset_fingerprint(df)
+
+    # Fila 1: Resumen comparativo
+    st.markdown("---")
+    section("Comparación de Escenarios")
+    st.subheader("Comparación de Escenarios")
+
+    st.dataframe(
+        resumen,
+        column_config={
+            'FCST Total': st.column_config.NumberColumn(format="%.0f"),
+            '% Críticas': st.column_config.ProgressColumn(format="%.1f%%", min_value=0, max_value=100),
+        },
+        use_container_width=True,
+        hide_index=True
+    )
+
+    # Fila 2: Estados por escenario + críticos por mes
+    col1, col2 = st.columns([2, 3])
+
+    with col1:
+        section("Estados por Escenario")
+        st.subheader("Estados por Escenario")
+        estados = resumen.melt(
+            id_vars='Escenario',
+            value_vars=['Filas Críticas', 'Filas Alerta', 'Filas OK'],
+            var_name='Estado',
+            value_name='Cantidad'
+        )
+
+        fig = px.bar(
+            estados,
+            x='Escenario',
+            y='Cantidad',
+            color='Estado',
+            color_discrete_map={
+                'Filas Críticas': '#EF5350',
+                'Filas Alerta': '#FFA726',
+                'Filas OK': '#66BB6A'
+            }
+        )
+        fig.update_layout(
+            barmode='stack',
+            barnorm='percent',
+            height=350,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            yaxis=dict(title="%")
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        section("SKUs Críticos por Mes")
+        st.subheader("SKUs Críticos por Mes")
+        fig = px.line(
+            criticos_mes,
+            x='Fecha',
+            y='SKUs Críticos',
+            color='Escenario',
+            markers=True
+        )
+        fig.update_layout(
+            height=350,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            hovermode='x unified'
+        )
+        plot_chart(fig, cache_key=f"escenarios_criticos:{fingerprint}:{huella_vista}:{escenarios_json}")
@@ -2,9 +2,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.calculations import calculate_top_materials, calculate_distribucion_origen
+from utils.calculations import calculate_distribucion_origen
+from utils.ranking import rank_materials
+from utils.matrices import dataset_fingerprint
+from utils.granularity import estados_por_periodo
+from utils.exports import export_key
+from utils.cache import cached_periods, cached_material_aggregates
+from utils.widgets import paginated_grid, export_buttons, plot_chart
+from utils.timing import section
 
-def show(df, estado_cob):
+def show(df, estado_cob, group_col='Origen', granularidad='Mes'):
     """
     Página de Estado de Coberturas - Replica la segunda vista del PBI
     """
@@ -19,22 +26,23 @@ def show(df, estado_cob):
         df = df[df['Estado_Cobertura'] == estado_cob]
         st.info(f"Mostrando datos para: **{estado_cob}**")
     
+    # Métricas por período (re-agrupadas desde los agregados mensuales cacheados)
+    fingerprint = dataset_fingerprint(df)
+    periodos = cached_periods(df, fingerprint, granularidad)
+    
     # Fila 1: Material por Estado + Evolución del Inventario + Distribución por Origen
     col1, col2, col3 = st.columns([2, 3, 2])
     
     with col1:
+        section("Material por Estado")
         st.subheader("Material por Estado")
         # Gráfico de barras 100% apiladas por mes (filtrado)
-        if 'Estado_Cobertura' in df.columns and 'Fecha' in df.columns:
-            estado_mes = df.groupby(['Fecha', 'Estado_Cobertura']).size().reset_index(name='Cantidad')
-            
-            # Calcular porcentajes
-            total_por_mes = estado_mes.groupby('Fecha')['Cantidad'].transform('sum')
-            estado_mes['Porcentaje'] = (estado_mes['Cantidad'] / total_por_mes * 100).round(1)
+        if 'Estado_Cobertura' in df.columns and not periodos.empty:
+            estado_mes = estados_por_periodo(periodos)
             
             fig = px.bar(
                 estado_mes,
-                x='Fecha',
+                x='Periodo',
                 y='Porcentaje',
                 color='Estado_Cobertura',
                 orientation='v',
@@ -55,21 +63,15 @@ def show(df, estado_cob):
             st.plotly_chart(fig, use_container_width=True)
     
     with col2:
+        section("Evolución del Inventario")
         st.subheader("Evolución del Inventario")
         # Gráfico combinado con barras de inventario y línea de promedio de cobertura
-        if 'Fecha' in df.columns:
-            evolucion = df.groupby('Fecha').agg({
-                'Inv Kg-L': 'sum' if 'Inv Kg-L' in df.columns else 'count',
-                'Cob(D)': 'mean' if 'Cob(D)' in df.columns else 'count'
-            }).reset_index()
+        if not periodos.empty:
+            evolucion = periodos.copy()
             
-            # Convertir fecha a string para el eje X
-            if pd.api.types.is_datetime64_any_dtype(evolucion['Fecha']):
-                evolucion['Mes_Numero'] = evolucion['Fecha'].dt.month
-                evolucion['Fecha_Str'] = evolucion['Fecha'].dt.strftime('%Y-%m')
-            else:
-                evolucion['Fecha_Str'] = evolucion['Fecha'].astype(str)
-                evolucion['Mes_Numero'] = range(1, len(evolucion) + 1)
+            # Eje X posicional con etiquetas de período (evita repetir meses de años distintos)
+            evolucion['Mes_Numero'] = range(1, len(evolucion) + 1)
+            evolucion['Fecha_Str'] = evolucion['Periodo']
             
             fig = go.Figure()
             
@@ -103,29 +105,30 @@ def show(df, estado_cob):
                 height=350,
                 showlegend=True,
                 legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                xaxis=dict(title="Mes", tickmode='array', tickvals=evolucion['Mes_Numero'], 
+                xaxis=dict(title=granularidad, tickmode='array', tickvals=evolucion['Mes_Numero'], 
                           ticktext=evolucion['Fecha_Str']),
                 yaxis=dict(title="Inventario MUsd"),
                 yaxis2=dict(title="Cobertura (Días)", overlaying='y', side='right'),
                 hovermode='x unified'
             )
             
-            st.plotly_chart(fig, use_container_width=True)
+            plot_chart(fig, cache_key=f"estado_evolucion:{fingerprint}:{granularidad}")
     
     with col3:
-        st.subheader("Distribución por Origen")
+        section("Distribución por grupo")
+        st.subheader(f"Distribución por {group_col}")
         # Gráfico de barras horizontales por origen
-        if 'Origen' in df.columns:
-            distribucion = calculate_distribucion_origen(df)
+        if group_col in df.columns:
+            distribucion = calculate_distribucion_origen(df, group_col)
             
             if not distribucion.empty:
                 fig = px.bar(
                     distribucion,
-                    y='Origen',
+                    y=group_col,
                     x='N_SKU',
                     orientation='h',
                     text='N_SKU',
-                    color='Origen',
+                    color=group_col,
                     color_discrete_map={
                         'LAMPA': '#9E9E9E',
                         'TERCEROS': '#5C6BC0',
@@ -151,10 +154,13 @@ def show(df, estado_cob):
     
     with col1:
         # Top 15 de mayor valor
+        section("Top 15 de mayor valor")
         st.subheader("Top 15 de mayor valor")
         
         value_col = 'Inv (M/Usd)' if 'Inv (M/Usd)' in df.columns else 'Inv Kg-L'
-        top_mayor = calculate_top_materials(df, value_col=value_col, top_n=15, ascending=False)
+        # Rankings sobre una fila por material (mayores y menores en una sola pasada)
+        rankings = rank_materials(cached_material_aggregates(df, fingerprint), [value_col], k=15).get(value_col, {})
+        top_mayor = rankings.get('mayores', pd.DataFrame())
         
         if not top_mayor.empty:
             st.dataframe(
@@ -169,9 +175,10 @@ def show(df, estado_cob):
         st.markdown("---")
         
         # Top 15 de menor valor
+        section("Top 15 de menor valor")
         st.subheader("Top 15 de menor valor")
         
-        top_menor = calculate_top_materials(df, value_col=value_col, top_n=15, ascending=True)
+        top_menor = rankings.get('menores', pd.DataFrame())
         
         if not top_menor.empty:
             st.dataframe(
@@ -184,6 +191,7 @@ def show(df, estado_cob):
             st.info("No hay datos disponibles")
     
     with col2:
+        section("Planificación por SKU")
         st.subheader("Planificación por SKU")
         
         # Tabla detallada por mes
@@ -204,44 +212,16 @@ def show(df, estado_cob):
                     if posible in df.columns:
                         columnas_reales.append(posible)
                         break
+            # Estado por fila (respeta los umbrales por SKU de la barra lateral)
+            if 'Estado_Cobertura' in df.columns:
+                columnas_reales.append('Estado_Cobertura')
             
             df_planif = df[columnas_reales].copy()
             
-            # Agregar indicador de estado con color
-            if 'Cob(D)' in df.columns or 'Cob (D)' in df.columns:
-                cob_col = 'Cob(D)' if 'Cob(D)' in df.columns else 'Cob (D)'
-                
-                # Función para aplicar color según cobertura
-                def highlight_cobertura(val):
-                    if pd.isna(val):
-                        return ''
-                    elif val < 45:
-                        return 'background-color: #FFCDD2'  # Rojo claro
-                    elif val < 90:
-                        return 'background-color: #FFE082'  # Amarillo claro
-                    else:
-                        return 'background-color: #C8E6C9'  # Verde claro
-                
-                st.dataframe(
-                    df_planif.head(30).style.applymap(
-                        highlight_cobertura,
-                        subset=[cob_col]
-                    ),
-                    use_container_width=True,
-                    height=650
-                )
-            else:
-                st.dataframe(
-                    df_planif.head(30),
-                    use_container_width=True,
-                    height=650
-                )
+            # Grilla paginada: filtro/orden en el servidor y colores de cobertura solo en la página visible
+            cob_col = next((c for c in ['Cob(D)', 'Cob (D)'] if c in df_planif.columns), None)
+            paginated_grid(df_planif, key="planif_estado", cob_col=cob_col)
             
-            # Botón de descarga
-            csv = df_planif.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="📥 Descargar planificación completa",
-                data=csv,
-                file_name=f'planificacion_por_sku_{estado_cob}.csv',
-                mime='text/csv',
-            )
+            # Exportación bajo demanda (CSV, Parquet o XLSX con meses en columnas)
+            export_buttons(df_planif, f'planificacion_por_sku_{estado_cob}', key="export_estado",
+                           huella=export_key(fingerprint), fecha_col='Fecha')
@@ -2,9 +2,17 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.calculations import calculate_top_materials, calculate_distribucion_origen
+from utils.calculations import calculate_distribucion_origen
+from utils.ranking import rank_materials
+from utils.matrices import dataset_fingerprint
+from utils.granularity import estados_por_periodo
+from utils.filters import future_rows
+from utils.exports import export_key
+from utils.cache import cached_periods, cached_material_aggregates
+from utils.widgets import paginated_grid, export_buttons, plot_chart
+from utils.timing import section
 
-def show(df, estado_cob):
+def show(df, estado_cob, group_col='Origen', granularidad='Mes'):
     """
     Página de Evolución Futura del Inventario - Replica la tercera vista del PBI
     Similar a Estado de Coberturas pero con proyección
@@ -21,34 +29,27 @@ def show(df, estado_cob):
         st.info(f"Proyección para: **{estado_cob}**")
     
     # Filtrar por meses futuros (marzo 2026 en adelante)
-    if 'Fecha' in df.columns:
-        if pd.api.types.is_datetime64_any_dtype(df['Fecha']):
-            fecha_actual = pd.Timestamp.now()
-            df_futuro = df[df['Fecha'] >= fecha_actual]
-            
-            if df_futuro.empty:
-                st.warning("No hay datos futuros disponibles. Mostrando todos los datos.")
-                df_futuro = df
-        else:
-            df_futuro = df
-    else:
-        df_futuro = df
+    df_futuro, sin_futuro = future_rows(df)
+    if sin_futuro:
+        st.warning("No hay datos futuros disponibles. Mostrando todos los datos.")
+    
+    # Métricas por período (re-agrupadas desde los agregados mensuales cacheados)
+    fingerprint = dataset_fingerprint(df_futuro)
+    periodos = cached_periods(df_futuro, fingerprint, granularidad)
     
     # Fila 1: Material por Estado + Evolución del Inventario + Distribución por Origen
     col1, col2, col3 = st.columns([2, 3, 2])
     
     with col1:
+        section("Material por Estado")
         st.subheader("Material por Estado")
         # Proyección de estados por mes
-        if 'Estado_Cobertura' in df_futuro.columns and 'Fecha' in df_futuro.columns:
-            estado_mes = df_futuro.groupby(['Fecha', 'Estado_Cobertura']).size().reset_index(name='Cantidad')
-            
-            total_por_mes = estado_mes.groupby('Fecha')['Cantidad'].transform('sum')
-            estado_mes['Porcentaje'] = (estado_mes['Cantidad'] / total_por_mes * 100).round(1)
+        if 'Estado_Cobertura' in df_futuro.columns and not periodos.empty:
+            estado_mes = estados_por_periodo(periodos)
             
             fig = px.bar(
                 estado_mes,
-                x='Fecha',
+                x='Periodo',
                 y='Porcentaje',
                 color='Estado_Cobertura',
                 orientation='v',
@@ -69,20 +70,15 @@ def show(df, estado_cob):
             st.plotly_chart(fig, use_container_width=True)
     
     with col2:
+        section("Evolución del Inventario (Proyección)")
         st.subheader("Evolución del Inventario (Proyección)")
         # Proyección de inventario con tendencia
-        if 'Fecha' in df_futuro.columns:
-            evolucion = df_futuro.groupby('Fecha').agg({
-                'Inv Kg-L': 'sum' if 'Inv Kg-L' in df_futuro.columns else 'count',
-                'Cob(D)': 'mean' if 'Cob(D)' in df_futuro.columns else 'count'
-            }).reset_index()
+        if not periodos.empty:
+            evolucion = periodos.copy()
             
-            if pd.api.types.is_datetime64_any_dtype(evolucion['Fecha']):
-                evolucion['Mes_Numero'] = evolucion['Fecha'].dt.month
-                evolucion['Fecha_Str'] = evolucion['Fecha'].dt.strftime('%Y-%m')
-            else:
-                evolucion['Fecha_Str'] = evolucion['Fecha'].astype(str)
-                evolucion['Mes_Numero'] = range(1, len(evolucion) + 1)
+            # Eje X posicional con etiquetas de período (evita repetir meses de años distintos)
+            evolucion['Mes_Numero'] = range(1, len(evolucion) + 1)
+            evolucion['Fecha_Str'] = evolucion['Periodo']
             
             fig = go.Figure()
             
@@ -116,29 +112,30 @@ def show(df, estado_cob):
                 height=350,
                 showlegend=True,
                 legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                xaxis=dict(title="Mes", tickmode='array', tickvals=evolucion['Mes_Numero'], 
+                xaxis=dict(title=granularidad, tickmode='array', tickvals=evolucion['Mes_Numero'], 
                           ticktext=evolucion['Fecha_Str']),
                 yaxis=dict(title="Inventario MUsd"),
                 yaxis2=dict(title="Cobertura (Días)", overlaying='y', side='right'),
                 hovermode='x unified'
             )
             
-            st.plotly_chart(fig, use_container_width=True)
+            plot_chart(fig, cache_key=f"futura_evolucion:{fingerprint}:{granularidad}")
     
     with col3:
-        st.subheader("Distribución por Origen")
+        section("Distribución por grupo")
+        st.subheader(f"Distribución por {group_col}")
         # Distribución proyectada por origen
-        if 'Origen' in df_futuro.columns:
-            distribucion = calculate_distribucion_origen(df_futuro)
+        if group_col in df_futuro.columns:
+            distribucion = calculate_distribucion_origen(df_futuro, group_col)
             
             if not distribucion.empty:
                 fig = px.bar(
                     distribucion,
-                    y='Origen',
+                    y=group_col,
                     x='N_SKU',
                     orientation='h',
                     text='N_SKU',
-                    color='Origen',
+                    color=group_col,
                     color_discrete_map={
                         'LAMPA': '#9E9E9E',
                         'TERCEROS': '#5C6BC0',
@@ -164,10 +161,13 @@ def show(df, estado_cob):
     
     with col1:
         # Top 15 de mayor valor proyectado
+        section("Top 15 de mayor valor (Proyección)")
         st.subheader("Top 15 de mayor valor (Proyección)")
         
         value_col = 'Inv (M/Usd)' if 'Inv (M/Usd)' in df_futuro.columns else 'Inv Kg-L'
-        top_mayor = calculate_top_materials(df_futuro, value_col=value_col, top_n=15, ascending=False)
+        # Rankings sobre una fila por material (mayores y menores en una sola pasada)
+        rankings = rank_materials(cached_material_aggregates(df_futuro, fingerprint), [value_col], k=15).get(value_col, {})
+        top_mayor = rankings.get('mayores', pd.DataFrame())
         
         if not top_mayor.empty:
             st.dataframe(
@@ -182,6 +182,7 @@ def show(df, estado_cob):
         st.markdown("---")
         
         # Total proyectado
+        section("Total Proyectado")
         st.subheader("Total Proyectado")
         
         if value_col in df_futuro.columns:
@@ -193,6 +194,7 @@ def show(df, estado_cob):
             st.metric("FCST Total Proyectado", f"{total_fcst:,.2f}")
     
     with col2:
+        section("Planificación por SKU (Proyección Futura)")
         st.subheader("Planificación por SKU (Proyección Futura)")
         
         # Tabla detallada con proyección
@@ -200,7 +202,7 @@ def show(df, estado_cob):
             columnas = ['Material', 'Fecha']
             
             # Columnas de métricas
-            metricas = ['F (MKL)', 'Inv (MKL)', 'Inv (M/Usd)', 'Cob (D)', 'FCST', 'Inv Kg-L', 'Cob(D)']
+            metricas = ['F (MKL)', 'Inv (MKL)', 'Inv (M/Usd)', 'Cob (D)', 'FCST', 'Inv Kg-L', 'Cob(D)', 'Estado_Cobertura']
             
             for metrica in metricas:
                 if metrica in df_futuro.columns:
@@ -211,50 +213,17 @@ def show(df, estado_cob):
             # Ordenar por fecha y material
             df_planif = df_planif.sort_values(['Fecha', 'Material'])
             
-            # Aplicar colores según estado
-            cob_col = None
-            for col in ['Cob (D)', 'Cob(D)', 'Cobertura']:
-                if col in df_planif.columns:
-                    cob_col = col
-                    break
+            # Grilla paginada: filtro/orden en el servidor y colores de cobertura solo en la página visible
+            cob_col = next((c for c in ['Cob (D)', 'Cob(D)', 'Cobertura'] if c in df_planif.columns), None)
+            paginated_grid(df_planif, key="planif_futura", cob_col=cob_col, orden_inicial='Fecha')
             
-            if cob_col:
-                def highlight_cobertura(val):
-                    if pd.isna(val):
-                        return ''
-                    elif val < 45:
-                        return 'background-color: #FFCDD2'
-                    elif val < 90:
-                        return 'background-color: #FFE082'
-                    else:
-                        return 'background-color: #C8E6C9'
-                
-                st.dataframe(
-                    df_planif.head(30).style.applymap(
-                        highlight_cobertura,
-                        subset=[cob_col]
-                    ),
-                    use_container_width=True,
-                    height=650
-                )
-            else:
-                st.dataframe(
-                    df_planif.head(30),
-                    use_container_width=True,
-                    height=650
-                )
-            
-            # Botón de descarga
-            csv = df_planif.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="📥 Descargar proyección completa",
-                data=csv,
-                file_name=f'proyeccion_futura_{estado_cob}.csv',
-                mime='text/csv',
-            )
+            # Exportación bajo demanda (CSV, Parquet o XLSX con meses en columnas)
+            export_buttons(df_planif, f'proyeccion_futura_{estado_cob}', key="export_futura",
+                           huella=export_key(fingerprint), fecha_col='Fecha')
     
     # KPIs de proyección
     st.markdown("---")
+    section("Resumen de Proyección")
     st.subheader("📊 Resumen de Proyección")
     
     col1, col2, col3, col4 = st.columns(4)
@@ -0,0 +1,92 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from utils.matrices import dataset_fingerprint
+from utils.cache import cached_rollup
+from utils.timing import section
+
+def show(df):
+    """
+    Página de Jerarquía - Roll-up Segmento → Origen → Material con drill-down
+    """
+    st.header("🌳 Jerarquía Segmento → Origen → Material")
+
+    if df.empty:
+        st.warning("No hay datos para mostrar con los filtros seleccionados")
+        return
+
+    rollup = cached_rollup(df, dataset_fingerprint(df))
+
+    if rollup.empty:
+        st.info("Se requiere la columna Material para construir la jerarquía")
+        return
+
+    niveles = [n for n in ['Segmento', 'Origen', 'Material'] if n in rollup.columns]
+    st.caption(f"Niveles disponibles: {' → '.join(niveles)}. Haz clic en un sector del gráfico para profundizar.")
+
+    # Fila 1: Gráfico jerárquico (el drill-down ocurre en el navegador, sin recalcular)
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        tipo = st.radio("Gráfico", ["Sunburst", "Treemap"], horizontal=True)
+        metrica = st.selectbox("Tamaño según", ["FCST", "Inventario", "Despachos", "N° SKU"])
+        color = st.selectbox("Color según", ["Cobertura (D)", "SKUs Críticos"])
+
+    with col1:
+        datos = rollup[rollup[metrica] > 0]
+        grafico = px.sunburst if tipo == "Sunburst" else px.treemap
+        fig = grafico(
+            datos,
+            ids='id',
+            parents='parent',
+            names='Etiqueta',
+            values=metrica,
+            branchvalues='total',
+            color=color,
+            color_continuous_scale=['#EF5350', '#FFA726', '#66BB6A'] if color == "Cobertura (D)" else ['#66BB6A', '#FFA726', '#EF5350'],
+            range_color=[0, 120] if color == "Cobertura (D)" else None,
+            hover_data={'FCST': ':,.0f', 'Inventario': ':,.0f', 'N° SKU': True, 'Cobertura (D)': ':.1f'},
+            maxdepth=3
+        )
+        fig.update_layout(height=550, margin=dict(t=10, l=10, r=10, b=10))
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Fila 2: Tabla de árbol. Todo el roll-up ya está calculado: expandir un nodo no recalcula nada
+    st.markdown("---")
+    section("Tabla Jerárquica")
+    st.subheader("Tabla Jerárquica")
+
+    metric_cols = ['FCST', 'Despachos', 'Inventario', 'N° SKU', 'SKUs Críticos', 'Cobertura (D)']
+    config = {
+        'FCST': st.column_config.NumberColumn(format="%.0f"),
+        'Despachos': st.column_config.NumberColumn(format="%.0f"),
+        'Inventario': st.column_config.NumberColumn(format="%.0f"),
+    }
+
+    total = rollup[rollup['Nivel'] == 'Total']
+    st.dataframe(total[['Etiqueta'] + metric_cols], column_config=config, use_container_width=True, hide_index=True)
+
+    # Nivel intermedio (nodos padre de los materiales) como expanders con sus hijos
+    nivel_padre = niveles[-2] if len(niveles) > 1 else None
+    if nivel_padre is None:
+        st.dataframe(
+            rollup[rollup['Nivel'] == 'Material'][['Etiqueta'] + metric_cols],
+            column_config=config, use_container_width=True, hide_index=True
+        )
+        return
+
+    hijos = rollup[rollup['Nivel'] == 'Material'].groupby('parent', sort=False)
+    padres = rollup[rollup['Nivel'] == nivel_padre].sort_values('FCST', ascending=False)
+
+    for _, nodo in padres.iterrows():
+        ruta = nodo['id'].split('/', 1)[1].replace('/', ' › ')
+        titulo = (
+            f"{ruta} — FCST {nodo['FCST']:,.0f} | Inv {nodo['Inventario']:,.0f} | "
+            f"{nodo['N° SKU']} SKU | Cob {nodo['Cobertura (D)'] if pd.notna(nodo['Cobertura (D)']) else 0:.0f} D"
+        )
+        with st.expander(titulo):
+            if nodo['id'] in hijos.groups:
+                materiales = hijos.get_group(nodo['id']).sort_values('FCST', ascending=False)
+                st.dataframe(
+                    materiales[['Etiqueta'] + metric_cols].rename(columns={'Etiqueta': 'Material'}),
+                    column_config=config, use_container_width=True, hide_index=True
+                )
@@ -3,11 +3,18 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from utils.calculations import calculate_estado_stats, calculate_evolucion_inventario
+from utils.calculations import calculate_estado_stats
+from utils.matrices import dataset_fingerprint
+from utils.granularity import estados_por_periodo, month_codes, period_labels
+from utils.exports import export_key
+from utils.cache import cached_periods
+from utils.widgets import paginated_grid, export_buttons, plot_chart
+from utils.timing import section
 
-def show(df, estado_cob):
+def show(df, estado_cob, granularidad='Mes'):
     """
     Página principal del dashboard - Replica la primera vista del PBI
+    granularidad: 'Mes', 'Trimestre', 'Año a la fecha (YTD)' o 'Móvil 12 meses'
     """
     st.header("📊 Vista Principal - Planificación y Cobertura")
     
@@ -15,10 +22,15 @@ def show(df, estado_cob):
         st.warning("No hay datos para mostrar con los filtros seleccionados")
         return
     
+    # Agregados por período (se re-agrupan desde los agregados mensuales cacheados)
+    fingerprint = dataset_fingerprint(df)
+    periodos = cached_periods(df, fingerprint, granularidad)
+    
     # Fila 1: Tabla de materiales + Material por Estados + Evolutivo Cobertura
     col1, col2, col3 = st.columns([1, 2, 3])
     
     with col1:
+        section("Materiales")
         st.subheader("Materiales")
         # Tabla resumida de materiales
         if 'Material' in df.columns:
@@ -43,20 +55,17 @@ def show(df, estado_cob):
             )
     
     with col2:
+        section("Material por Estados")
         st.subheader("Material por Estados")
         # Gráfico de barras 100% apiladas por mes
-        if 'Estado_Cobertura' in df.columns and 'Fecha' in df.columns:
-            # Agrupar por fecha y estado
-            estado_mes = df.groupby(['Fecha', 'Estado_Cobertura']).size().reset_index(name='Cantidad')
-            
-            # Calcular porcentajes
-            total_por_mes = estado_mes.groupby('Fecha')['Cantidad'].transform('sum')
-            estado_mes['Porcentaje'] = (estado_mes['Cantidad'] / total_por_mes * 100).round(1)
+        if 'Estado_Cobertura' in df.columns and not periodos.empty:
+            # Conteo por período y estado, con porcentajes
+            estado_mes = estados_por_periodo(periodos)
             
             # Crear gráfico de barras apiladas
             fig = px.bar(
                 estado_mes,
-                x='Fecha',
+                x='Periodo',
                 y='Porcentaje',
                 color='Estado_Cobertura',
                 text='Porcentaje',
@@ -65,7 +74,7 @@ def show(df, estado_cob):
                     'Cob < 90': '#FFA726',
                     'Cob > 90': '#66BB6A'
                 },
-                labels={'Porcentaje': '%', 'Fecha': 'Mes 2026'}
+                labels={'Porcentaje': '%', 'Periodo': granularidad}
             )
             
             fig.update_traces(texttemplate='%{text:.0f}%', textposition='inside')
@@ -82,10 +91,11 @@ def show(df, estado_cob):
             st.info("No hay datos de estado de cobertura disponibles")
     
     with col3:
+        section("Evolutivo Cobertura")
         st.subheader("Evolutivo Cobertura")
         # Gráfico combinado de líneas y barras
         if 'Fecha' in df.columns:
-            evolucion = calculate_evolucion_inventario(df)
+            evolucion = periodos
             
             if not evolucion.empty:
                 # Crear figura con eje secundario
@@ -95,7 +105,7 @@ def show(df, estado_cob):
                 if 'Despachos KL' in evolucion.columns:
                     fig.add_trace(
                         go.Bar(
-                            x=evolucion['Fecha'],
+                            x=evolucion['Periodo'],
                             y=evolucion['Despachos KL'],
                             name='Despachos KL',
                             marker_color='#FF6B9D'
@@ -107,7 +117,7 @@ def show(df, estado_cob):
                 if 'FCST' in evolucion.columns:
                     fig.add_trace(
                         go.Bar(
-                            x=evolucion['Fecha'],
+                            x=evolucion['Periodo'],
                             y=evolucion['FCST'],
                             name='FCST Act',
                             marker_color='#4A90E2'
@@ -119,7 +129,7 @@ def show(df, estado_cob):
                 if 'Inv Kg-L' in evolucion.columns:
                     fig.add_trace(
                         go.Scatter(
-                            x=evolucion['Fecha'],
+                            x=evolucion['Periodo'],
                             y=evolucion['Inv Kg-L'],
                             name='Inventario',
                             mode='lines+markers',
@@ -129,13 +139,11 @@ def show(df, estado_cob):
                         secondary_y=False
                     )
                 
-                # Calcular cobertura en días si hay datos
-                if 'Inv Kg-L' in evolucion.columns and 'FCST' in evolucion.columns:
-                    evolucion['Cobertura_Dias'] = (evolucion['Inv Kg-L'] / evolucion['FCST'].replace(0, 1)) * 30
-                    
+                # Cobertura en días (inventario / FCST mensual promedio del período)
+                if 'Cobertura_Dias' in evolucion.columns:
                     fig.add_trace(
                         go.Scatter(
-                            x=evolucion['Fecha'],
+                            x=evolucion['Periodo'],
                             y=evolucion['Cobertura_Dias'],
                             name='Cobertura (Días)',
                             mode='lines+markers',
@@ -145,7 +153,7 @@ def show(df, estado_cob):
                         secondary_y=True
                     )
                 
-                fig.update_xaxes(title_text="Mes")
+                fig.update_xaxes(title_text=granularidad)
                 fig.update_yaxes(title_text="KL", secondary_y=False)
                 fig.update_yaxes(title_text="Cobertura (Días)", secondary_y=True)
                 
@@ -156,12 +164,13 @@ def show(df, estado_cob):
                     hovermode='x unified'
                 )
                 
-                st.plotly_chart(fig, use_container_width=True)
+                plot_chart(fig, cache_key=f"principal_evolucion:{fingerprint}:{granularidad}")
             else:
                 st.info("No hay datos de evolución disponibles")
     
     # Fila 2: Planificación x SKU KL
     st.markdown("---")
+    section("Planificación x SKU KL")
     st.subheader("Planificación x SKU KL")
     
     # Crear tabla detallada pivoteada por mes
@@ -173,9 +182,14 @@ def show(df, estado_cob):
         # Filtrar y preparar datos
         df_planificacion = df[columnas_disponibles].copy()
         
-        # Convertir fecha a nombre de mes
+        # Etiqueta de período desde códigos enteros de mes (solo se formatean los códigos únicos).
+        # YTD y Móvil 12 meses son ventanas acumuladas: la tabla por SKU se mantiene mensual
         if pd.api.types.is_datetime64_any_dtype(df_planificacion['Fecha']):
-            df_planificacion['Mes'] = df_planificacion['Fecha'].dt.strftime('%B %Y')
+            granularidad_tabla = 'Trimestre' if granularidad == 'Trimestre' else 'Mes'
+            codigos = month_codes(df_planificacion['Fecha'])
+            if granularidad_tabla == 'Trimestre':
+                codigos = codigos // 3 * 3
+            df_planificacion['Mes'] = period_labels(codigos, granularidad_tabla)
         else:
             df_planificacion['Mes'] = df_planificacion['Fecha']
         
@@ -188,21 +202,12 @@ def show(df, estado_cob):
             if available_metrics:
                 df_pivot = df_planificacion.groupby(['Material', 'Mes'])[available_metrics].sum().reset_index()
                 
-                # Mostrar tabla con formato
-                st.dataframe(
-                    df_pivot.head(20),
-                    use_container_width=True,
-                    height=400
-                )
+                # Grilla paginada sobre la tabla completa (solo la página visible llega al navegador)
+                paginated_grid(df_pivot, key="planif_principal", height=400)
                 
-                # Botón para descargar datos completos
-                csv = df_pivot.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="📥 Descargar tabla completa (CSV)",
-                    data=csv,
-                    file_name='planificacion_sku.csv',
-                    mime='text/csv',
-                )
+                # Exportación bajo demanda (CSV, Parquet o XLSX con meses en columnas)
+                export_buttons(df_pivot, 'planificacion_sku', key="export_principal",
+                               huella=export_key(fingerprint, granularidad), fecha_col='Mes')
         except Exception as e:
             st.error(f"Error al crear la tabla de planificación: {str(e)}")
             st.dataframe(df_planificacion.head(20), use_container_width=True)
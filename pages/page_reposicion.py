@@ -0,0 +1,167 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from utils.matrices import dataset_fingerprint
+from utils.replenishment import origin_parameters, suggest_orders
+from utils.safety_stock import DEFAULT_SERVICE_LEVEL, per_sku_thresholds
+from utils.cache import cached_matrices, cached_safety_stock
+from utils.exports import export_key
+from utils.widgets import export_buttons
+from utils.timing import section
+
+def _guardar_parametros():
+    """
+    Aplica las ediciones de la tabla de parámetros antes del rerun: así los umbrales por SKU
+    de la barra lateral (que se calculan antes que la página) ya usan los valores editados.
+    """
+    parametros = st.session_state['parametros_origen'].copy()
+    for fila, cambios in st.session_state['parametros_reposicion']['edited_rows'].items():
+        for columna, valor in cambios.items():
+            parametros.loc[parametros.index[int(fila)], columna] = valor
+    st.session_state['parametros_origen'] = parametros
+
+def show(df, df_historia=None):
+    """
+    Página de Reposición - Sugerencia de pedidos por SKU para alcanzar la cobertura objetivo
+    df_historia: dataset completo (sin filtros). El inventario se proyecta sobre él desde el mes
+    en curso; los filtros de la barra lateral (df) solo eligen los SKUs que se muestran.
+    """
+    st.header("🛒 Sugerencia de Reposición")
+
+    if df.empty:
+        st.warning("No hay datos para mostrar con los filtros seleccionados")
+        return
+
+    if not {'Material', 'Fecha', 'FCST', 'Inv Kg-L'}.issubset(df.columns):
+        st.warning("⚠️ Se requieren columnas de Material, Fecha, FCST e Inventario para sugerir pedidos.")
+        return
+
+    if df_historia is None:
+        df_historia = df
+
+    fingerprint = dataset_fingerprint(df_historia)
+    matrices = cached_matrices(df_historia, fingerprint)
+
+    # Parámetros
+    col1, col2 = st.columns([1, 2])
+
+    with col1:
+        section("Parámetros")
+        st.subheader("Parámetros")
+        cobertura_objetivo = st.number_input("Cobertura objetivo (días)", min_value=1, max_value=365, value=90, step=5)
+        umbral_reorden = st.number_input("Pedir cuando la cobertura baje de (días)", min_value=0, max_value=365, value=45, step=5)
+        usar_ss = st.checkbox(
+            "Usar cobertura objetivo por SKU (stock de seguridad)",
+            help="Pide al caer bajo lead time + stock de seguridad de cada SKU y repone hasta el doble"
+        )
+
+    with col2:
+        section("Lead Time y Múltiplo por Origen")
+        st.subheader("Lead Time y Múltiplo por Origen")
+        origenes = sorted(df_historia['Origen'].dropna().unique()) if 'Origen' in df_historia.columns else []
+        if origenes:
+            # Compartidos con los umbrales por SKU de la barra lateral (app.py los inicializa)
+            st.session_state['parametros_origen'] = origin_parameters(origenes, st.session_state.get('parametros_origen'))
+            parametros = st.data_editor(
+                st.session_state['parametros_origen'],
+                disabled=['Origen'],
+                use_container_width=True,
+                hide_index=True,
+                key="parametros_reposicion",
+                on_change=_guardar_parametros
+            )
+        else:
+            st.info("No hay columna Origen: se usan lead time y múltiplo por defecto para todos los SKUs.")
+            parametros = None
+
+    nivel_servicio = st.session_state.get('nivel_servicio', DEFAULT_SERVICE_LEVEL)
+    parametros_json = parametros.to_json(orient='records') if parametros is not None else None
+    # Los pedidos dependen de la historia, los parámetros y el mes en curso (clave de la exportación)
+    clave_pedidos = (fingerprint, parametros_json, nivel_servicio, usar_ss, cobertura_objetivo, umbral_reorden,
+                     pd.Timestamp.now().date())
+    # Misma tabla de stock de seguridad (historia completa) que los umbrales por SKU de la barra lateral
+    tabla_ss = cached_safety_stock(df_historia, fingerprint, nivel_servicio, parametros_json)
+    if usar_ss and tabla_ss is not None:
+        umbral_reorden, cobertura_objetivo = per_sku_thresholds(tabla_ss, matrices['materiales'])
+
+    pedidos = suggest_orders(
+        matrices,
+        parametros_origen=parametros,
+        cobertura_objetivo=cobertura_objetivo,
+        umbral_reorden=umbral_reorden
+    )
+    if not pedidos.empty:
+        pedidos = pedidos[pedidos['Material'].isin(df['Material'].unique())].reset_index(drop=True)
+
+    # KPIs
+    st.markdown("---")
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("SKUs a Pedir", f"{len(pedidos):,}")
+
+    with col2:
+        atrasados = int((pedidos['Estado Pedido'] == 'Atrasado').sum()) if not pedidos.empty else 0
+        st.metric("Pedidos Atrasados", f"{atrasados:,}")
+
+    with col3:
+        este_mes = int((pedidos['Estado Pedido'] == 'Pedir este mes').sum()) if not pedidos.empty else 0
+        st.metric("Pedir este Mes", f"{este_mes:,}")
+
+    with col4:
+        total = pedidos['Cantidad Sugerida'].sum() if not pedidos.empty else 0
+        st.metric("Cantidad Total (KL)", f"{total:,.0f}")
+
+    if pedidos.empty:
+        st.success("✅ Ningún SKU cae bajo el umbral de reposición en el horizonte proyectado.")
+        return
+
+    # Pedidos por mes de necesidad + tabla
+    col1, col2 = st.columns([1, 2])
+
+    with col1:
+        section("Cantidad por Mes de Necesidad")
+        st.subheader("Cantidad por Mes de Necesidad")
+        por_mes = pedidos.groupby(['Mes Necesidad', 'Estado Pedido'])['Cantidad Sugerida'].sum().reset_index()
+        fig = px.bar(
+            por_mes,
+            x='Mes Necesidad',
+            y='Cantidad Sugerida',
+            color='Estado Pedido',
+            color_discrete_map={
+                'Atrasado': '#EF5350',
+                'Pedir este mes': '#FFA726',
+                'Planificado': '#66BB6A'
+            }
+        )
+        fig.update_layout(
+            barmode='stack',
+            height=400,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        section("Pedidos Sugeridos")
+        st.subheader("Pedidos Sugeridos")
+        st.dataframe(
+            pedidos,
+            column_config={
+                'Mes Necesidad': st.column_config.DateColumn(format="YYYY-MM"),
+                'Fecha Límite Pedido': st.column_config.DateColumn(format="DD/MM/YYYY"),
+                'Cantidad Sugerida': st.column_config.NumberColumn(format="%.0f"),
+            },
+            use_container_width=True,
+            height=400,
+            hide_index=True
+        )
+
+    # Stock de seguridad por SKU
+    if tabla_ss is not None:
+        with st.expander(f"🛡️ Stock de seguridad por SKU (nivel de servicio {nivel_servicio:.0%})"):
+            st.caption("SS = z × σ(Despachos − FCST) × √(lead time en meses). Cobertura objetivo = lead time + días de SS.")
+            st.dataframe(tabla_ss, use_container_width=True, height=350, hide_index=True)
+
+    # Exportar (CSV o XLSX con la hoja 'Pedidos Sugeridos')
+    export_buttons(pedidos, 'Pedidos Sugeridos', key="export_pedidos",
+                   huella=export_key(*clave_pedidos, tuple(pedidos['Material'])), formatos=['CSV', 'XLSX'])
@@ -0,0 +1,150 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from utils.matrices import dataset_fingerprint
+from utils.cache import cached_matrices, cached_stockout_risk
+from utils.widgets import plot_chart
+from utils.timing import section
+
+def show(df, df_historia=None):
+    """
+    Página de riesgo de quiebre - Estimación probabilística (Monte Carlo) por SKU y mes
+    df_historia: dataset completo (sin filtros). El error histórico y el inventario inicial salen de él
+    y se simula desde el mes en curso; los filtros de la barra lateral (df) eligen los SKUs y meses que se muestran.
+    """
+    st.header("🎲 Riesgo de Quiebre de Stock")
+
+    if df.empty:
+        st.warning("No hay datos para mostrar con los filtros seleccionados")
+        return
+
+    if not {'Material', 'Fecha', 'FCST', 'Inv Kg-L'}.issubset(df.columns):
+        st.warning("⚠️ Se requieren columnas de Material, Fecha, FCST e Inventario para estimar el riesgo.")
+        return
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        n_paths = st.select_slider(
+            "Trayectorias simuladas",
+            options=[1_000, 2_000, 5_000, 10_000, 20_000],
+            value=10_000
+        )
+    with col2:
+        st.markdown("""
+        La demanda de cada trayectoria se obtiene del FCST aplicando el error histórico de cada SKU
+        (FCST vs. Despachos, el mismo usado en WAPE). El inventario se proyecta mes a mes sumando
+        recepciones y restando demanda; un **quiebre** ocurre cuando el inventario queda negativo.
+        """)
+
+    if df_historia is None:
+        df_historia = df
+
+    fingerprint = dataset_fingerprint(df_historia)
+    resultado = cached_stockout_risk(df_historia, fingerprint, n_paths)
+
+    if resultado is None:
+        st.info("No hay datos suficientes para simular")
+        return
+
+    if resultado['sin_historia']:
+        st.info("No hay despachos registrados: la simulación no tiene variabilidad y equivale a la proyección determinística.")
+
+    matrices = cached_matrices(df_historia, fingerprint)
+
+    # Vista: SKUs filtrados y meses simulados dentro del filtro de fechas (si no hay, todo el horizonte)
+    filas = np.isin(matrices['materiales'], df['Material'].unique())
+    fechas = resultado['fechas']
+    meses = fechas.isin(pd.DatetimeIndex(df['Fecha'].dropna().unique()))
+    if not meses.any():
+        meses = np.ones(len(fechas), dtype=bool)
+    prob_mes = resultado['prob_mes'][:, meses]
+    tabla = resultado['tabla'][resultado['tabla']['Material'].isin(matrices['materiales'][filas])]
+    huella_vista = dataset_fingerprint(df)
+
+    # KPIs
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("SKUs Simulados", f"{len(tabla):,}")
+
+    with col2:
+        alto = int((tabla['Prob. Quiebre %'] > 50).sum())
+        st.metric("SKUs con Riesgo > 50%", f"{alto:,}")
+
+    with col3:
+        esperados = resultado['prob_horizonte'][filas].sum()
+        st.metric("Quiebres Esperados (SKUs)", f"{esperados:,.1f}")
+
+    with col4:
+        if 'Estado_Cobertura' in df.columns:
+            criticos = df.loc[df['Estado_Cobertura'] == 'Cob < 45', 'Material'].nunique()
+            st.metric("SKUs Críticos (Cob < 45)", f"{criticos:,}")
+
+    st.markdown("---")
+
+    col1, col2 = st.columns([2, 3])
+
+    with col1:
+        section("SKUs con Mayor Riesgo")
+        st.subheader("SKUs con Mayor Riesgo")
+        st.dataframe(
+            tabla,
+            column_config={
+                'Prob. Quiebre %': st.column_config.ProgressColumn(format="%.1f%%", min_value=0, max_value=100),
+                'Inv Inicial': st.column_config.NumberColumn(format="%.0f"),
+            },
+            use_container_width=True,
+            height=450,
+            hide_index=True
+        )
+
+    with col2:
+        section("Probabilidad de Quiebre por Mes (Top 30)")
+        st.subheader("Probabilidad de Quiebre por Mes (Top 30)")
+        top = tabla.head(30)['Material']
+        posiciones = pd.Index(matrices['materiales']).get_indexer(top)
+        heat = pd.DataFrame(
+            prob_mes[posiciones] * 100,
+            index=top.astype(str),
+            columns=fechas[meses].strftime('%Y-%m')
+        )
+
+        fig = px.imshow(
+            heat,
+            color_continuous_scale=['#C8E6C9', '#FFE082', '#EF5350'],
+            zmin=0,
+            zmax=100,
+            aspect='auto',
+            labels={'color': 'Prob. %', 'x': 'Mes', 'y': 'Material'}
+        )
+        fig.update_layout(height=450)
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Evolución de quiebres esperados vs. conteo determinístico
+    st.markdown("---")
+    section("SKUs en Quiebre Esperados por Mes")
+    st.subheader("SKUs en Quiebre Esperados por Mes")
+
+    evolucion = pd.DataFrame({
+        'Fecha': fechas[meses],
+        'Quiebres Esperados': prob_mes[filas].sum(axis=0),
+    })
+    if 'Estado_Cobertura' in df.columns:
+        deterministico = df[df['Estado_Cobertura'] == 'Cob < 45'].groupby('Fecha')['Material'].nunique()
+        evolucion['SKUs Cob < 45'] = evolucion['Fecha'].map(deterministico).fillna(0)
+
+    fig = px.line(
+        evolucion.melt(id_vars='Fecha', var_name='Métrica', value_name='SKUs'),
+        x='Fecha',
+        y='SKUs',
+        color='Métrica',
+        markers=True,
+        color_discrete_map={'Quiebres Esperados': '#EF5350', 'SKUs Cob < 45': '#42A5F5'}
+    )
+    fig.update_layout(
+        height=350,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        hovermode='x unified'
+    )
+    plot_chart(fig, cache_key=f"riesgo_evolucion:{fingerprint}:{huella_vista}:{n_paths}")
@@ -4,12 +4,22 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 from plotly.subplots import make_subplots
-from utils.calculations import calculate_wape, calculate_wape_evolution
+from utils.calculations import calculate_wape
+from utils.matrices import dataset_fingerprint
+from utils.baseline import forecast_value_added
+from utils.tracking import tracking_alerts, DEFAULT_TS_LIMIT
+from utils.ranking import rank_materials
+from utils.cache import cached_matrices, cached_baselines, cached_tracking_state, cached_periods, cached_material_aggregates
+from utils.widgets import plot_chart
+from utils.timing import section
 
-def show(df):
+def show(df, df_historia=None, group_col='Origen', granularidad='Mes'):
     """
     Página de WAPE (Weighted Absolute Percentage Error) - Replica la cuarta vista del PBI
-    Análisis de precisión del forecast
+    Análisis de precisión del forecast.
+    df_historia (opcional) es el dataset sin filtro de fechas, usado para ajustar los baselines.
+    group_col es la columna de agrupación del gráfico de WAPE (Origen por defecto, o ABC/XYZ).
+    granularidad define el período de la tabla y el gráfico de evolución del WAPE.
     """
     st.header("📉 WAPE (Kg-L) - Análisis de Precisión del Forecast")
     
@@ -17,6 +27,8 @@ def show(df):
         st.warning("No hay datos para mostrar")
         return
     
+    fingerprint = dataset_fingerprint(df)
+    
     # Verificar que existan las columnas necesarias para WAPE
     has_fcst = 'FCST' in df.columns or 'F (MKL)' in df.columns
     has_desp = 'Despachos KL' in df.columns or 'Desp (MKL)' in df.columns
@@ -34,12 +46,13 @@ def show(df):
     col1, col2, col3 = st.columns([2, 2, 2])
     
     with col1:
-        st.subheader("WAPE % por Origen")
+        section("WAPE % por grupo")
+        st.subheader(f"WAPE % por {group_col}")
         # Calcular WAPE por origen
         df_wape_origen = pd.DataFrame()
-        if 'Origen' in df.columns:
+        if group_col in df.columns:
             # Optimización: Usar groupby en lugar de un bucle for para mayor rendimiento
-            df_wape_origen = df.groupby('Origen').agg(
+            df_wape_origen = df.groupby(group_col, observed=True).agg(
                 fcst_total=(fcst_col, 'sum'),
                 desp_total=(desp_col, 'sum')
             ).reset_index()
@@ -54,8 +67,8 @@ def show(df):
                 fig = px.pie(
                     df_wape_origen,
                     values='Wape_%',
-                    names='Origen',
-                    color='Origen',
+                    names=group_col,
+                    color=group_col,
                     color_discrete_map={
                         'LAMPA': '#9E9E9E',
                         'LAMPA (M)': '#FFA726',
@@ -79,31 +92,23 @@ def show(df):
                     hide_index=True
                 )
         else:
-            st.info("No hay datos de origen disponibles")
+            st.info(f"No hay datos de {group_col} disponibles")
 
-    # Optimización: Calcular WAPE por material una sola vez usando groupby
+    # WAPE por material: una fila por SKU (cacheada) y rankings mayores/menores en una sola pasada
     df_wape_mat = pd.DataFrame()
+    rankings_wape = {}
     if 'Material' in df.columns:
-        group_cols = ['Material']
-        if 'Origen' in df.columns:
-            group_cols.append('Origen')
-
-        df_wape_mat = df.groupby(group_cols).agg(
-            fcst_total=(fcst_col, 'sum'),
-            desp_total=(desp_col, 'sum')
-        ).reset_index()
-
-        df_wape_mat = df_wape_mat[df_wape_mat['desp_total'] > 0].copy()
-        if not df_wape_mat.empty:
-            df_wape_mat['Wape (%)'] = calculate_wape(df_wape_mat['fcst_total'], df_wape_mat['desp_total'])
-            df_wape_mat['Dif Wape Abs(MKL)'] = (df_wape_mat['desp_total'] - df_wape_mat['fcst_total']).abs()
-            # Seleccionar y reordenar columnas para mantener consistencia
-            df_wape_mat = df_wape_mat[group_cols + ['Wape (%)', 'Dif Wape Abs(MKL)']]
+        agregados = cached_material_aggregates(df, fingerprint, fcst_col, desp_col)
+        if 'Wape (%)' in agregados.columns:
+            df_wape_mat = agregados[agregados[desp_col] > 0]
+            columnas_wape = ['Material'] + (['Origen'] if 'Origen' in df_wape_mat.columns else []) + ['Wape (%)', 'Dif Wape Abs(MKL)']
+            rankings_wape = rank_materials(df_wape_mat, ['Wape (%)'], k=15, columnas=columnas_wape).get('Wape (%)', {})
 
     with col2:
+        section("Mes en curso: Mayores 15")
         st.subheader("Mes en curso: Mayores 15")
         if not df_wape_mat.empty:
-            top_15_mayor = df_wape_mat.nlargest(15, 'Wape (%)')
+            top_15_mayor = rankings_wape['mayores']
             st.dataframe(
                 top_15_mayor, use_container_width=True, height=350, hide_index=True
             )
@@ -111,11 +116,12 @@ def show(df):
             st.info("No hay datos de material para calcular WAPE.")
     
     with col3:
+        section("Mes en curso: Menores 15")
         st.subheader("Mes en curso: Menores 15")
         # Top 15 materiales con menor WAPE (mejor precisión)
         
         if 'Material' in df.columns and not df_wape_mat.empty:
-            top_15_menor = df_wape_mat.nsmallest(15, 'Wape (%)')
+            top_15_menor = rankings_wape['menores']
             
             st.dataframe(
                 top_15_menor,
@@ -132,11 +138,17 @@ def show(df):
     col1, col2 = st.columns([1, 2])
     
     with col1:
+        section("Cálculo WAPE")
         st.subheader("Cálculo WAPE")
         
-        # Tabla de cálculo WAPE por fecha
+        # Tabla de cálculo WAPE por período (suma de los errores absolutos mensuales del período)
         if 'Fecha' in df.columns:
-            wape_mensual = calculate_wape_evolution(df, 'Fecha')
+            periodos = cached_periods(df, fingerprint, granularidad)
+            wape_mensual = pd.DataFrame()
+            if not periodos.empty:
+                wape_mensual = periodos[['Periodo', 'FCST', 'Despachos KL', 'Dif_Wape_Abs', 'Wape_%']].rename(
+                    columns={'Despachos KL': 'Despachos'}
+                )
             
             if not wape_mensual.empty:
                 # Formatear columnas
@@ -167,7 +179,8 @@ def show(df):
             st.info("No hay datos de fecha para calcular WAPE mensual")
     
     with col2:
-        st.subheader("Evolución WAPE Mensual")
+        section("Evolución WAPE")
+        st.subheader("Evolución WAPE Mensual" if granularidad == 'Mes' else f"Evolución WAPE ({granularidad})")
         
         # Gráfico de cascada (waterfall) mostrando evolución del WAPE
         if 'Fecha' in df.columns and not wape_mensual.empty:
@@ -179,7 +192,7 @@ def show(df):
             # Barras de -Wape (azul, negativo)
             fig.add_trace(
                 go.Bar(
-                    x=wape_mensual['Fecha'],
+                    x=wape_mensual['Periodo'],
                     y=wape_mensual['-Wape (MKL)'],
                     name='-Wape',
                     marker_color='#42A5F5',
@@ -192,7 +205,7 @@ def show(df):
             # Barras de +Wape (azul oscuro, positivo)
             fig.add_trace(
                 go.Bar(
-                    x=wape_mensual['Fecha'],
+                    x=wape_mensual['Periodo'],
                     y=wape_mensual['+Wape (MKL)'],
                     name='+Wape',
                     marker_color='#1565C0',
@@ -205,7 +218,7 @@ def show(df):
             # Línea de Wape%
             fig.add_trace(
                 go.Scatter(
-                    x=wape_mensual['Fecha'],
+                    x=wape_mensual['Periodo'],
                     y=wape_mensual['Wape_%'],
                     name='Wape%',
                     mode='lines+markers',
@@ -217,7 +230,7 @@ def show(df):
                 secondary_y=True
             )
             
-            fig.update_xaxes(title_text="Mes")
+            fig.update_xaxes(title_text=granularidad)
             fig.update_yaxes(title_text="-Wape y +Wape", secondary_y=False)
             fig.update_yaxes(title_text="Wape%", secondary_y=True)
             
@@ -229,12 +242,25 @@ def show(df):
                 barmode='relative'
             )
             
-            st.plotly_chart(fig, use_container_width=True)
+            plot_chart(fig, cache_key=f"wape_evolucion:{fingerprint}:{granularidad}")
         else:
             st.info("No hay suficientes datos para mostrar la evolución")
     
+    # Fila 3: Valor agregado del forecast (FVA) contra baselines estadísticos
+    st.markdown("---")
+    section("Valor Agregado del Forecast (FVA)")
+    st.subheader("🧮 Valor Agregado del Forecast (FVA)")
+    show_fva(df, df_historia if df_historia is not None else df)
+
+    # Fila 4: Señal de rastreo por SKU (detección de sesgo sostenido)
+    st.markdown("---")
+    section("Señal de Rastreo (Tracking Signal)")
+    st.subheader("🚨 Señal de Rastreo (Tracking Signal)")
+    show_tracking_signal(df, df_historia if df_historia is not None else df)
+
     # KPIs de WAPE
     st.markdown("---")
+    section("Métricas Clave de WAPE")
     st.subheader("📊 Métricas Clave de WAPE")
     
     col1, col2, col3, col4 = st.columns(4)
@@ -269,3 +295,121 @@ def show(df):
     **+Wape**: Sobre-forecast (proyectamos más de lo que se vendió)
     **-Wape**: Sub-forecast (proyectamos menos de lo que se vendió)
     """)
+
+
+def show_fva(df, df_historia):
+    """
+    Sección FVA: compara el WAPE del FCST contra baselines ajustados sobre la historia de despachos.
+    Se evalúa sobre todos los meses con despachos de la historia (el filtro de fechas suele dejar
+    solo meses futuros); df solo restringe los SKUs.
+    """
+    if not {'Material', 'Fecha', 'FCST', 'Despachos KL'}.issubset(df_historia.columns):
+        st.info("Se requieren columnas de Material, Fecha, FCST y Despachos KL para calcular FVA")
+        return
+
+    fingerprint = dataset_fingerprint(df_historia)
+    matrices = cached_matrices(df_historia, fingerprint)
+    baselines = cached_baselines(df_historia, fingerprint)
+
+    if matrices is None or baselines is None or df_historia['Despachos KL'].sum() == 0:
+        st.info("No hay despachos registrados para comparar contra baselines")
+        return
+
+    fva_sku, fva_origen = forecast_value_added(
+        matrices,
+        baselines,
+        materiales=df['Material'].unique()
+    )
+
+    st.caption("FVA = WAPE del baseline − WAPE del FCST (puntos porcentuales), sobre los meses con despachos "
+               "registrados de toda la historia. Positivo: el FCST mejora al baseline.")
+
+    fva_cols = [c for c in fva_sku.columns if c.startswith('FVA vs')]
+    fva_config = {c: st.column_config.NumberColumn(format="%+.1f") for c in fva_cols}
+
+    col1, col2 = st.columns([2, 3])
+
+    with col1:
+        if fva_origen is not None and not fva_origen.empty:
+            st.markdown("##### FVA por Origen")
+            fig = px.bar(
+                fva_origen.melt(id_vars='Origen', value_vars=fva_cols, var_name='Baseline', value_name='FVA (pp)'),
+                x='Origen',
+                y='FVA (pp)',
+                color='Baseline',
+                barmode='group'
+            )
+            fig.update_layout(
+                height=350,
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(fva_origen, column_config=fva_config, use_container_width=True, hide_index=True)
+        else:
+            st.info("No hay datos de origen disponibles")
+
+    with col2:
+        st.markdown("##### FVA por SKU")
+        st.dataframe(
+            fva_sku.sort_values('WAPE FCST %', ascending=False),
+            column_config=fva_config,
+            use_container_width=True,
+            height=450,
+            hide_index=True
+        )
+
+
+def show_tracking_signal(df, df_historia):
+    """
+    Sección de señal de rastreo: error acumulado / MAD por SKU, con tabla de alertas filtrable
+    """
+    if not {'Material', 'Fecha', 'FCST', 'Despachos KL'}.issubset(df_historia.columns):
+        st.info("Se requieren columnas de Material, Fecha, FCST y Despachos KL para la señal de rastreo")
+        return
+
+    if df_historia['Despachos KL'].sum() == 0:
+        st.info("No hay despachos registrados para calcular la señal de rastreo")
+        return
+
+    fingerprint = dataset_fingerprint(df_historia)
+    state = cached_tracking_state(df_historia, fingerprint)
+    if state is None:
+        st.info("No hay datos suficientes para calcular la señal de rastreo")
+        return
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        limite = st.number_input(
+            "Límite |TS|", min_value=1.0, max_value=10.0, value=DEFAULT_TS_LIMIT, step=0.5,
+            help="Se alerta cuando la señal de rastreo supera este valor absoluto"
+        )
+    with col2:
+        alertas_sel = st.multiselect(
+            "Mostrar", options=['Sub-forecast', 'Sobre-forecast', 'OK'], default=['Sub-forecast', 'Sobre-forecast']
+        )
+    with col3:
+        busqueda = st.text_input("Buscar material", value="")
+
+    matrices = cached_matrices(df_historia, fingerprint)
+    tabla = tracking_alerts(state, matrices['atributos'], limite=limite, materiales=df['Material'].unique())
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("SKUs Evaluados", f"{len(tabla):,}")
+    c2.metric("Alertas Sub-forecast", f"{(tabla['Alerta'] == 'Sub-forecast').sum():,}")
+    c3.metric("Alertas Sobre-forecast", f"{(tabla['Alerta'] == 'Sobre-forecast').sum():,}")
+
+    tabla = tabla[tabla['Alerta'].isin(alertas_sel)]
+    if busqueda:
+        tabla = tabla[tabla['Material'].astype(str).str.contains(busqueda, case=False, regex=False)]
+
+    st.dataframe(
+        tabla,
+        column_config={
+            'Tracking Signal': st.column_config.NumberColumn(format="%+.2f"),
+            'Error Acumulado': st.column_config.NumberColumn(format="%.0f"),
+            'MAD': st.column_config.NumberColumn(format="%.1f"),
+        },
+        use_container_width=True,
+        height=400,
+        hide_index=True
+    )
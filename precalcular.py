@@ -0,0 +1,55 @@
+"""
+Precálculo sin Streamlit: lee el libro Excel una vez y guarda el dataset y los agregados que el
+dashboard calcula al abrirse (índice de materiales, ABC/XYZ, matrices, stock de seguridad, baselines,
+señal de rastreo, agregados mensuales y por material, jerarquía y riesgo de quiebre).
+El dashboard los lee de data/precalculado en lugar de leer el Excel y calcular.
+
+Uso:
+    python precalcular.py
+    python precalcular.py --archivo "data/Master ACOL FEB-2026 V2.xlsx" --trayectorias 20000
+
+Ejecutar de nuevo cada vez que cambie el libro (un libro distinto simplemente no usa el precálculo),
+o dejar corriendo vigilar_datos.py, que lo hace automáticamente.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from utils.data_loader import AVISO_ADVERTENCIA, AVISO_ERROR, find_local_workbook
+from utils.precompute import DEFAULT_N_PATHS, PRECOMPUTE_DIR, precompute_workbook
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula el dataset y los agregados del dashboard")
+    parser.add_argument('--archivo', help="Libro Excel (por defecto, el que carga el dashboard desde la carpeta data)")
+    parser.add_argument('--salida', default=str(PRECOMPUTE_DIR), help="Carpeta del precálculo (por defecto data/precalculado)")
+    parser.add_argument('--trayectorias', type=int, default=DEFAULT_N_PATHS, help="Trayectorias de Monte Carlo del riesgo de quiebre")
+    args = parser.parse_args()
+
+    archivo = Path(args.archivo) if args.archivo else find_local_workbook()
+    if archivo is None or not archivo.exists():
+        print("No se encontró el libro Excel. Usa --archivo o guarda el archivo en la carpeta data.", file=sys.stderr)
+        return 1
+
+    avisos = []
+    manifiesto = precompute_workbook(
+        archivo, directorio=args.salida, n_paths=args.trayectorias, avisos=avisos,
+        progreso=lambda nombre, segundos: print(f"  {nombre:<20} {segundos:7.2f} s")
+    )
+
+    for aviso in avisos:
+        if aviso['nivel'] in (AVISO_ADVERTENCIA, AVISO_ERROR):
+            print(aviso['mensaje'], file=sys.stderr)
+            if aviso.get('detalle'):
+                print(aviso['detalle'], file=sys.stderr)
+    if manifiesto is None:
+        print(f"No se pudieron leer datos de {archivo}", file=sys.stderr)
+        return 1
+
+    print(f"{archivo.name}: {manifiesto['filas']:,} filas, {len(manifiesto['entradas'])} agregados "
+          f"en {manifiesto['segundos']:.1f} s -> {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Prueba de carga: simula sesiones concurrentes del dashboard (AppTest, un hilo por sesión en un mismo
+proceso, como el servidor) que fijan uno de los libros de data, cambian filtros, cambian de página y suben
+libros. Informa percentiles de latencia de los reruns, throughput y pico de RSS, y agrega cada medición
+a rendimiento/carga.jsonl.
+
+Uso:
+    python prueba_carga.py --sesiones 1 2 4 8               (una medición por nivel de concurrencia)
+    python prueba_carga.py --sesiones 6 --acciones 40 --pausa 2 --datos rendimiento/libros
+    python prueba_carga.py --sesiones 4 --max-p95 3 --max-rss 2048   (termina con error si se excede)
+"""
+import os
+import sys
+import argparse
+
+
+def _mb(n):
+    return f"{n / 2**20:,.0f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula sesiones concurrentes del dashboard y mide su capacidad")
+    parser.add_argument('--sesiones', type=int, nargs='+', default=[4], help="Sesiones concurrentes (uno o más niveles)")
+    parser.add_argument('--acciones', type=int, default=20, help="Acciones por sesión (páginas, filtros, búsquedas, subidas)")
+    parser.add_argument('--pausa', type=float, default=0.0, help="Pausa media entre acciones en segundos (0: sin pausa)")
+    parser.add_argument('--datos', help="Carpeta de libros (por defecto data o DASHBOARD_DATA_DIR)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los recorridos de las sesiones")
+    parser.add_argument('--sin-calentar', action='store_true', help="Medir con los cachés vacíos")
+    parser.add_argument('--max-p95', type=float, help="Latencia p95 máxima en segundos")
+    parser.add_argument('--max-rss', type=float, help="Pico de RSS máximo en MB")
+    parser.add_argument('--sin-historial', action='store_true', help="No agregar las mediciones a rendimiento/carga.jsonl")
+    args = parser.parse_args()
+
+    # La app corre en este proceso: la carpeta de datos se fija antes de importar utils
+    if args.datos:
+        os.environ['DASHBOARD_DATA_DIR'] = os.path.abspath(args.datos)
+    from utils.loadtest import LOAD_HISTORY, PERCENTILES, run_load
+    from utils.startup import append_history
+
+    excedido = False
+    for i, sesiones in enumerate(args.sesiones):
+        medicion = run_load(sesiones, args.acciones, args.semilla, args.pausa, calentar=not args.sin_calentar and i == 0)
+        latencia = medicion['latencia']
+        print(f"{sesiones} sesiones: {medicion['reruns']} reruns en {medicion['segundos']:.1f} s "
+              f"({medicion['throughput']:.2f} reruns/s), RSS {_mb(medicion['rss_inicial'])} -> {_mb(medicion['rss_pico'])}")
+        print("  " + "  ".join(f"p{p} {latencia.get(f'p{p}', 0):.2f} s" for p in PERCENTILES) +
+              f"  max {latencia.get('max', 0):.2f} s")
+        for accion, resumen in list(medicion['por_accion'].items()) + [('subida', medicion['subidas'])]:
+            if resumen:
+                print(f"    {accion:<10} n={resumen['n']:<4} p50 {resumen['p50']:.2f} s  p95 {resumen['p95']:.2f} s")
+        for error in medicion['errores']:
+            print(f"  error: {error}", file=sys.stderr)
+
+        excedido |= bool(medicion['errores'])
+        if args.max_p95 is not None and latencia.get('p95', 0) > args.max_p95:
+            print(f"  p95 excede {args.max_p95} s", file=sys.stderr)
+            excedido = True
+        if args.max_rss is not None and medicion['rss_pico'] > args.max_rss * 2**20:
+            print(f"  RSS excede {args.max_rss:,.0f} MB", file=sys.stderr)
+            excedido = True
+        if not args.sin_historial:
+            append_history(medicion, LOAD_HISTORY)
+    return 1 if excedido else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
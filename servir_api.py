@@ -0,0 +1,54 @@
+"""
+API local de indicadores (JSON / Arrow) en un proceso propio, junto al dashboard: coberturas por estado,
+WAPE por Origen, SKUs críticos, evolución por período y jerarquía, sin abrir el navegador ni leer el Excel
+en cada consulta. Lee el precálculo de precalcular.py si existe y recarga el libro cuando cambia.
+
+Uso:
+    python servir_api.py
+    python servir_api.py --puerto 8502 --archivo "data/Master ACOL FEB-2026 V2.xlsx"
+
+Consultas (GET):
+    /api/estado                                  libro, huella, meses y grupos disponibles
+    /api/kpis?grupo=LEA&fecha=2026-02            indicadores del mes (por defecto el mes en curso)
+    /api/coberturas?por=ABC&granularidad=Trimestre
+    /api/periodos?grupo=LEA&estado=Cob%20<%2045
+    /api/wape?por=Origen&desde=2025-01
+    /api/criticos?grupo=LEA&limite=50
+    /api/jerarquia
+Las tablas aceptan formato=arrow (Arrow IPC stream) además de JSON.
+"""
+import argparse
+import sys
+
+from utils.api import API_HOST, API_PORT, ApiError, current_data, make_server, new_api_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API local de indicadores del dashboard (JSON / Arrow)")
+    parser.add_argument('--archivo', help="Libro Excel (por defecto, el que carga el dashboard desde la carpeta data)")
+    parser.add_argument('--host', default=API_HOST, help=f"Dirección de escucha (por defecto {API_HOST}, solo local)")
+    parser.add_argument('--puerto', type=int, default=API_PORT, help=f"Puerto (por defecto {API_PORT})")
+    parser.add_argument('--silencioso', action='store_true', help="No registrar cada consulta")
+    args = parser.parse_args()
+
+    store = new_api_store(args.archivo)
+    try:
+        # Carga inicial: la primera consulta ya no espera la lectura del libro
+        datos = current_data(store)
+        print(f"{datos['archivo']}: {datos['filas']:,} filas cargadas en {datos['segundos_carga']:.1f} s")
+    except ApiError as e:
+        print(f"{e} (se reintentará en cada consulta)", file=sys.stderr)
+
+    server = make_server(store, args.host, args.puerto, registro=not args.silencioso)
+    print(f"API en http://{args.host}:{args.puerto}/api/estado (Ctrl+C para detener)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
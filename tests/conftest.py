@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.matrices import build_sku_month_matrices  # noqa: E402
+
+
+# Mes en curso de las pruebas: enero-junio 2026 tienen despachos, julio-diciembre son futuros
+HOY = pd.Timestamp('2026-07-15')
+
+
+@pytest.fixture
+def hoy():
+    return HOY
+
+
+@pytest.fixture
+def libro():
+    """
+    Dataset largo con 12 meses de 2026 y cuatro SKUs; los meses futuros traen Despachos en cero
+    (como el libro real). A despacha lo proyectado, B despacha de más, C de menos y D es errático.
+    """
+    fechas = pd.date_range('2026-01-01', periods=12, freq='MS')
+    pasado = fechas < HOY.to_period('M').start_time
+    fcst = np.full(12, 100.0)
+    despachos = {
+        'A': fcst.copy(),
+        'B': fcst * 1.5,
+        'C': fcst * 0.5,
+        'D': np.array([0, 300, 0, 250, 0, 400, 0, 0, 0, 0, 0, 0], dtype=float),
+    }
+    origen = {'A': 'LAMPA', 'B': 'LAMPA', 'C': 'LEA', 'D': 'LEA'}
+    filas = []
+    for material, desp in despachos.items():
+        for fecha, f, d, es_pasado in zip(fechas, fcst, desp, pasado):
+            filas.append({
+                'Material': material,
+                'Fecha': fecha,
+                'Origen': origen[material],
+                'FCST': f,
+                'Despachos KL': d if es_pasado else 0.0,
+                'Inv Kg-L': 250.0,
+            })
+    return pd.DataFrame(filas)
+
+
+@pytest.fixture
+def matrices(libro):
+    return build_sku_month_matrices(libro)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from utils.baseline import baseline_forecasts, forecast_value_added
+
+
+def _fva(matrices, hoy, **kwargs):
+    baselines = baseline_forecasts(matrices['valores']['Despachos KL'])
+    return forecast_value_added(matrices, baselines, hoy=hoy, **kwargs)
+
+
+def test_fva_solo_meses_con_despachos(matrices, hoy):
+    sku, origen = _fva(matrices, hoy)
+    sku = sku.set_index('Material')
+
+    # Los 6 meses futuros (despachos en cero) no suman error del FCST
+    assert sku.loc['A', 'Despachos'] == 600
+    assert sku.loc['A', 'WAPE FCST %'] == 0
+    assert sku.loc['B', 'WAPE FCST %'] == 33.3
+    assert sku.loc['C', 'WAPE FCST %'] == 100
+
+    origen = origen.set_index('Origen')
+    assert origen.loc['LAMPA', 'WAPE FCST %'] == 20
+
+
+def test_fva_contra_naive_en_meses_reales(matrices, hoy):
+    sku, _ = _fva(matrices, hoy)
+    sku = sku.set_index('Material')
+    # B despacha siempre lo mismo: el naive acierta y el FCST pierde 33.3 pp
+    assert sku.loc['B', 'WAPE Naive %'] == 0
+    assert sku.loc['B', 'FVA vs Naive (pp)'] == -33.3
+    # D es errático: el FCST plano gana al naive
+    assert sku.loc['D', 'FVA vs Naive (pp)'] > 0
+
+
+def test_fva_filtro_de_fechas_futuras_no_tiene_real(matrices, hoy):
+    futuras = pd.date_range('2026-07-01', periods=6, freq='MS')
+    sku, origen = _fva(matrices, hoy, fechas=futuras)
+    assert sku.empty
+    assert origen.empty
+
+
+def test_fva_restringe_materiales(matrices, hoy):
+    sku, _ = _fva(matrices, hoy, materiales=np.array(['A', 'C']))
+    assert sorted(sku['Material']) == ['A', 'C']
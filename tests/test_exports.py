@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from utils import exports
+from utils.exports import export_file, export_key, pivot_months, safe_name
+
+
+@pytest.fixture
+def tabla():
+    return pd.DataFrame({
+        'Material': ['A', 'A', 'B'],
+        'Fecha': pd.to_datetime(['2026-01-01', '2026-02-01', '2026-01-01']),
+        'FCST': [10.0, 20.0, 5.0],
+    })
+
+
+def test_export_key_depende_de_las_partes():
+    assert export_key('abc', 'Mes') == export_key('abc', 'Mes')
+    assert export_key('abc', 'Mes') != export_key('abc', 'Trimestre')
+
+
+def test_safe_name_distingue_estados():
+    assert safe_name('Cob < 90') != safe_name('Cob > 90')
+
+
+def test_pivot_months(tabla):
+    ids, meses, metricas = pivot_months(tabla, 'Fecha')
+    assert list(ids) == ['A', 'B']
+    assert len(meses) == 2
+    assert metricas['FCST'].tolist() == [[10, 20], [5, 0]]
+
+
+@pytest.mark.parametrize('formato', ['CSV', 'Parquet', 'XLSX', 'XLSX (meses en columnas)'])
+def test_export_file_reutiliza_el_archivo(tabla, formato, tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, 'EXPORT_DIR', str(tmp_path))
+    path = export_file(tabla, export_key('x'), 'planificacion', formato, fecha_col='Fecha')
+    modificado = (tmp_path / path).stat().st_mtime_ns
+    assert export_file(tabla, export_key('x'), 'planificacion', formato, fecha_col='Fecha') == path
+    assert (tmp_path / path).stat().st_mtime_ns == modificado
+    if formato == 'CSV':
+        assert len(pd.read_csv(path)) == 3
+    elif formato == 'Parquet':
+        pd.testing.assert_frame_equal(pd.read_parquet(path), tabla, check_dtype=False)
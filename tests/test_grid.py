@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from utils.grid import coverage_codes, coverage_styles, filter_table, page_bounds, sort_positions
+
+
+def _tabla():
+    # B tiene 60 días de cobertura pero un umbral por SKU más alto: su estado es crítico
+    return pd.DataFrame({
+        'Material': ['A', 'B', 'C', 'D'],
+        'Cob(D)': [30.0, 60.0, 120.0, np.nan],
+        'Estado_Cobertura': ['Cob < 45', 'Cob < 45', 'Cob > 90', None],
+    })
+
+
+def test_coverage_codes_usa_el_estado_por_sku():
+    tabla = _tabla()
+    assert coverage_codes(tabla, 'Cob(D)').tolist() == [0, 0, 2, -1]
+    # Sin columna de estado se usan los umbrales fijos 45/90
+    assert coverage_codes(tabla.drop(columns='Estado_Cobertura'), 'Cob(D)').tolist() == [0, 1, 2, -1]
+
+
+def test_filter_table_por_estado():
+    tabla = _tabla()
+    assert filter_table(tabla, cob_col='Cob(D)', estados=['Cob < 45']).tolist() == [0, 1]
+    assert filter_table(tabla.drop(columns='Estado_Cobertura'), cob_col='Cob(D)', estados=['Cob < 45']).tolist() == [0]
+    assert filter_table(tabla, texto='c', cob_col='Cob(D)', estados=['Cob > 90']).tolist() == [2]
+
+
+def test_coverage_styles_sin_dato_sin_estilo():
+    estilos = coverage_styles(coverage_codes(_tabla(), 'Cob(D)'))
+    assert estilos[0] == estilos[1] != estilos[2]
+    assert estilos[3] == ''
+
+
+def test_page_bounds():
+    assert page_bounds(0, 1, 50) == (0, 0, 1)
+    assert page_bounds(120, 3, 50) == (100, 120, 3)
+    # Una página fuera de rango se acota a la última
+    assert page_bounds(120, 9, 50) == (100, 120, 3)
+
+
+def test_sort_positions_respeta_el_filtro():
+    tabla = _tabla()
+    posiciones = sort_positions(tabla, np.array([0, 1, 2]), 'Cob(D)', ascendente=False)
+    assert posiciones.tolist() == [2, 1, 0]
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from utils.matrices import horizon_months
+from utils.montecarlo import forecast_error_stats, stockout_risk_from_matrices
+
+
+def test_horizonte_desde_el_mes_en_curso(matrices, hoy):
+    horizonte = horizon_months(matrices['fechas'], hoy)
+    assert horizonte.tolist() == [False] * 6 + [True] * 6
+    # Sin meses futuros se usa todo el período
+    assert horizon_months(matrices['fechas'], '2030-01-01').all()
+
+
+def test_error_historico_ignora_meses_futuros(matrices):
+    valores = matrices['valores']
+    mu, sigma, n_obs = forecast_error_stats(valores['FCST'], valores['Despachos KL'], matrices['presente'])
+    assert n_obs.tolist() == [6, 6, 6, 3]
+    np.testing.assert_allclose(mu[:3], [0, 0.5, -0.5])
+    np.testing.assert_allclose(sigma[:3], 0, atol=1e-12)
+
+
+def test_riesgo_se_simula_desde_el_mes_en_curso(matrices, hoy):
+    resultado = stockout_risk_from_matrices(matrices, n_paths=200, seed=1, hoy=hoy)
+    assert list(resultado['fechas']) == list(pd.date_range('2026-07-01', periods=6, freq='MS'))
+    assert resultado['prob_mes'].shape == (4, 6)
+    assert not resultado['sin_historia']
+
+    tabla = resultado['tabla'].set_index('Material')
+    # A (error nulo): inventario 250 y FCST 100/mes desde julio, el quiebre llega en septiembre
+    assert resultado['prob_mes'][0].tolist() == [0, 0, 1, 1, 1, 1]
+    assert tabla.loc['A', 'Primer Mes Riesgo > 50%'] == pd.Timestamp('2026-09-01')
+    # C despacha la mitad del FCST: 250 alcanzan para cinco meses
+    assert resultado['prob_mes'][2].tolist() == [0, 0, 0, 0, 0, 1]
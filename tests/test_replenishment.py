@@ -0,0 +1,25 @@
+import pandas as pd
+
+from utils.replenishment import default_origin_parameters, suggest_orders
+
+
+def test_pedidos_se_proyectan_desde_el_mes_en_curso(matrices, hoy):
+    pedidos = suggest_orders(matrices, hoy=hoy).set_index('Material')
+
+    # Inventario 250 y FCST 100/mes desde julio: la cobertura cae bajo 45 días en septiembre
+    assert sorted(pedidos.index) == ['A', 'B', 'C', 'D']
+    assert (pedidos['Mes Necesidad'] == pd.Timestamp('2026-09-01')).all()
+    assert (pedidos['Inv Proyectado'] == 50).all()
+    assert (pedidos['Cantidad Sugerida'] == 250).all()
+
+
+def test_pedidos_redondean_al_multiplo_y_restan_lead_time(matrices, hoy):
+    parametros = default_origin_parameters(['LAMPA', 'LEA'])
+    parametros['Múltiplo Pedido'] = [100.0, 1.0]
+    parametros['Lead Time (días)'] = [30, 90]
+    pedidos = suggest_orders(matrices, parametros_origen=parametros, hoy=hoy).set_index('Material')
+
+    assert pedidos.loc['A', 'Cantidad Sugerida'] == 300
+    assert pedidos.loc['C', 'Cantidad Sugerida'] == 250
+    assert pedidos.loc['A', 'Fecha Límite Pedido'] == pd.Timestamp('2026-08-02')
+    assert pedidos.loc['C', 'Estado Pedido'] == 'Atrasado'
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from utils.replenishment import default_origin_parameters, origin_parameters
+from utils.safety_stock import per_sku_thresholds, safety_stock_table
+
+
+def test_ss_usa_solo_meses_con_despachos(matrices):
+    tabla = safety_stock_table(matrices, 0.95).set_index('Material')
+
+    # Los 6 meses futuros (despachos en cero) no son observaciones del error
+    assert tabla.loc['A', 'Meses Historia'] == 6
+    assert tabla.loc['A', 'σ Error'] == 0
+    assert tabla.loc['A', 'Stock Seguridad'] == 0
+    assert tabla.loc['A', 'Cob. Objetivo (D)'] == 60
+    # D solo despacha en 3 meses: errores 200, 150 y 300
+    assert tabla.loc['D', 'Meses Historia'] == 3
+    assert tabla.loc['D', 'σ Error'] == round(np.std([200, 150, 300], ddof=1), 1)
+    assert tabla.loc['D', 'Stock Seguridad'] > 0
+
+
+def test_ss_lead_time_por_origen(matrices):
+    parametros = default_origin_parameters(['LAMPA', 'LEA'])
+    parametros['Lead Time (días)'] = [30, 90]
+    tabla = safety_stock_table(matrices, 0.95, parametros).set_index('Material')
+    assert tabla.loc['A', 'Cob. Objetivo (D)'] == 30
+    assert tabla.loc['C', 'Lead Time (días)'] == 90
+
+
+def test_umbrales_por_sku_con_respaldo_fijo(matrices):
+    tabla = safety_stock_table(matrices, 0.95)
+    critico, alerta = per_sku_thresholds(tabla, ['A', 'Z'])
+    assert critico.tolist() == [60, 45]
+    assert alerta.tolist() == [120, 90]
+
+
+def test_parametros_por_origen_conservan_ediciones():
+    editados = default_origin_parameters(['LAMPA', 'LEA'])
+    editados.loc[1, 'Lead Time (días)'] = 90
+    parametros = origin_parameters(['LAMPA', 'LEA', 'TERCEROS'], editados)
+
+    assert parametros['Lead Time (días)'].tolist() == [60, 90, 60]
+    pd.testing.assert_frame_equal(origin_parameters(['LAMPA'], None), default_origin_parameters(['LAMPA']))
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from utils.scenarios import run_scenarios, scenario_summary, scenarios_from_table
+
+
+def _escenarios(*filas):
+    return scenarios_from_table(pd.DataFrame([
+        {'Escenario': nombre, 'Dimensión': dimension, 'Valor': valor, 'Factor FCST': factor,
+         'Umbral crítico': 45, 'Umbral alerta': 90}
+        for nombre, dimension, valor, factor in filas
+    ]))
+
+
+def test_base_se_proyecta_desde_el_mes_en_curso(matrices, hoy):
+    resultado = run_scenarios(matrices, _escenarios(('Sin cambios', 'Todas', '', 1.0)), hoy=hoy)
+
+    # Inventario 250 y FCST 100/mes desde julio: 75, 45 y 15 días al inicio de jul, ago y sep
+    assert resultado['nombres'] == ['Base', 'Sin cambios']
+    assert resultado['fechas'][0] == pd.Timestamp('2026-07-01')
+    np.testing.assert_allclose(resultado['cobertura'][0, :, :3], [[75, 45, 15]] * 4)
+    # La base usa la misma proyección que cualquier escenario
+    np.testing.assert_array_equal(resultado['cobertura'][0], resultado['cobertura'][1])
+    assert resultado['resumen']['Δ SKUs Críticos'].tolist() == [0, 0]
+
+
+def test_multiplicador_por_origen(matrices, hoy):
+    resultado = run_scenarios(matrices, _escenarios(('LEA +50%', 'Origen', 'LEA', 1.5)), hoy=hoy)
+    lea = (matrices['atributos']['Origen'] == 'LEA').to_numpy()
+
+    # Con FCST 150/mes el inventario de 250 cubre 50 días en julio y 20 en agosto
+    np.testing.assert_allclose(resultado['cobertura'][1, lea, :2], [[50, 20]] * 2)
+    np.testing.assert_array_equal(resultado['cobertura'][1, ~lea], resultado['cobertura'][0, ~lea])
+
+
+def test_resumen_de_la_vista(matrices, hoy):
+    resultado = run_scenarios(matrices, _escenarios(('FCST +15%', 'Todas', '', 1.15)), hoy=hoy)
+    filas = np.isin(matrices['materiales'], ['A'])
+    meses = np.zeros(len(resultado['fechas']), dtype=bool)
+    meses[:2] = True
+
+    resumen, criticos_mes = scenario_summary(resultado, filas, meses)
+    assert resumen['FCST Total'].round(1).tolist() == [200, 230]
+    assert resumen['Filas Críticas'].tolist() == [0, 1]
+    assert len(criticos_mes) == 2 * 2
@@ -0,0 +1,30 @@
+import numpy as np
+
+from utils.segmentation import abc_classes, abc_xyz_table, xyz_classes
+
+
+def test_xyz_solo_meses_con_despachos(matrices, hoy):
+    tabla = abc_xyz_table(matrices, hoy=hoy)
+    # A, B y C despachan parejo en los meses reales: los ceros futuros no cuentan como demanda
+    assert tabla.loc[['A', 'B', 'C'], 'XYZ'].tolist() == ['X', 'X', 'X']
+    assert tabla.loc['A', 'CV Demanda'] == 0
+    assert tabla.loc['D', 'XYZ'] == 'Z'
+
+
+def test_xyz_sin_despachos_usa_fcst(matrices, hoy):
+    matrices['valores']['Despachos KL'][:] = 0
+    tabla = abc_xyz_table(matrices, hoy=hoy)
+    assert (tabla['XYZ'] == 'X').all()
+
+
+def test_xyz_classes_limites():
+    demanda = np.array([[10, 10, 10, 10], [5, 15, 5, 15], [0, 20, 0, 20], [0, 0, 0, 0]], dtype=float)
+    presente = np.ones_like(demanda, dtype=bool)
+    clases, cv = xyz_classes(demanda, presente)
+    assert clases.tolist() == ['X', 'X', 'Y', 'Z']
+    np.testing.assert_allclose(cv[:3], [0, 0.5, 1.0])
+
+
+def test_abc_classes_participacion_acumulada():
+    clases = abc_classes([70, 15, 10, 5, 0])
+    assert clases.tolist() == ['A', 'A', 'B', 'C', 'C']
@@ -0,0 +1,40 @@
+import numpy as np
+
+from utils.matrices import actual_months
+from utils.tracking import tracking_alerts, tracking_signal_from_matrices
+
+
+def test_actual_months_excluye_meses_futuros(matrices, hoy):
+    meses = actual_months(matrices, hoy=hoy)
+    assert meses.tolist() == [True] * 6 + [False] * 6
+
+
+def test_actual_months_sin_despachos(matrices, hoy):
+    matrices['valores']['Despachos KL'][:] = 0
+    assert not actual_months(matrices, hoy=hoy).any()
+
+
+def test_tracking_solo_cuenta_meses_con_despachos(matrices, hoy):
+    state = tracking_signal_from_matrices(matrices, hoy=hoy)
+    alertas = tracking_alerts(state, matrices['atributos']).set_index('Material')
+
+    assert (alertas['Meses'] == 6).all()
+    assert alertas.loc['A', 'Alerta'] == 'OK'
+    assert alertas.loc['A', 'Error Acumulado'] == 0
+    # Sesgo sostenido: TS = ±n cuando todos los errores tienen el mismo signo
+    assert alertas.loc['B', 'Tracking Signal'] == 6
+    assert alertas.loc['B', 'Alerta'] == 'Sub-forecast'
+    assert alertas.loc['C', 'Tracking Signal'] == -6
+    assert alertas.loc['C', 'Alerta'] == 'Sobre-forecast'
+
+
+def test_tracking_ts_constante_en_meses_futuros(matrices, hoy):
+    state = tracking_signal_from_matrices(matrices, hoy=hoy)
+    ts = state['ts']
+    assert ts.shape == (4, 12)
+    np.testing.assert_allclose(ts[:, 6:], ts[:, [5]].repeat(6, axis=1))
+
+
+def test_tracking_mes_en_curso_no_cuenta(matrices):
+    state = tracking_signal_from_matrices(matrices, hoy='2026-04-01')
+    assert state['n'].tolist() == [3, 3, 3, 3]
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.calculations import categorize_cobertura_series
+from utils.versions import compare_versions, version_label
+
+
+@pytest.fixture
+def version(libro):
+    # Estado con umbrales fijos 45/90, como lo deja process_data al cargar un libro
+    libro = libro.copy()
+    libro['Cob(D)'] = np.where(libro['FCST'] > 0, libro['Inv Kg-L'] / libro['FCST'] * 30, np.nan)
+    libro['Estado_Cobertura'] = categorize_cobertura_series(libro['Cob(D)'].to_numpy()).to_numpy()
+    return libro
+
+
+def test_versiones_iguales_sin_cambios(version):
+    diff = compare_versions(version, version.copy())
+    assert (diff['por_sku']['Cambio'] == 'Sin cambio').all()
+    assert diff['resumen']['celdas_modificadas'] == 0
+
+
+def test_umbrales_por_sku_en_una_sola_version_marcan_cambios(version):
+    # Por eso la página recibe el libro con umbrales fijos: los estados de ambas versiones deben ser comparables
+    por_sku = version.copy()
+    por_sku['Estado_Cobertura'] = 'Cob < 45'
+    assert compare_versions(version, por_sku)['resumen']['celdas_modificadas'] > 0
+
+
+def test_sku_nuevo_y_modificado(version):
+    actual = version.copy()
+    actual.loc[actual['Material'] == 'A', 'FCST'] *= 2
+    actual = pd.concat([actual[actual['Material'] != 'D'], version[version['Material'] == 'D'].assign(Material='E')])
+    por_sku = compare_versions(version, actual)['por_sku'].set_index('Material')
+    assert por_sku.loc[['A', 'B', 'D', 'E'], 'Cambio'].tolist() == ['Modificado', 'Sin cambio', 'Eliminado', 'Nuevo']
+
+
+def test_version_label():
+    assert version_label('Master ACOL FEB-2026 V2.xlsx') == 'FEB-2026 V2'
+    assert version_label('otro.xlsx') == 'otro'
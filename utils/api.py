@@ -0,0 +1,392 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from .data_loader import AVISO_ERROR, find_local_workbook, load_from_excel, process_data
+from .calculations import ESTADOS_COBERTURA
+from .matrices import build_sku_month_matrices, dataset_fingerprint
+from .segmentation import abc_xyz_table, add_segment_columns
+from .granularity import GRANULARIDADES, month_codes, rebucket
+from .hierarchy import hierarchical_rollup
+from .reports import monthly_cells, combine_cells
+from .precompute import is_version_ready, read_or_compute, workbook_key, workbook_version
+from .exports import arrow_stream
+
+
+# Dirección por defecto: solo la máquina local (junto al servidor de Streamlit en 8501)
+API_HOST = '127.0.0.1'
+API_PORT = 8502
+
+FORMATO_JSON, FORMATO_ARROW = 'json', 'arrow'
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+
+# Columnas por las que se puede agrupar el cubo (las mismas de "Agrupar por" del dashboard)
+GRUPOS_API = ['Origen', 'Segmento', 'ABC', 'XYZ', 'ABC-XYZ']
+
+# Columnas de la tabla de SKUs críticos
+COLUMNAS_CRITICOS = ['Material', 'Descripción', 'Origen', 'Segmento', 'ABC-XYZ', 'Fecha',
+                     'Inv Kg-L', 'FCST', 'Despachos KL', 'Cob(D)', 'Estado_Cobertura']
+
+DEFAULT_LIMITE_CRITICOS = 100
+
+# Respuestas ya serializadas que se guardan por dataset (se descartan al recargar el libro)
+MAX_RESPUESTAS = 256
+
+
+class ApiError(ValueError):
+    """
+    Error de una consulta (parámetro inválido o sin datos): se responde con su código HTTP.
+    """
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def new_api_store(archivo=None):
+    """
+    Estado del servidor: libro servido (None = el que carga el dashboard desde data), dataset cargado y lock.
+    """
+    return {'archivo': Path(archivo) if archivo else None, 'datos': None, 'lock': threading.Lock()}
+
+
+def load_api_data(path, avisos=None):
+    """
+    Dataset del libro tal como lo ve el dashboard sin filtros (procesado y con ABC/XYZ por FCST)
+    y cubo mensual por Origen × estado. Usa el precálculo de precalcular.py con las mismas claves
+    que utils/cache.py; lo que no esté precalculado se calcula una vez al cargar.
+    """
+    raw = read_or_compute('dataset', (workbook_key(path),), lambda: load_from_excel(path, avisos=avisos))
+    if raw is None or raw.empty:
+        return None
+
+    df = process_data(raw, avisos)
+    huella = dataset_fingerprint(df)
+    matrices = read_or_compute('matrices', (huella,), lambda: build_sku_month_matrices(df))
+    segmentos = None
+    if matrices is not None:
+        segmentos = read_or_compute('abc_xyz', (huella, 'FCST'), lambda: abc_xyz_table(matrices, 'FCST'))
+    df = add_segment_columns(df, segmentos)
+    huella = dataset_fingerprint(df)
+
+    return {
+        'archivo': Path(path).name,
+        'huella': huella,
+        'filas': len(df),
+        'cargado': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'df': df,
+        'celdas': {'Origen': read_or_compute('monthly_cells', (huella, 'Origen'), lambda: monthly_cells(df, 'Origen'))},
+        'respuestas': OrderedDict(),
+        'lock': threading.Lock(),
+    }
+
+
+def current_data(store):
+    """
+    Dataset vigente: se recarga si el libro cambió (otro archivo, tamaño o fecha de modificación).
+    Mientras el trabajador de precálculo procesa una versión nueva se sigue sirviendo la anterior.
+    """
+    path = store['archivo'] or find_local_workbook()
+    sello = workbook_version(path)
+    if sello is None:
+        raise ApiError("No se encontró el libro Excel en la carpeta data", status=503)
+
+    with store['lock']:
+        datos = store['datos']
+        if datos is None or (datos['sello'] != sello and is_version_ready(sello)):
+            avisos = []
+            inicio = time.perf_counter()
+            datos = load_api_data(path, avisos)
+            if datos is None:
+                errores = [a['mensaje'] for a in avisos if a['nivel'] == AVISO_ERROR]
+                raise ApiError(errores[0] if errores else f"No se pudieron leer datos de {Path(path).name}", status=503)
+            datos['sello'] = sello
+            datos['segundos_carga'] = round(time.perf_counter() - inicio, 3)
+            store['datos'] = datos
+    return datos
+
+
+def _cells(datos, por):
+    """
+    Cubo mensual (grupo × estado de cobertura) para una columna de agrupación, calculado una vez por dataset.
+    """
+    if por not in GRUPOS_API or por not in datos['df'].columns:
+        raise ApiError(f"'por' debe ser una de: {', '.join(c for c in GRUPOS_API if c in datos['df'].columns)}")
+    with datos['lock']:
+        if por not in datos['celdas']:
+            datos['celdas'][por] = read_or_compute('monthly_cells', (datos['huella'], por),
+                                                   lambda: monthly_cells(datos['df'], por))
+        return datos['celdas'][por]
+
+
+def _parse_month(fecha):
+    """
+    Código de mes de una fecha AAAA-MM recibida en la consulta.
+    """
+    try:
+        return int(month_codes([fecha])[0])
+    except (ValueError, TypeError):
+        raise ApiError(f"Fecha inválida: '{fecha}' (usar AAAA-MM)")
+
+
+def _reference_month(celdas, fecha=None):
+    """
+    Código del mes de referencia: el pedido (AAAA-MM), o el mes en curso si está en los datos,
+    o el último mes disponible.
+    """
+    codigos = np.unique(celdas['Codigo'].to_numpy())
+    if len(codigos) == 0:
+        raise ApiError("El libro no tiene fechas", status=503)
+    if fecha:
+        codigo = _parse_month(fecha)
+        if codigo not in codigos:
+            raise ApiError(f"Sin datos para {fecha}", status=404)
+        return codigo
+    hoy = int(month_codes([pd.Timestamp.now()])[0])
+    return hoy if hoy in codigos else int(codigos[-1])
+
+
+def _month_label(codigo):
+    return str(np.datetime64(int(codigo), 'M'))
+
+
+def kpi_summary(datos, grupo='Todas', por='Origen', fecha=None):
+    """
+    Indicadores de la vista principal para un grupo: SKUs por estado de cobertura, críticos, inventario
+    y cobertura del mes de referencia, y WAPE histórico (solo meses con despachos).
+    """
+    celdas = _cells(datos, por)
+    mensual = combine_cells(celdas, grupo, 'Todas', por)
+    if mensual.empty:
+        raise ApiError(f"Sin datos para {por} = '{grupo}'", status=404)
+    codigo = _reference_month(celdas, fecha)
+    mes = mensual[mensual['Codigo'] == codigo]
+    historia = mensual[mensual['Despachos KL'] > 0]
+
+    estados = {e: int(mes[e].sum()) for e in ESTADOS_COBERTURA + ['Sin Dato']}
+    inventario = float(mes['Inv Kg-L'].sum())
+    fcst_mes = float(mes['FCST'].sum())
+    despachos = float(historia['Despachos KL'].sum())
+    return {
+        'archivo': datos['archivo'],
+        'huella': datos['huella'],
+        'grupo': grupo,
+        'por': por,
+        'mes': _month_label(codigo),
+        'skus': sum(estados.values()),
+        'estados': estados,
+        'criticos': estados['Cob < 45'],
+        'inventario_kg_l': inventario,
+        'fcst_mes': fcst_mes,
+        'cobertura_dias': inventario / fcst_mes * 30 if fcst_mes else None,
+        'fcst_historico': float(historia['FCST'].sum()),
+        'despachos_historico': despachos,
+        'wape_pct': float(historia['Dif_Abs'].sum()) / despachos * 100 if despachos else None,
+    }
+
+
+def period_table(datos, grupo='Todas', estado='Todas', por='Origen', granularidad='Mes'):
+    """
+    Evolución por período de un grupo y estado (mismas columnas que los agregados del dashboard).
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ApiError(f"'granularidad' debe ser una de: {', '.join(GRANULARIDADES)}")
+    if estado != 'Todas' and estado not in ESTADOS_COBERTURA:
+        raise ApiError(f"'estado' debe ser Todas o una de: {', '.join(ESTADOS_COBERTURA)}")
+    return rebucket(combine_cells(_cells(datos, por), grupo, estado, por), granularidad)
+
+
+def coverage_counts(datos, grupo='Todas', por='Origen', granularidad='Mes'):
+    """
+    Conteo de SKUs por estado de cobertura y período.
+    """
+    periodos = period_table(datos, grupo, 'Todas', por, granularidad)
+    if periodos.empty:
+        return periodos
+    estados = ESTADOS_COBERTURA + ['Sin Dato']
+    tabla = periodos[['Periodo', 'Fecha'] + estados].copy()
+    tabla[estados] = tabla[estados].astype(np.int64)
+    return tabla
+
+
+def wape_by_group(datos, por='Origen', desde=None):
+    """
+    WAPE por grupo sobre los meses con despachos: suma de los errores absolutos mensuales / despachos.
+    desde: mes inicial opcional (AAAA-MM); no necesita estar en los datos.
+    """
+    celdas = _cells(datos, por)
+    if desde:
+        celdas = celdas[celdas['Codigo'] >= _parse_month(desde)]
+    mensual = celdas.groupby([por, 'Codigo'], observed=True)[['FCST', 'Despachos KL']].sum()
+    mensual = mensual[mensual['Despachos KL'] > 0]
+    mensual['Dif_Abs'] = (mensual['Despachos KL'] - mensual['FCST']).abs()
+    tabla = mensual.groupby(level=0, observed=True).sum().reset_index()
+    tabla['Wape_%'] = tabla['Dif_Abs'] / tabla['Despachos KL'] * 100
+    return tabla.rename(columns={'Dif_Abs': 'Dif_Wape_Abs'}).sort_values('Wape_%', ascending=False, ignore_index=True)
+
+
+def critical_skus(datos, grupo='Todas', por='Origen', fecha=None, limite=DEFAULT_LIMITE_CRITICOS):
+    """
+    SKUs en estado crítico (Cob < 45) en el mes de referencia, de menor a mayor cobertura.
+    """
+    df = datos['df']
+    if 'Estado_Cobertura' not in df.columns or 'Fecha' not in df.columns:
+        return pd.DataFrame()
+    codigo = _reference_month(_cells(datos, por), fecha)
+    mascara = (df['Estado_Cobertura'] == 'Cob < 45').to_numpy() & (month_codes(df['Fecha']) == codigo)
+    if grupo != 'Todas':
+        mascara &= (df[por].astype(str) == grupo).to_numpy()
+    columnas = [c for c in COLUMNAS_CRITICOS if c in df.columns]
+    tabla = df.loc[mascara, columnas]
+    if 'Cob(D)' in tabla.columns:
+        tabla = tabla.sort_values('Cob(D)', kind='stable')
+    return tabla.head(limite).reset_index(drop=True)
+
+
+def rollup_table(datos):
+    """
+    Roll-up jerárquico (Total, Segmento, Origen, Material) del dataset completo.
+    """
+    with datos['lock']:
+        if 'rollup' not in datos:
+            datos['rollup'] = read_or_compute('rollup', (datos['huella'],), lambda: hierarchical_rollup(datos['df']))
+        return datos['rollup']
+
+
+def api_status(datos):
+    """
+    Libro servido, huella del dataset y dimensiones del cubo.
+    """
+    df = datos['df']
+    return {
+        'archivo': datos['archivo'],
+        'huella': datos['huella'],
+        'filas': datos['filas'],
+        'cargado': datos['cargado'],
+        'segundos_carga': datos['segundos_carga'],
+        'meses': sorted({_month_label(c) for c in datos['celdas']['Origen']['Codigo']}),
+        'grupos': {c: sorted(df[c].dropna().astype(str).unique()) for c in GRUPOS_API if c in df.columns},
+        'rutas': sorted(RUTAS),
+    }
+
+
+def _texto(parametros, nombre, defecto=None):
+    valores = parametros.get(nombre)
+    return valores[-1] if valores else defecto
+
+
+def _entero(parametros, nombre, defecto):
+    valor = _texto(parametros, nombre)
+    if valor is None:
+        return defecto
+    try:
+        return max(int(valor), 0)
+    except ValueError:
+        raise ApiError(f"'{nombre}' debe ser un entero")
+
+
+# Rutas: (función, parámetros de consulta) -> dict o DataFrame
+RUTAS = {
+    '/api/estado': lambda d, p: api_status(d),
+    '/api/kpis': lambda d, p: kpi_summary(d, _texto(p, 'grupo', 'Todas'), _texto(p, 'por', 'Origen'), _texto(p, 'fecha')),
+    '/api/coberturas': lambda d, p: coverage_counts(d, _texto(p, 'grupo', 'Todas'), _texto(p, 'por', 'Origen'),
+                                                    _texto(p, 'granularidad', 'Mes')),
+    '/api/periodos': lambda d, p: period_table(d, _texto(p, 'grupo', 'Todas'), _texto(p, 'estado', 'Todas'),
+                                               _texto(p, 'por', 'Origen'), _texto(p, 'granularidad', 'Mes')),
+    '/api/wape': lambda d, p: wape_by_group(d, _texto(p, 'por', 'Origen'), _texto(p, 'desde')),
+    '/api/criticos': lambda d, p: critical_skus(d, _texto(p, 'grupo', 'Todas'), _texto(p, 'por', 'Origen'),
+                                                _texto(p, 'fecha'), _entero(p, 'limite', DEFAULT_LIMITE_CRITICOS)),
+    '/api/jerarquia': lambda d, p: rollup_table(d),
+}
+
+
+def _json_default(valor):
+    if isinstance(valor, (np.integer, np.floating, np.bool_)):
+        return valor.item()
+    if isinstance(valor, (pd.Timestamp, np.datetime64)):
+        return str(valor)
+    raise TypeError(f"No serializable: {type(valor).__name__}")
+
+
+def encode_response(resultado, formato=FORMATO_JSON):
+    """
+    Serializa el resultado de una ruta: (bytes, tipo de contenido).
+    Las tablas admiten JSON (registros) o Arrow IPC; los indicadores solo JSON.
+    """
+    if isinstance(resultado, pd.DataFrame):
+        if formato == FORMATO_ARROW:
+            return arrow_stream(resultado), ARROW_MIME
+        registros = resultado.to_json(orient='records', date_format='iso', force_ascii=False)
+        return f'{{"filas": {len(resultado)}, "datos": {registros}}}'.encode('utf-8'), 'application/json'
+    if formato == FORMATO_ARROW:
+        raise ApiError("El formato arrow solo está disponible para tablas")
+    return json.dumps(resultado, ensure_ascii=False, default=_json_default).encode('utf-8'), 'application/json'
+
+
+def handle_request(store, url):
+    """
+    Resuelve una URL (ruta y parámetros): (status, bytes, tipo de contenido).
+    Las respuestas se guardan por dataset, así que una consulta repetida no recalcula ni reserializa.
+    """
+    partes = urlparse(url)
+    ruta = partes.path.rstrip('/') or '/'
+    parametros = parse_qs(partes.query)
+    try:
+        if ruta not in RUTAS:
+            raise ApiError(f"Ruta desconocida: {ruta}. Rutas: {', '.join(sorted(RUTAS))}", status=404)
+        formato = _texto(parametros, 'formato', FORMATO_JSON)
+        if formato not in (FORMATO_JSON, FORMATO_ARROW):
+            raise ApiError("'formato' debe ser json o arrow")
+
+        datos = current_data(store)
+        clave = (ruta, tuple(sorted((k, tuple(v)) for k, v in parametros.items())))
+        with datos['lock']:
+            respuesta = datos['respuestas'].get(clave)
+            if respuesta is not None:
+                datos['respuestas'].move_to_end(clave)
+        if respuesta is None:
+            respuesta = encode_response(RUTAS[ruta](datos, parametros), formato)
+            with datos['lock']:
+                datos['respuestas'][clave] = respuesta
+                if len(datos['respuestas']) > MAX_RESPUESTAS:
+                    datos['respuestas'].popitem(last=False)
+        return (200,) + respuesta
+    except ApiError as e:
+        return e.status, json.dumps({'error': str(e)}, ensure_ascii=False).encode('utf-8'), 'application/json'
+
+
+class _KpiHandler(BaseHTTPRequestHandler):
+    server_version = 'DashboardACO-API'
+
+    def do_GET(self):
+        try:
+            status, cuerpo, tipo = handle_request(self.server.store, self.path)
+        except Exception as e:
+            status, tipo = 500, 'application/json'
+            cuerpo = json.dumps({'error': f"{type(e).__name__}: {e}"}, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, format, *args):
+        if self.server.registro:
+            super().log_message(format, *args)
+
+
+def make_server(store, host=API_HOST, port=API_PORT, registro=True):
+    """
+    Servidor HTTP (un hilo por conexión) sobre un store de new_api_store. Usar serve_forever().
+    """
+    server = ThreadingHTTPServer((host, port), _KpiHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.registro = registro
+    return server
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from .matrices import actual_months
+from .timing import timed
+
+
+# Valores de alpha evaluados para el suavizamiento exponencial (se elige el mejor por SKU)
+SES_ALPHAS = (0.1, 0.3, 0.5, 0.7, 0.9)
+
+
+def _lag(matriz, k):
+    """Desplaza la matriz k meses hacia adelante; los primeros k meses quedan sin dato (NaN)."""
+    resultado = np.full(matriz.shape, np.nan)
+    if k < matriz.shape[1]:
+        resultado[:, k:] = matriz[:, :-k]
+    return resultado
+
+
+def moving_average_forecast(desp, window=3):
+    """
+    Pronóstico de media móvil: promedio de los `window` meses anteriores, para todos los SKUs a la vez.
+    Usa sumas acumuladas, por lo que el costo no depende del tamaño de la ventana.
+    """
+    n_sku, n_mes = desp.shape
+    acumulado = np.concatenate([np.zeros((n_sku, 1)), np.cumsum(desp, axis=1)], axis=1)
+    resultado = np.full(desp.shape, np.nan)
+    if window < n_mes + 1:
+        resultado[:, window:] = (acumulado[:, window:n_mes] - acumulado[:, :n_mes - window]) / window
+    return resultado
+
+
+def exponential_smoothing_forecast(desp, alphas=SES_ALPHAS):
+    """
+    Suavizamiento exponencial simple para todos los SKUs y todos los alphas a la vez.
+    La recursión recorre los meses, pero cada paso es una operación sobre la matriz (alpha × SKU).
+    Para cada SKU se elige el alpha con menor error absoluto un paso adelante.
+    Retorna (pronostico (n_sku, n_mes), alpha elegido por SKU).
+    """
+    n_sku, n_mes = desp.shape
+    alphas_arr = np.asarray(alphas, dtype=float)[:, None]
+    pronosticos = np.full((len(alphas), n_sku, n_mes), np.nan)
+
+    if n_mes == 0:
+        return np.full(desp.shape, np.nan), np.full(n_sku, np.nan)
+
+    nivel = np.repeat(desp[None, :, 0], len(alphas), axis=0)
+    for t in range(1, n_mes):
+        pronosticos[:, :, t] = nivel
+        nivel = alphas_arr * desp[None, :, t] + (1 - alphas_arr) * nivel
+
+    error = np.nansum(np.abs(pronosticos - desp[None, :, :]), axis=2)
+    mejor = error.argmin(axis=0)
+    pronostico = np.take_along_axis(pronosticos, mejor[None, :, None], axis=0)[0]
+    return pronostico, alphas_arr[mejor, 0]
+
+
+@timed()
+def baseline_forecasts(desp, window=3, season=12):
+    """
+    Genera los pronósticos baseline sobre la matriz de despachos SKU × mes.
+    Retorna un dict nombre -> matriz (n_sku, n_mes), con NaN donde el modelo no tiene historia suficiente.
+    """
+    ses, _ = exponential_smoothing_forecast(desp)
+    return {
+        'Naive': _lag(desp, 1),
+        'Naive Estacional': _lag(desp, season),
+        f'Media Móvil {window}M': moving_average_forecast(desp, window),
+        'Suav. Exponencial': ses,
+    }
+
+
+def _wape(abs_err, actual):
+    """WAPE (%) elemento a elemento; 0 donde no hay despachos (igual que calculate_wape)."""
+    return np.where(actual > 0, abs_err / np.where(actual > 0, actual, 1) * 100, 0.0)
+
+
+@timed()
+def forecast_value_added(matrices, baselines, materiales=None, fechas=None, group_col='Origen', hoy=None):
+    """
+    Compara el WAPE del FCST de los planificadores contra cada baseline.
+    FVA (puntos porcentuales) = WAPE baseline - WAPE FCST: positivo significa que el FCST agrega valor.
+
+    Solo se evalúan los meses con despachos registrados (ver matrices.actual_months); cada baseline,
+    además, solo donde tiene historia, y el FCST sobre esos mismos meses.
+    materiales / fechas restringen la evaluación (ej. a los filtros activos).
+    Retorna (tabla por SKU, tabla por group_col o None).
+    """
+    valores = matrices['valores']
+    fcst = valores['FCST']
+    desp = valores['Despachos KL']
+
+    filas = np.ones(len(matrices['materiales']), dtype=bool)
+    if materiales is not None:
+        filas = np.isin(matrices['materiales'], np.asarray(materiales))
+    columnas = np.ones(len(matrices['fechas']), dtype=bool)
+    if fechas is not None:
+        columnas = matrices['fechas'].isin(pd.DatetimeIndex(fechas))
+
+    columnas &= actual_months(matrices, hoy=hoy)
+    base = matrices['presente'] & filas[:, None] & columnas[None, :]
+
+    # Sumas por SKU: todo lo demás (WAPE por SKU y por grupo) sale de estas sumas
+    sumas = {
+        'FCST': (np.where(base, np.abs(desp - fcst), 0).sum(axis=1), np.where(base, desp, 0).sum(axis=1)),
+    }
+    for nombre, pronostico in baselines.items():
+        mascara = base & ~np.isnan(pronostico)
+        sumas[nombre] = (
+            np.where(mascara, np.abs(desp - np.nan_to_num(pronostico)), 0).sum(axis=1),
+            np.where(mascara, np.abs(desp - fcst), 0).sum(axis=1),
+            np.where(mascara, desp, 0).sum(axis=1),
+        )
+
+    def _tabla(indice, agrupar):
+        tabla = pd.DataFrame(index=indice)
+        err, act = agrupar(sumas['FCST'][0]), agrupar(sumas['FCST'][1])
+        tabla['Despachos'] = act
+        tabla['WAPE FCST %'] = _wape(err, act)
+        wape_cols = []
+        for nombre in baselines:
+            err_b, err_f, act_b = (agrupar(x) for x in sumas[nombre])
+            tabla[f'WAPE {nombre} %'] = np.where(act_b > 0, _wape(err_b, act_b), np.nan)
+            tabla[f'FVA vs {nombre} (pp)'] = np.where(act_b > 0, _wape(err_b, act_b) - _wape(err_f, act_b), np.nan)
+            wape_cols.append(f'WAPE {nombre} %')
+
+        # Baseline más exigente: el de menor WAPE
+        wapes = tabla[wape_cols].to_numpy()
+        con_dato = ~np.isnan(wapes).all(axis=1)
+        mejor = np.where(np.isnan(wapes), np.inf, wapes).argmin(axis=1)
+        tabla['Mejor Baseline'] = np.where(con_dato, np.array(list(baselines), dtype=object)[mejor], None)
+        return tabla[tabla['Despachos'] > 0].round(1)
+
+    sku = _tabla(pd.Index(matrices['materiales'], name='Material'), lambda x: x)
+    if group_col in matrices['atributos'].columns:
+        sku.insert(0, group_col, matrices['atributos'][group_col].reindex(sku.index).values)
+    sku = sku.reset_index()
+
+    grupo = None
+    if group_col in matrices['atributos'].columns:
+        codigos, grupos = pd.factorize(matrices['atributos'][group_col].fillna('Sin dato'), sort=True)
+        grupo = _tabla(
+            pd.Index(grupos, name=group_col),
+            lambda x: np.bincount(codigos, weights=x, minlength=len(grupos))
+        ).reset_index()
+
+    return sku, grupo
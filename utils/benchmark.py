@@ -0,0 +1,281 @@
+import json
+import time
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import load_from_excel, unpivot_date_columns, process_data, inspect_workbook
+from utils.filters import filter_dataset, future_rows
+from utils.matrices import dataset_fingerprint, build_sku_month_matrices
+from utils.segmentation import abc_xyz_table, add_segment_columns
+from utils.safety_stock import safety_stock_table, per_sku_thresholds
+from utils.baseline import baseline_forecasts, forecast_value_added
+from utils.tracking import tracking_signal_from_matrices, tracking_alerts
+from utils.montecarlo import stockout_risk_from_matrices
+from utils.scenarios import scenarios_from_table, run_scenarios
+from utils.replenishment import suggest_orders
+from utils.hierarchy import hierarchical_rollup
+from utils.granularity import monthly_aggregates, rebucket, estados_por_periodo
+from utils.ranking import material_aggregates, rank_materials
+from utils.search import build_material_index, search_materials
+from utils.versions import compare_versions
+from utils.calculations import (
+    calculate_estado_stats, calculate_top_materials, calculate_evolucion_inventario,
+    calculate_wape_evolution, calculate_distribucion_origen
+)
+from utils.synthetic import synthetic_workbook, synthetic_tables, add_dispatches
+
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+# Tamaños de libro sintético: SKUs, meses, lotes por SKU y columnas sin uso
+BENCHMARK_SIZES = {
+    'chico': {'n_skus': 300, 'meses': 18, 'lotes': 2, 'columnas_basura': 3},
+    'mediano': {'n_skus': 2000, 'meses': 24, 'lotes': 3, 'columnas_basura': 6},
+    'grande': {'n_skus': 8000, 'meses': 36, 'lotes': 4, 'columnas_basura': 10},
+}
+DEFAULT_SIZE = 'mediano'
+DEFAULT_REPETICIONES = 3
+SEED = 7
+
+# Regresión: más lento que la línea base en más de TOLERANCIA (fracción) y en más de MIN_DIFERENCIA segundos
+# (las mediciones de pocos milisegundos varían más que la tolerancia por ruido)
+TOLERANCIA = 0.25
+MIN_DIFERENCIA = 0.005
+
+# Trayectorias de Monte Carlo en los casos de riesgo de quiebre (menos que en el dashboard)
+BENCHMARK_N_PATHS = 1000
+
+BASELINE_PATH = PROJECT_DIR / "rendimiento" / "linea_base.json"
+SYNTHETIC_DIR = PROJECT_DIR / "rendimiento" / "libros"
+
+# Mismos escenarios de ejemplo que la página de escenarios
+ESCENARIOS = pd.DataFrame([
+    {'Escenario': 'FCST +15%', 'Dimensión': 'Todas', 'Valor': '', 'Factor FCST': 1.15,
+     'Umbral crítico': 45, 'Umbral alerta': 90},
+    {'Escenario': 'Umbrales 60/120', 'Dimensión': 'Todas', 'Valor': '', 'Factor FCST': 1.0,
+     'Umbral crítico': 60, 'Umbral alerta': 120},
+])
+
+
+def synthetic_path(tamaño, inicio, directorio=SYNTHETIC_DIR):
+    """
+    Libro sintético de un tamaño (se genera solo la primera vez; el nombre incluye el primer mes).
+    """
+    params = BENCHMARK_SIZES[tamaño]
+    path = Path(directorio) / f"sintetico_{tamaño}_{inicio}_{SEED}.xlsx"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp.xlsx')
+        synthetic_workbook(tmp, inicio=inicio, seed=SEED, **params)
+        tmp.replace(path)
+    return path
+
+
+def prepare_context(tamaño=DEFAULT_SIZE, directorio=SYNTHETIC_DIR):
+    """
+    Libro sintético y datos derivados sobre los que corren los casos (fuera de la medición).
+    Los despachos vienen de la hoja Master Actual sintética, que load_from_excel todavía no lee; 'ancho' es
+    la hoja Fcst Actual como se lee del libro (un mes por columna), entrada de unpivot_date_columns.
+    """
+    params = BENCHMARK_SIZES[tamaño]
+    inicio = str(pd.Period(pd.Timestamp.now(), freq='M') - params['meses'] // 2)
+    path = synthetic_path(tamaño, inicio, directorio)
+    hojas = synthetic_tables(inicio=inicio, seed=SEED, **params)
+
+    crudo = load_from_excel(path)
+    df = add_dispatches(process_data(crudo), hojas['Master Actual'])
+    matrices = build_sku_month_matrices(df)
+    df = add_segment_columns(df, abc_xyz_table(matrices, 'FCST'))
+    matrices = build_sku_month_matrices(df)
+
+    # Segunda versión del libro: FCST de un tercio de los SKUs modificado
+    df_v2 = df.copy()
+    cambiados = df_v2['Material'].isin(df_v2['Material'].unique()[::3])
+    df_v2.loc[cambiados, 'FCST'] = df_v2.loc[cambiados, 'FCST'] * 1.1
+
+    return {
+        'tamaño': tamaño,
+        'params': dict(params, inicio=inicio),
+        'path': path,
+        'ancho': hojas['Fcst Actual'],
+        'crudo': crudo,
+        'df': df,
+        'df_v2': df_v2,
+        'matrices': matrices,
+        'indice': build_material_index(df),
+    }
+
+
+def _pagina_principal(df):
+    periodos = rebucket(monthly_aggregates(df), 'Mes')
+    return estados_por_periodo(periodos), calculate_estado_stats(df)
+
+
+def _pagina_coberturas(df):
+    periodos = rebucket(monthly_aggregates(df), 'Mes')
+    rankings = rank_materials(material_aggregates(df), ['Inv Kg-L'], k=15)
+    return estados_por_periodo(periodos), calculate_distribucion_origen(df), rankings
+
+
+def _pagina_evolucion(df):
+    df_futuro, _ = future_rows(df)
+    return _pagina_coberturas(df_futuro)
+
+
+def _pagina_wape(df):
+    periodos = rebucket(monthly_aggregates(df), 'Mes')
+    agregados = material_aggregates(df)
+    rankings = rank_materials(agregados[agregados['Despachos KL'] > 0], ['Wape (%)'], k=15)
+    matrices = build_sku_month_matrices(df)
+    fva = forecast_value_added(matrices, baseline_forecasts(matrices['valores']['Despachos KL']))
+    state = tracking_signal_from_matrices(matrices)
+    return periodos, rankings, fva, tracking_alerts(state, matrices['atributos'])
+
+
+def _pagina_reposicion(df):
+    matrices = build_sku_month_matrices(df)
+    tabla_ss = safety_stock_table(matrices)
+    umbral_reorden, cobertura_objetivo = per_sku_thresholds(tabla_ss, matrices['materiales'])
+    return suggest_orders(matrices, cobertura_objetivo=cobertura_objetivo, umbral_reorden=umbral_reorden)
+
+
+def benchmark_cases(ctx):
+    """
+    Casos medidos: {nombre: función sin argumentos}. 'carga.*' lee y transforma el libro, 'calculo.*' cada
+    cálculo de utils y 'pagina.*' lo que calcula cada página con el caché vacío (sin gráficos ni widgets).
+    """
+    df, matrices, path = ctx['df'], ctx['matrices'], ctx['path']
+    desp = matrices['valores']['Despachos KL']
+    fechas = sorted(df['Fecha'].dropna().unique())
+    escenarios = scenarios_from_table(ESCENARIOS)
+    return {
+        'carga.inspect_workbook': lambda: inspect_workbook(path),
+        'carga.load_from_excel': lambda: load_from_excel(path),
+        'carga.unpivot_date_columns': lambda: unpivot_date_columns(ctx['ancho'].copy()),
+        'carga.process_data': lambda: process_data(ctx['crudo'].copy()),
+
+        'calculo.dataset_fingerprint': lambda: dataset_fingerprint(df),
+        'calculo.build_sku_month_matrices': lambda: build_sku_month_matrices(df),
+        'calculo.abc_xyz_table': lambda: abc_xyz_table(matrices, 'FCST'),
+        'calculo.safety_stock_table': lambda: safety_stock_table(matrices),
+        'calculo.baseline_forecasts': lambda: baseline_forecasts(desp),
+        'calculo.tracking_signal': lambda: tracking_signal_from_matrices(matrices),
+        'calculo.stockout_risk': lambda: stockout_risk_from_matrices(matrices, n_paths=BENCHMARK_N_PATHS, seed=SEED),
+        'calculo.run_scenarios': lambda: run_scenarios(matrices, escenarios),
+        'calculo.suggest_orders': lambda: suggest_orders(matrices),
+        'calculo.hierarchical_rollup': lambda: hierarchical_rollup(df),
+        'calculo.monthly_aggregates': lambda: monthly_aggregates(df),
+        'calculo.rebucket_trimestre': lambda: rebucket(monthly_aggregates(df), 'Trimestre'),
+        'calculo.material_aggregates': lambda: material_aggregates(df),
+        'calculo.build_material_index': lambda: build_material_index(df),
+        'calculo.search_materials': lambda: [search_materials(ctx['indice'], q) for q in ('4000', 'herb 5l', 'fungi')],
+        'calculo.compare_versions': lambda: compare_versions(df, ctx['df_v2']),
+        'calculo.filter_dataset': lambda: filter_dataset(df, fechas=fechas[-6:], origenes=['LAMPA', 'LEA']),
+        'calculo.calculate_estado_stats': lambda: calculate_estado_stats(df),
+        'calculo.calculate_top_materials': lambda: calculate_top_materials(df),
+        'calculo.calculate_evolucion_inventario': lambda: calculate_evolucion_inventario(df),
+        'calculo.calculate_wape_evolution': lambda: calculate_wape_evolution(df),
+        'calculo.calculate_distribucion_origen': lambda: calculate_distribucion_origen(df),
+
+        'pagina.principal': lambda: _pagina_principal(df),
+        'pagina.estado_coberturas': lambda: _pagina_coberturas(df),
+        'pagina.evolucion_futura': lambda: _pagina_evolucion(df),
+        'pagina.wape': lambda: _pagina_wape(df),
+        'pagina.escenarios': lambda: run_scenarios(build_sku_month_matrices(df), escenarios),
+        'pagina.riesgo_quiebre': lambda: stockout_risk_from_matrices(build_sku_month_matrices(df),
+                                                                     n_paths=BENCHMARK_N_PATHS, seed=SEED),
+        'pagina.reposicion': lambda: _pagina_reposicion(df),
+        'pagina.jerarquia': lambda: hierarchical_rollup(df),
+        'pagina.comparacion': lambda: compare_versions(df, ctx['df_v2']),
+    }
+
+
+def run_benchmarks(ctx, repeticiones=DEFAULT_REPETICIONES, filtro=None, progreso=None):
+    """
+    Mide cada caso (mínimo de 'repeticiones' corridas, el menos afectado por ruido).
+    filtro: prefijo o parte del nombre de los casos a medir. Retorna {caso: segundos}; None si el caso falló
+    (el error se informa por 'progreso').
+    """
+    resultados = {}
+    for nombre, caso in benchmark_cases(ctx).items():
+        if filtro and filtro not in nombre:
+            continue
+        tiempos = []
+        try:
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                caso()
+                tiempos.append(time.perf_counter() - inicio)
+        except Exception as e:
+            resultados[nombre] = None
+            if progreso:
+                progreso(f"{nombre}: error {e}")
+            continue
+        resultados[nombre] = min(tiempos)
+        if progreso:
+            progreso(f"{nombre}: {resultados[nombre] * 1000:.1f} ms")
+    return resultados
+
+
+def compare_baseline(resultados, base, tolerancia=TOLERANCIA, min_diferencia=MIN_DIFERENCIA):
+    """
+    Compara cada caso con la línea base. Retorna DataFrame con Caso, Base (s), Actual (s), Cambio (%) y
+    Estado: 'regresión' (más lento que la tolerancia), 'mejora', 'igual', 'nuevo' o 'error'.
+    """
+    filas = []
+    for caso, actual in resultados.items():
+        anterior = (base or {}).get(caso)
+        if actual is None:
+            estado = 'error'
+        elif anterior is None:
+            estado = 'nuevo'
+        elif actual > anterior * (1 + tolerancia) and actual - anterior > min_diferencia:
+            estado = 'regresión'
+        elif actual < anterior * (1 - tolerancia) and anterior - actual > min_diferencia:
+            estado = 'mejora'
+        else:
+            estado = 'igual'
+        cambio = (actual / anterior - 1) * 100 if actual is not None and anterior else np.nan
+        filas.append({'Caso': caso, 'Base (s)': anterior, 'Actual (s)': actual, 'Cambio (%)': cambio, 'Estado': estado})
+    return pd.DataFrame(filas, columns=['Caso', 'Base (s)', 'Actual (s)', 'Cambio (%)', 'Estado'])
+
+
+def load_baseline(tamaño, path=BASELINE_PATH):
+    """
+    Línea base guardada para un tamaño ({caso: segundos}) o None si no hay.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get(tamaño, {}).get('casos')
+    except (OSError, ValueError):
+        return None
+
+
+def save_baseline(ctx, resultados, path=BASELINE_PATH):
+    """
+    Guarda los resultados como línea base del tamaño (con parámetros, fecha y commit de git);
+    los casos que fallaron no se guardan.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            lineas = json.load(f)
+    except (OSError, ValueError):
+        lineas = {}
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    lineas[ctx['tamaño']] = {
+        'params': ctx['params'],
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'casos': {caso: s for caso, s in resultados.items() if s is not None},
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(lineas, f, ensure_ascii=False, indent=2)
+    return lineas[ctx['tamaño']]
@@ -0,0 +1,275 @@
+import json
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+import streamlit as st
+
+from .matrices import build_sku_month_matrices
+from .scenarios import run_scenarios
+from .montecarlo import new_simulation_pool, stockout_risk_from_matrices
+from .baseline import baseline_forecasts
+from .tracking import tracking_signal_from_matrices
+from .safety_stock import safety_stock_table
+from .segmentation import abc_xyz_table
+from .hierarchy import hierarchical_rollup
+from .granularity import monthly_aggregates, rebucket
+from .versions import compare_versions
+from .ranking import material_aggregates
+from .search import build_material_index
+from .charts import reduce_figure
+from .uploads import new_upload_store, start_upload, upload_status
+from .data_loader import load_from_excel, process_data, find_local_workbook
+from .timing import cache_miss, traced_cache
+from .precompute import is_version_ready, published_key, read_manifest, read_or_compute, workbook_key, workbook_version
+
+
+# Funciones cacheadas por huella de dataset (ver matrices.dataset_fingerprint).
+# El DataFrame se pasa con prefijo "_" para que Streamlit no lo hashee en cada rerun:
+# la huella es la clave de caché. Antes de calcular se busca el agregado en data/precalculado
+# (ver precalcular.py): las claves de read_or_compute son las mismas que usa precompute_workbook.
+# traced_cache mide cada llamada para el panel de rendimiento y cache_miss() marca los fallos (ver timing.py).
+
+@traced_cache('matrices')
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_matrices(_df, fingerprint):
+    """
+    Matrices SKU × mes del dataset, construidas una sola vez por huella
+    """
+    cache_miss()
+    return read_or_compute('matrices', (fingerprint,), lambda: build_sku_month_matrices(_df))
+
+@traced_cache('scenarios')
+@st.cache_data(show_spinner="Simulando escenarios...", max_entries=16)
+def cached_scenarios(_df, fingerprint, escenarios_json):
+    """
+    Resultado de run_scenarios para un dataset y un conjunto de escenarios (serializado en JSON)
+    """
+    cache_miss()
+    matrices = cached_matrices(_df, fingerprint)
+    if matrices is None:
+        return None
+    return run_scenarios(matrices, json.loads(escenarios_json))
+
+@st.cache_resource
+def _simulation_pool():
+    """
+    Pool de procesos de la simulación de riesgo de quiebre, compartido por todas las sesiones (uno por servidor)
+    """
+    return new_simulation_pool()
+
+@traced_cache('stockout_risk')
+@st.cache_data(show_spinner="Simulando riesgo de quiebre...", max_entries=8)
+def cached_stockout_risk(_df, fingerprint, n_paths, seed=42):
+    """
+    Probabilidades de quiebre por Monte Carlo para un dataset, número de trayectorias y semilla
+    """
+    cache_miss()
+    def calcular():
+        matrices = cached_matrices(_df, fingerprint)
+        if matrices is None:
+            return None
+        return stockout_risk_from_matrices(matrices, n_paths=n_paths, seed=seed, pool=_simulation_pool())
+    return read_or_compute('stockout_risk', (fingerprint, n_paths, seed), calcular)
+
+@traced_cache('baselines')
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_baselines(_df, fingerprint):
+    """
+    Pronósticos baseline (naive, estacional, media móvil, suavizamiento) sobre la historia de despachos
+    """
+    cache_miss()
+    def calcular():
+        matrices = cached_matrices(_df, fingerprint)
+        if matrices is None or 'Despachos KL' not in matrices['valores']:
+            return None
+        return baseline_forecasts(matrices['valores']['Despachos KL'])
+    return read_or_compute('baselines', (fingerprint,), calcular)
+
+@traced_cache('tracking_state')
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_tracking_state(_df, fingerprint):
+    """
+    Estado de la señal de rastreo del dataset (solo meses con despachos registrados)
+    """
+    cache_miss()
+    def calcular():
+        matrices = cached_matrices(_df, fingerprint)
+        if matrices is None or 'Despachos KL' not in matrices['valores'] or 'FCST' not in matrices['valores']:
+            return None
+        return tracking_signal_from_matrices(matrices)
+    return read_or_compute('tracking', (fingerprint,), calcular)
+
+@traced_cache('safety_stock')
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_safety_stock(_df, fingerprint, nivel_servicio, parametros_json=None):
+    """
+    Tabla de stock de seguridad y cobertura objetivo por SKU (parámetros por Origen en JSON)
+    """
+    cache_miss()
+    def calcular():
+        matrices = cached_matrices(_df, fingerprint)
+        if matrices is None:
+            return None
+        parametros = pd.DataFrame(json.loads(parametros_json)) if parametros_json else None
+        return safety_stock_table(matrices, nivel_servicio, parametros)
+    return read_or_compute('safety_stock', (fingerprint, nivel_servicio, parametros_json), calcular)
+
+@traced_cache('abc_xyz')
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_abc_xyz(_df, fingerprint, base='FCST'):
+    """
+    Segmentación ABC/XYZ por SKU, calculada una vez por dataset y base de volumen
+    """
+    cache_miss()
+    def calcular():
+        matrices = cached_matrices(_df, fingerprint)
+        if matrices is None:
+            return None
+        return abc_xyz_table(matrices, base)
+    return read_or_compute('abc_xyz', (fingerprint, base), calcular)
+
+@traced_cache('rollup')
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_rollup(_df, fingerprint):
+    """
+    Roll-up jerárquico completo (todos los niveles) del dataset
+    """
+    cache_miss()
+    return read_or_compute('rollup', (fingerprint,), lambda: hierarchical_rollup(_df))
+
+@traced_cache('monthly_aggregates')
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_monthly_aggregates(_df, fingerprint):
+    """
+    Agregados mensuales del dataset (base de todas las granularidades de tiempo)
+    """
+    cache_miss()
+    return read_or_compute('monthly_aggregates', (fingerprint,), lambda: monthly_aggregates(_df))
+
+@traced_cache('periods')
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_periods(_df, fingerprint, granularidad='Mes'):
+    """
+    Métricas por período para una granularidad; cambiar de granularidad no vuelve a recorrer el dataset
+    """
+    cache_miss()
+    return rebucket(cached_monthly_aggregates(_df, fingerprint), granularidad)
+
+@traced_cache('workbook')
+@st.cache_data(show_spinner="Leyendo libro a comparar...", max_entries=4)
+def cached_workbook(_file_source, file_key):
+    """
+    Libro Excel cargado y procesado, identificado por file_key (nombre + tamaño o ruta + fecha de modificación)
+    """
+    cache_miss()
+    df = load_from_excel(_file_source)
+    if df is None or df.empty:
+        return df
+    return process_data(df)
+
+
+@traced_cache('load_data')
+@st.cache_data(show_spinner="Cargando datos...", max_entries=2)
+def load_data(version):
+    """
+    Carga una versión del libro de la carpeta data (ver session_workbook_version). Si fue precalculada
+    (precalcular.py o vigilar_datos.py) se lee el dataset guardado en lugar del Excel.
+    Retorna (df o None, avisos de la carga).
+    """
+    cache_miss()
+    avisos = []
+    if version is None:
+        find_local_workbook(avisos=avisos)
+        return None, avisos
+    file_path = Path(version[0])
+    clave = published_key(version)
+    if clave is None:
+        if workbook_version(file_path) != list(version):
+            # La versión fijada ya no existe ni está precalculada: se carga el libro actual
+            file_path = find_local_workbook(avisos=avisos)
+            if file_path is None:
+                return None, avisos
+        clave = workbook_key(file_path)
+    df = read_or_compute('dataset', (clave,), lambda: load_from_excel(file_path, avisos=avisos))
+    return df, avisos
+
+def session_workbook_version():
+    """
+    Versión del libro local que usa esta sesión y versión nueva lista para cambiar (o None).
+    Una sesión nueva toma la última versión lista; una sesión abierta sigue con la suya hasta que el
+    usuario decide cambiar, así que un libro nuevo en data no cambia los datos a mitad de un análisis.
+    Una versión está lista cuando el trabajador de precálculo terminó con ella (ver is_version_ready).
+    """
+    actual = workbook_version(find_local_workbook())
+    lista = is_version_ready(actual)
+    if 'version_libro' not in st.session_state:
+        publicada = (read_manifest() or {}).get('version')
+        st.session_state['version_libro'] = actual if lista or publicada is None else publicada
+    fijada = st.session_state['version_libro']
+    nueva = actual if lista and actual is not None and actual != fijada else None
+    return tuple(fijada) if fijada else None, nueva
+
+@traced_cache('version_diff')
+@st.cache_data(show_spinner="Comparando versiones...", max_entries=8)
+def cached_version_diff(_df_anterior, fingerprint_anterior, _df_actual, fingerprint_actual):
+    """
+    Diferencias entre dos versiones del libro, calculadas una vez por par de huellas
+    """
+    cache_miss()
+    return compare_versions(_df_anterior, _df_actual)
+
+@traced_cache('material_aggregates')
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_material_aggregates(_df, fingerprint, fcst_col='FCST', desp_col='Despachos KL'):
+    """
+    Tabla por material (totales, inventario, cobertura y WAPE) sobre la que se calculan los rankings
+    """
+    cache_miss()
+    return read_or_compute('material_aggregates', (fingerprint, fcst_col, desp_col),
+                           lambda: material_aggregates(_df, fcst_col, desp_col))
+
+@traced_cache('material_index')
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_material_index(_df, fingerprint):
+    """
+    Índice de búsqueda de materiales (código y descripción) del dataset
+    """
+    cache_miss()
+    return read_or_compute('material_index', (fingerprint,), lambda: build_material_index(_df))
+
+@traced_cache('figure')
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_figure(_fig, cache_key):
+    """
+    Figura reducida (LTTB / WebGL) lista para enviar; cache_key identifica datos y parámetros del gráfico
+    """
+    cache_miss()
+    return reduce_figure(_fig)
+
+@st.cache_resource
+def _upload_store():
+    """
+    Trabajos de carga en segundo plano compartidos por todas las sesiones (un pool de procesos por servidor)
+    """
+    return new_upload_store()
+
+def background_upload(uploaded_file):
+    """
+    Lectura en segundo plano del archivo subido (una sola vez por archivo). Retorna el estado del trabajo.
+    La sesión se identifica para el presupuesto de memoria por sesión (ver memory_guard).
+    """
+    store = _upload_store()
+    clave = getattr(uploaded_file, 'file_id', None) or f"{uploaded_file.name}:{uploaded_file.size}"
+    estado = upload_status(store, clave)
+    if estado is None:
+        sesion = st.session_state.setdefault('sesion_carga', uuid.uuid4().hex)
+        estado = start_upload(store, clave, uploaded_file.getvalue(), uploaded_file.name, sesion=sesion)
+    return estado
+
+def background_upload_status(clave):
+    """
+    Estado actual de un trabajo de carga (para el sondeo desde la UI)
+    """
+    return upload_status(_upload_store(), clave)
@@ -1,5 +1,7 @@
 import pandas as pd
 import numpy as np
+from .ranking import material_aggregates, rank_materials
+from .timing import timed
 
 def calculate_cobertura(inventario, demanda_mensual):
     """
@@ -38,6 +40,38 @@ def categorize_cobertura(dias):
     else:
         return "Cob > 90"
 
+ESTADOS_COBERTURA = ['Cob < 45', 'Cob < 90', 'Cob > 90']
+
+def calculate_cobertura_array(inventario, demanda_mensual):
+    """
+    Versión vectorizada de la cobertura en días para arrays NumPy.
+    Usa la misma convención que process_data: una demanda 0 se reemplaza por 1.
+    """
+    demanda = np.where(demanda_mensual == 0, 1, demanda_mensual)
+    return inventario / demanda * 30
+
+def categorize_cobertura_array(dias, umbral_critico=45, umbral_alerta=90):
+    """
+    Categoriza coberturas de forma vectorizada.
+    Retorna códigos int8: 0 = crítico, 1 = alerta, 2 = ok, -1 = sin dato.
+    Los umbrales admiten broadcasting (ej. un umbral por escenario o por SKU).
+    """
+    dias = np.asarray(dias, dtype=float)
+    codigos = np.where(dias < umbral_critico, 0, np.where(dias < umbral_alerta, 1, 2))
+    return np.where(np.isnan(dias), -1, codigos).astype(np.int8)
+
+def categorize_cobertura_series(dias, umbral_critico=45, umbral_alerta=90):
+    """
+    Igual que categorize_cobertura pero vectorizado y con umbrales por fila.
+    Mantiene las etiquetas estándar ('Cob < 45', ...) para que filtros y colores sigan funcionando:
+    con umbrales por SKU la etiqueta indica el nivel (crítico/alerta/ok), no el número de días.
+    """
+    codigos = categorize_cobertura_array(dias, umbral_critico, umbral_alerta)
+    # El código -1 (sin dato) indexa el último elemento: 'Sin Dato'
+    etiquetas = np.array(ESTADOS_COBERTURA + ['Sin Dato'], dtype=object)
+    return pd.Series(etiquetas[codigos], index=getattr(dias, 'index', None))
+
+@timed()
 def calculate_estado_stats(df, estado_col='Estado_Cobertura'):
     """
     Calcula estadísticas por estado de cobertura
@@ -59,24 +93,18 @@ def calculate_estado_stats(df, estado_col='Estado_Cobertura'):
     
     return stats
 
+@timed()
 def calculate_top_materials(df, value_col='Inv Kg-L', top_n=15, ascending=False):
     """
-    Obtiene los top N materiales por valor
+    Obtiene los top N materiales por valor (una fila por material, ver ranking.rank_materials)
     """
     if value_col not in df.columns or 'Material' not in df.columns:
         return pd.DataFrame()
     
-    top = df.nlargest(top_n, value_col) if not ascending else df.nsmallest(top_n, value_col)
-    
-    # Seleccionar columnas dinámicamente
-    cols_to_return = ['Material', value_col]
-    if 'Origen' in df.columns:
-        cols_to_return.append('Origen')
-    if 'Descripción' in df.columns:
-        cols_to_return.append('Descripción')
-        
-    return top[cols_to_return].copy()
+    rankings = rank_materials(material_aggregates(df), [value_col], k=top_n)
+    return rankings[value_col]['menores' if ascending else 'mayores']
 
+@timed()
 def calculate_evolucion_inventario(df, fecha_col='Fecha', inv_col='Inv Kg-L'):
     """
     Calcula la evolución del inventario por mes
@@ -92,6 +120,7 @@ def calculate_evolucion_inventario(df, fecha_col='Fecha', inv_col='Inv Kg-L'):
     
     return evolucion
 
+@timed()
 def calculate_wape_evolution(df, fecha_col='Fecha'):
     """
     Calcula la evolución del WAPE por mes
@@ -121,18 +150,19 @@ def calculate_wape_evolution(df, fecha_col='Fecha'):
     
     return pd.DataFrame(wape_data)
 
-def calculate_distribucion_origen(df):
+@timed()
+def calculate_distribucion_origen(df, group_col='Origen'):
     """
-    Calcula la distribución de SKUs por origen
+    Calcula la distribución de SKUs por origen (o por otra columna de agrupación, ej. ABC)
     """
-    if 'Origen' not in df.columns:
+    if group_col not in df.columns:
         return pd.DataFrame()
     
-    dist = df.groupby('Origen').agg({
+    dist = df.groupby(group_col, observed=True).agg({
         'Material': 'nunique'
     }).reset_index()
     
-    dist.columns = ['Origen', 'N_SKU']
+    dist.columns = [group_col, 'N_SKU']
     dist = dist.sort_values('N_SKU', ascending=True)
     
     return dist
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from .timing import timed
+
+
+# Puntos máximos por traza de líneas enviados al navegador (del orden del ancho del gráfico en píxeles)
+POINT_BUDGET = 1500
+
+# Sobre este total de puntos en scatter la figura se dibuja con WebGL (scattergl) en lugar de SVG
+WEBGL_THRESHOLD = 5000
+
+# Atributos de una traza que tienen un valor por punto y deben recortarse junto con x/y
+_POINT_ATTRS = ('x', 'y', 'text', 'hovertext', 'customdata', 'ids')
+_MARKER_ATTRS = ('color', 'size', 'symbol', 'opacity')
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: índices de los n_out puntos que mejor conservan la forma
+    de la serie (primer y último punto siempre incluidos). x debe ser numérico y creciente.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # n_out - 2 buckets intermedios: bucket i = [bordes[i], bordes[i + 1])
+    cada = (n - 2) / (n_out - 2)
+    bordes = (np.arange(n_out - 1) * cada).astype(np.int64) + 1
+    bordes[-1] = n - 1
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        # Vértice C: promedio del bucket siguiente (o el último punto)
+        if i + 2 < len(bordes):
+            x_c = x[fin:bordes[i + 2]].mean()
+            siguiente = y[fin:bordes[i + 2]]
+            siguiente = siguiente[~np.isnan(siguiente)]
+            y_c = siguiente.mean() if len(siguiente) else y[a]
+        else:
+            x_c, y_c = x[-1], y[-1]
+        area = np.abs((x[a] - x_c) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (y_c - y[a]))
+        a = inicio + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        indices[i + 1] = a
+    return indices
+
+
+def _numeric_axis(x):
+    """
+    Eje x como números para LTTB: fechas -> nanosegundos, números tal cual y
+    categorías (ej. 'T1 2026') -> su posición. Retorna None si el eje no es creciente.
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.number):
+        valores = x.astype(float)
+    elif np.issubdtype(x.dtype, np.datetime64):
+        valores = x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    else:
+        fechas = pd.to_datetime(pd.Series(x), format='ISO8601', errors='coerce')
+        if fechas.notna().all():
+            valores = fechas.to_numpy().astype(np.int64).astype(float)
+        else:
+            return np.arange(len(x), dtype=float)
+    if len(valores) > 1 and np.any(np.diff(valores) < 0):
+        return None
+    return valores
+
+
+def _take(traza, posiciones, n):
+    """
+    Atributos por punto de la traza (x, y, texto, marcadores) recortados a las posiciones dadas.
+    """
+    cambios = {}
+    for attr in _POINT_ATTRS:
+        valor = traza[attr]
+        if valor is not None and not isinstance(valor, str) and np.ndim(valor) >= 1 and len(valor) == n:
+            cambios[attr] = np.asarray(valor)[posiciones]
+    for attr in _MARKER_ATTRS:
+        valor = traza.marker[attr]
+        if valor is not None and not isinstance(valor, str) and np.ndim(valor) == 1 and len(valor) == n:
+            cambios[f'marker.{attr}'] = np.asarray(valor)[posiciones]
+    return cambios
+
+
+@timed()
+def reduce_figure(fig, budget=POINT_BUDGET, webgl_threshold=WEBGL_THRESHOLD):
+    """
+    Copia de la figura lista para enviar al navegador:
+    - Trazas de líneas con más de budget puntos se reducen con LTTB
+    - Si el total de puntos scatter supera webgl_threshold, las trazas pasan a scattergl
+    Las figuras pequeñas (la mayoría: series mensuales) quedan sin cambios.
+    """
+    import plotly.graph_objects as go
+
+    figura = go.Figure(fig)
+
+    total = 0
+    for traza in figura.data:
+        if traza.type not in ('scatter', 'scattergl') or traza.y is None:
+            continue
+        n = len(traza.y)
+        if n > budget and 'lines' in (traza.mode or 'lines') and traza.x is not None:
+            x = _numeric_axis(traza.x)
+            if x is not None:
+                traza.update(_take(traza, lttb_indices(x, traza.y, budget), n))
+                n = budget
+        total += n
+
+    if total <= webgl_threshold:
+        return figura
+
+    # WebGL: misma traza como scattergl (propiedades solo-SVG, ej. line.shape='spline', se descartan)
+    return go.Figure(
+        data=[
+            go.Scattergl(traza.to_plotly_json(), skip_invalid=True) if traza.type == 'scatter' else traza
+            for traza in figura.data
+        ],
+        layout=figura.layout
+    )
@@ -1,9 +1,23 @@
 import pandas as pd
 import os
+import traceback
 from pathlib import Path
-import streamlit as st
 
 from .calculations import categorize_cobertura
+from .timing import timed
+
+
+# Carpeta de datos del proyecto (el dashboard carga el libro Excel más reciente).
+# DASHBOARD_DATA_DIR permite usar otra carpeta (ej. un volumen montado o una carpeta vacía al medir el arranque)
+DATA_DIR = Path(os.environ.get('DASHBOARD_DATA_DIR') or Path(__file__).parent.parent / "data")
+
+# Niveles de los avisos de carga y procesamiento. Este módulo no muestra nada: agrega avisos
+# {'nivel', 'mensaje'[, 'detalle']} a la lista 'avisos' que recibe (la app los muestra con st.info,
+# st.success, st.warning o st.error; la línea de comandos los imprime).
+AVISO_INFO, AVISO_EXITO, AVISO_ADVERTENCIA, AVISO_ERROR = 'info', 'success', 'warning', 'error'
+
+# Filas largas por bloque al despivotar y consolidar en disco (libros que no caben en memoria)
+SPILL_CHUNK_ROWS = 50_000
 
 
 # --- Definición de columnas requeridas ---
@@ -18,6 +32,17 @@ REQUIRED_COLUMNS_MAP = {
     "Despachos": ["Despachos KL", "Desp (MKL)", "Despachos", "Venta", "Venta Real", "Desp", "Salidas"]
 }
 
+def _avisar(avisos, nivel, mensaje, detalle=None):
+    """
+    Agrega un aviso a la lista (si se entregó una).
+    """
+    if avisos is not None:
+        aviso = {'nivel': nivel, 'mensaje': mensaje}
+        if detalle:
+            aviso['detalle'] = detalle
+        avisos.append(aviso)
+
+
 def validate_columns(df):
     """
     Valida que el DataFrame contenga al menos una de las columnas para cada grupo requerido.
@@ -73,10 +98,218 @@ def _find_header_row(df_preview, keywords=None):
     # Si no, asumimos 0 si hay alguna coincidencia débil, o si no hay nada.
     return best_row if max_score > 0 else 0
 
-def load_from_excel(file_source, sheet_name=None):
+def find_sheets(sheet_names):
+    """
+    Hojas a cargar del libro: Forecast ('Fcst Actual' / 'Forecast') e Inventario ('StockACOL' / 'Stock').
+    Retorna {'forecast': nombre o None, 'stock': nombre o None}.
+    """
+    return {
+        'forecast': next((s for s in sheet_names if 'Fcst Actual' in s or 'Forecast' in s), None),
+        'stock': next((s for s in sheet_names if 'StockACOL' in s or 'Stock' in s), None),
+    }
+
+
+@timed()
+def read_forecast_sheet(file_source, sheet_name, avisos=None):
+    """
+    Lee la hoja de Forecast (fechas como columnas) y la lleva a formato largo con columna FCST.
+    """
+    preview = pd.read_excel(file_source, sheet_name=sheet_name, header=None, nrows=20)
+    header_row = _find_header_row(preview, ['codigo', 'producto', 'enero', 'febrero'])
+    df_raw = pd.read_excel(file_source, sheet_name=sheet_name, header=header_row)
+    return unpivot_date_columns(df_raw, value_column_name='FCST', avisos=avisos)
+
+
+@timed()
+def read_stock_sheet(file_source, sheet_name):
+    """
+    Lee la hoja de Inventario y retorna una fila por Material con 'Inv Kg-L'
+    (suma de libre, bloqueado, tránsito y calidad de todos los lotes/almacenes).
+    """
+    preview = pd.read_excel(file_source, sheet_name=sheet_name, header=None, nrows=20)
+    header_row = _find_header_row(preview, ['material', 'libre', 'bloqueado'])
+    df_raw_inv = pd.read_excel(file_source, sheet_name=sheet_name, header=header_row)
+
+    mat_col = next((c for c in df_raw_inv.columns if 'material' in str(c).lower() and 'nombre' not in str(c).lower()), None)
+    if not mat_col:
+        return pd.DataFrame()
+
+    # Calcular total inventario (sumar columnas numéricas relevantes)
+    inv_cols = [c for c in df_raw_inv.columns if any(k in str(c).lower() for k in ['libre', 'bloqueado', 'transito', 'calidad'])]
+    if not inv_cols: # Si no hay detalle, buscar columna total
+        inv_cols = [c for c in df_raw_inv.columns if 'total' in str(c).lower() or 'cantidad' in str(c).lower()]
+    if not inv_cols:
+        return pd.DataFrame()
+
+    df_raw_inv['Inv Total'] = df_raw_inv[inv_cols].apply(pd.to_numeric, errors='coerce').sum(axis=1)
+    # Agrupar por Material para tener una sola fila por SKU (suma de todos los lotes/almacenes)
+    df_inv = df_raw_inv.groupby(mat_col)['Inv Total'].sum().reset_index()
+    df_inv = df_inv.rename(columns={mat_col: 'Material', 'Inv Total': 'Inv Kg-L'})
+    df_inv['Material'] = df_inv['Material'].astype(str).str.strip()
+    return df_inv
+
+
+def read_generic_sheet(file_source, sheet_name=0):
+    """
+    Carga genérica de una hoja (método antiguo): detecta la fila de encabezados y la lee tal cual.
+    """
+    preview = pd.read_excel(file_source, sheet_name=sheet_name, header=None, nrows=20)
+    header_row = _find_header_row(preview)
+    return pd.read_excel(file_source, sheet_name=sheet_name, header=header_row)
+
+
+@timed()
+def consolidate_sheets(df_fcst, df_inv=None):
+    """
+    Une Forecast e Inventario: el inventario es un snapshot único y se pega a todas las fechas del material.
+    Sin inventario (ej. vista previa con solo el Forecast) la columna queda en 0.
+    """
+    # Empezamos con el forecast como base principal (tiene fechas y materiales)
+    df_final = df_fcst.copy()
+
+    # Asegurar tipo de dato para merge
+    df_final['Material'] = df_final['Material'].astype(str).str.strip()
+
+    # Merge Inventario (Left Join en Material)
+    if df_inv is not None and not df_inv.empty:
+        df_final = pd.merge(df_final, df_inv, on='Material', how='left')
+        df_final['Inv Kg-L'] = df_final['Inv Kg-L'].fillna(0)
+    else:
+        df_final['Inv Kg-L'] = 0
+
+    # Merge Despachos (si tuviéramos)
+    df_final['Despachos KL'] = 0 # Placeholder por ahora
+    return df_final
+
+
+def _sheet_dimensions(xl, sheet_name):
+    """
+    (filas, columnas) declaradas por la hoja, sin leer sus celdas. None si el libro no las informa.
+    """
+    try:
+        hoja = xl.book[sheet_name]
+        filas, columnas = hoja.max_row, hoja.max_column
+    except Exception:
+        return None
+    if not filas or not columnas:
+        return None
+    return int(filas), int(columnas)
+
+
+def inspect_workbook(file_source):
+    """
+    Describe el libro leyendo solo los encabezados: hojas a cargar, dimensiones de cada una
+    y columnas de mes del Forecast (cada una se convierte en una fila por material al despivotar).
+    """
+    xl = pd.ExcelFile(file_source)
+    hojas = find_sheets(xl.sheet_names)
+    informe = {'hojas': hojas, 'dimensiones': {}, 'columnas_fecha': 0}
+
+    tipos = {tipo: hoja for tipo, hoja in hojas.items() if hoja}
+    if 'forecast' not in tipos:
+        tipos = {'generica': xl.sheet_names[0]}
+    for tipo, hoja in tipos.items():
+        informe['dimensiones'][tipo] = _sheet_dimensions(xl, hoja)
+
+    if hojas['forecast']:
+        preview = pd.read_excel(xl, sheet_name=hojas['forecast'], header=None, nrows=20)
+        header_row = _find_header_row(preview, ['codigo', 'producto', 'enero', 'febrero'])
+        columnas = pd.read_excel(xl, sheet_name=hojas['forecast'], header=header_row, nrows=0).columns
+        informe['columnas_fecha'] = sum(1 for c in columnas if _is_date_column(c))
+    return informe
+
+
+def _arrow_safe(df):
+    """
+    Columnas object con tipos mezclados (ej. códigos numéricos y de texto) pasan a texto para poder escribirse a Parquet.
+    """
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+            df[col] = df[col].map(lambda x: x if pd.isna(x) else str(x))
+    return df
+
+
+def _write_blocks(bloques, path_out):
+    """
+    Escribe una secuencia de DataFrames a un Parquet (un row group por bloque; esquema del primero).
+    Retorna el número de filas escritas.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, filas = None, 0
+    try:
+        for bloque in bloques:
+            if writer is None:
+                esquema = pa.Schema.from_pandas(bloque, preserve_index=False)
+                writer = pq.ParquetWriter(path_out, esquema)
+            writer.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+            filas += len(bloque)
+    finally:
+        if writer is not None:
+            writer.close()
+    return filas
+
+
+def read_forecast_sheet_chunked(file_source, sheet_name, path_out, chunk_rows=SPILL_CHUNK_ROWS):
+    """
+    Como read_forecast_sheet, pero despivota por bloques de meses y escribe cada bloque a Parquet:
+    el formato largo completo nunca está en memoria. El orden de las filas es el mismo que con melt.
+    Retorna el número de filas escritas.
+    """
+    preview = pd.read_excel(file_source, sheet_name=sheet_name, header=None, nrows=20)
+    header_row = _find_header_row(preview, ['codigo', 'producto', 'enero', 'febrero'])
+    df_raw = pd.read_excel(file_source, sheet_name=sheet_name, header=header_row)
+
+    fechas = [c for c in df_raw.columns if _is_date_column(c)]
+    otras = [c for c in df_raw.columns if not _is_date_column(c)]
+    # Meses por bloque para que cada bloque tenga ~chunk_rows filas largas
+    por_bloque = max(chunk_rows // max(len(df_raw), 1), 1)
+    grupos = [fechas[i:i + por_bloque] for i in range(0, len(fechas), por_bloque)] or [[]]
+
+    def bloques():
+        for grupo in grupos:
+            bloque = unpivot_date_columns(df_raw[otras + grupo], value_column_name='FCST')
+            if 'FCST' in bloque.columns:
+                # Tipo fijo entre bloques (process_data lo convierte igual en el flujo en memoria)
+                bloque['FCST'] = pd.to_numeric(bloque['FCST'], errors='coerce')
+            yield _arrow_safe(bloque)
+
+    return _write_blocks(bloques(), path_out)
+
+
+def consolidate_spilled(path_fcst, df_inv, path_out):
+    """
+    consolidate_sheets por bloques sobre el Forecast escrito en disco; el resultado también va a Parquet.
+    Retorna el número de filas escritas.
+    """
+    import pyarrow.parquet as pq
+
+    archivo = pq.ParquetFile(path_fcst)
+
+    def bloques():
+        # Un row group por bloque escrito en read_forecast_sheet_chunked
+        for i in range(archivo.metadata.num_row_groups):
+            yield _arrow_safe(consolidate_sheets(archivo.read_row_group(i).to_pandas(), df_inv))
+
+    return _write_blocks(bloques(), path_out)
+
+
+def read_spilled(path):
+    """
+    Lee un Parquet escrito por bloques liberando la memoria de Arrow a medida que se convierte a pandas.
+    """
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path).to_pandas(split_blocks=True, self_destruct=True)
+
+
+@timed()
+def load_from_excel(file_source, sheet_name=None, avisos=None):
     """
     Versión mejorada que intenta cargar múltiples hojas y consolidar la información
     para generar un dataset completo con Forecast, Inventario y Despachos.
+    Los mensajes de progreso y errores se agregan a avisos; si el libro no se puede leer retorna None.
     """
     try:
         # Asegurar puntero al inicio si es buffer
@@ -84,125 +317,76 @@ def load_from_excel(file_source, sheet_name=None):
             file_source.seek(0)
             
         xl = pd.ExcelFile(file_source)
-        sheet_names = xl.sheet_names
+        hojas = find_sheets(xl.sheet_names)
         
         # --- Estrategia de Carga Multi-Hoja ---
         
         # 1. Cargar Forecast (Prioridad: 'Fcst Actual')
         df_fcst = pd.DataFrame()
-        fcst_sheet = next((s for s in sheet_names if 'Fcst Actual' in s or 'Forecast' in s), None)
-        
-        if fcst_sheet:
-            st.info(f"Cargando Forecast desde hoja: {fcst_sheet}...")
-            # Leer header
-            preview = pd.read_excel(xl, sheet_name=fcst_sheet, header=None, nrows=20)
-            header_row = _find_header_row(preview, ['codigo', 'producto', 'enero', 'febrero'])
-            df_raw = pd.read_excel(xl, sheet_name=fcst_sheet, header=header_row)
-            
-            # Unpivot
-            df_fcst = unpivot_date_columns(df_raw, value_column_name='FCST')
+        if hojas['forecast']:
+            _avisar(avisos, AVISO_INFO, f"Cargando Forecast desde hoja: {hojas['forecast']}...")
+            df_fcst = read_forecast_sheet(xl, hojas['forecast'], avisos)
         
         # 2. Cargar Inventario (Prioridad: 'StockACOL')
         df_inv = pd.DataFrame()
-        stock_sheet = next((s for s in sheet_names if 'StockACOL' in s or 'Stock' in s), None)
-        
-        if stock_sheet:
-            st.info(f"Cargando Inventario desde hoja: {stock_sheet}...")
-            preview = pd.read_excel(xl, sheet_name=stock_sheet, header=None, nrows=20)
-            header_row = _find_header_row(preview, ['material', 'libre', 'bloqueado'])
-            df_raw_inv = pd.read_excel(xl, sheet_name=stock_sheet, header=header_row)
-            
-            # Normalizar columnas
-            cols_map = {c.lower(): c for c in df_raw_inv.columns}
-            mat_col = next((c for c in df_raw_inv.columns if 'material' in str(c).lower() and 'nombre' not in str(c).lower()), None)
-            
-            if mat_col:
-                # Calcular total inventario (sumar columnas numéricas relevantes)
-                inv_cols = [c for c in df_raw_inv.columns if any(k in str(c).lower() for k in ['libre', 'bloqueado', 'transito', 'calidad'])]
-                if not inv_cols: # Si no hay detalle, buscar columna total
-                    inv_cols = [c for c in df_raw_inv.columns if 'total' in str(c).lower() or 'cantidad' in str(c).lower()]
-                
-                if inv_cols:
-                    df_raw_inv['Inv Total'] = df_raw_inv[inv_cols].apply(pd.to_numeric, errors='coerce').sum(axis=1)
-                    # Agrupar por Material para tener una sola fila por SKU (suma de todos los lotes/almacenes)
-                    df_inv_grouped = df_raw_inv.groupby(mat_col)['Inv Total'].sum().reset_index()
-                    df_inv = df_inv_grouped.rename(columns={mat_col: 'Material', 'Inv Total': 'Inv Kg-L'})
-                    df_inv['Material'] = df_inv['Material'].astype(str).str.strip()
+        if hojas['stock']:
+            _avisar(avisos, AVISO_INFO, f"Cargando Inventario desde hoja: {hojas['stock']}...")
+            df_inv = read_stock_sheet(xl, hojas['stock'])
 
         # 3. Cargar Master/Despachos (Prioridad: 'Master Actual')
-        # Si 'Master Actual' contiene ventas, lo usaremos.
-        df_sales = pd.DataFrame()
-        master_sheet = next((s for s in sheet_names if 'Master Actual' in s), None)
         # TODO: Implementar lógica de ventas si es necesario y clara
         
         # --- Consolidación ---
         
         if not df_fcst.empty:
-            # Empezamos con el forecast como base principal (tiene fechas y materiales)
-            df_final = df_fcst.copy()
-            
-            # Asegurar tipo de dato para merge
-            df_final['Material'] = df_final['Material'].astype(str).str.strip()
-            
-            # Merge Inventario (Left Join en Material)
-            if not df_inv.empty:
-                # Como el inventario es un snapshot único, lo pegamos a todas las fechas del material
-                df_final = pd.merge(df_final, df_inv, on='Material', how='left')
-                df_final['Inv Kg-L'] = df_final['Inv Kg-L'].fillna(0)
-            else:
-                df_final['Inv Kg-L'] = 0
-                
-            # Merge Despachos (si tuviéramos)
-            df_final['Despachos KL'] = 0 # Placeholder por ahora
-            
-            st.success("✅ Datos consolidados correctamente de múltiples hojas.")
+            df_final = consolidate_sheets(df_fcst, df_inv)
+            _avisar(avisos, AVISO_EXITO, "✅ Datos consolidados correctamente de múltiples hojas.")
             return df_final
             
         else:
             # Si no encontramos forecast, intentar cargar la primera hoja como fallback (método antiguo)
-            st.warning("⚠️ No se detectó hoja de Forecast estándar. Intentando carga genérica de primera hoja...")
-            preview = pd.read_excel(xl, sheet_name=0, header=None, nrows=20)
-            header_row = _find_header_row(preview)
-            df = pd.read_excel(xl, sheet_name=0, header=header_row)
-            return df
+            _avisar(avisos, AVISO_ADVERTENCIA, "⚠️ No se detectó hoja de Forecast estándar. Intentando carga genérica de primera hoja...")
+            return read_generic_sheet(xl, 0)
         
     except Exception as e:
-        st.error(f"Error al leer Excel: {e}")
-        import traceback
-        st.text(traceback.format_exc())
+        _avisar(avisos, AVISO_ERROR, f"Error al leer Excel: {e}", traceback.format_exc())
         return None
 
-@st.cache_data
-def load_data():
+
+def find_local_workbook(data_path=DATA_DIR, avisos=None):
     """
-    Carga el archivo Excel desde la carpeta data
+    Libro Excel más reciente de la carpeta data (None si no hay). Si la carpeta no existe, la crea.
+    Al agregar un libro nuevo (ej. el del mes siguiente) el dashboard pasa a usarlo.
     """
-    # Buscar archivo Excel en la carpeta data
-    data_path = Path(__file__).parent.parent / "data"
-    
+    data_path = Path(data_path)
     if not data_path.exists():
-        st.warning("Creando carpeta 'data'...")
+        _avisar(avisos, AVISO_ADVERTENCIA, "Creando carpeta 'data'...")
         data_path.mkdir(parents=True, exist_ok=True)
         return None
-    
+
     # Buscar archivos Excel
     excel_files = list(data_path.glob("*.xlsx")) + list(data_path.glob("*.xls"))
-    
-    if not excel_files:
-        return None
-    
-    # Usar el primer archivo encontrado
-    file_path = excel_files[0]
-    
-    try:
-        # Usar la carga inteligente
-        df = load_from_excel(file_path)
-        return df
-    except Exception as e:
-        st.error(f"Error al leer el archivo: {str(e)}")
-        return None
+    return max(excel_files, key=lambda p: (p.stat().st_mtime, p.name)) if excel_files else None
+
+DATE_PATTERNS = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+                 'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+
 
-def unpivot_date_columns(df, value_column_name='FCST'):
+def _is_date_column(col):
+    """
+    True si la columna es un mes del formato pivoteado (ej. 'Enero 2026' o un datetime).
+    Se excluyen columnas de diferencias, variaciones, ventas y montos en $.
+    """
+    if str(col).lower() in ['segmento', 'um', 'origen']:
+        return False
+    if isinstance(col, str) and any(p in col.lower() for p in DATE_PATTERNS):
+        return 'dif' not in col.lower() and 'var' not in col.lower() and 'venta' not in col.lower() and '$' not in col
+    # Soporte para columnas datetime directas
+    return isinstance(col, pd.Timestamp) or 'datetime' in str(type(col))
+
+
+@timed()
+def unpivot_date_columns(df, value_column_name='FCST', avisos=None):
     """
     Transforma un DataFrame con fechas como columnas a formato largo.
     Detecta columnas de fecha (ej: 'Enero 2026', 'Febrero 2026') y las convierte en filas.
@@ -232,13 +416,10 @@ def unpivot_date_columns(df, value_column_name='FCST'):
                 break
     
     if not material_col:
-        st.warning("No se encontró columna de material para transformar datos")
+        _avisar(avisos, AVISO_ADVERTENCIA, "No se encontró columna de material para transformar datos")
         return df
 
     # Identificar columnas de fecha
-    date_patterns = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 
-                     'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
-    
     date_columns = []
     id_vars = [material_col]
     if descripcion_col:
@@ -248,13 +429,8 @@ def unpivot_date_columns(df, value_column_name='FCST'):
     for col in df.columns:
         if str(col).lower() in ['segmento', 'um', 'origen']:
             id_vars.append(col)
-        elif isinstance(col, str) and any(p in col.lower() for p in date_patterns):
-            # Verificar si no es una columna de "Dif" o "Var"
-            if 'dif' not in col.lower() and 'var' not in col.lower() and 'venta' not in col.lower() and '$' not in col:
-                date_columns.append(col)
-        # Soporte para columnas datetime directas
-        elif isinstance(col, pd.Timestamp) or 'datetime' in str(type(col)):
-             date_columns.append(col)
+        elif _is_date_column(col):
+            date_columns.append(col)
 
     if not date_columns:
         return df
@@ -312,9 +488,10 @@ def unpivot_date_columns(df, value_column_name='FCST'):
     return df_long
 
 
-def process_data(df):
+@timed()
+def process_data(df, avisos=None):
     """
-    Procesa y limpia los datos del Excel
+    Procesa y limpia los datos del Excel (los problemas con las fechas se agregan a avisos)
     """
     if df is None or df.empty:
         return df
@@ -373,15 +550,15 @@ def process_data(df):
                 df['Fecha'] = pd.to_datetime(df[date_col_source], errors='coerce')
                 
                 if df['Fecha'].isna().all():
-                    st.warning(f"La columna '{date_col_source}' no pudo ser convertida a fechas válidas. Verifique el formato en el archivo Excel.")
+                    _avisar(avisos, AVISO_ADVERTENCIA, f"La columna '{date_col_source}' no pudo ser convertida a fechas válidas. Verifique el formato en el archivo Excel.")
                 elif df['Fecha'].isna().any():
-                     st.info(f"Algunos valores en la columna '{date_col_source}' no pudieron ser convertidos a fecha y fueron ignorados.")
+                    _avisar(avisos, AVISO_INFO, f"Algunos valores en la columna '{date_col_source}' no pudieron ser convertidos a fecha y fueron ignorados.")
 
             except Exception as e:
-                st.error(f"Ocurrió un error inesperado al procesar la columna de fecha '{date_col_source}': {e}")
+                _avisar(avisos, AVISO_ERROR, f"Ocurrió un error inesperado al procesar la columna de fecha '{date_col_source}': {e}")
     
     if 'Fecha' not in df.columns:
-        st.warning("No se encontró una columna de fecha ('Fecha' o 'Mes'). Los filtros y gráficos basados en tiempo no estarán disponibles.")
+        _avisar(avisos, AVISO_ADVERTENCIA, "No se encontró una columna de fecha ('Fecha' o 'Mes'). Los filtros y gráficos basados en tiempo no estarán disponibles.")
     
     # Convertir columnas numéricas
     numeric_columns = ['FCST', 'Prod Kg-L', 'Inv Kg-L', 'Q', 'Cob(D)', 'Cobertura', 
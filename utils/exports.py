@@ -0,0 +1,213 @@
+import hashlib
+import os
+import re
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .granularity import month_codes, period_labels
+
+
+# Formato -> (extensión, tipo MIME)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'XLSX (meses en columnas)': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'XLSX': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+# Formatos que ofrece la exportación de las tablas de planificación (XLSX plano: tablas sin meses, ej. pedidos)
+DEFAULT_EXPORT_FORMATS = ['CSV', 'Parquet', 'XLSX (meses en columnas)']
+
+# Filas por bloque al escribir: el archivo se genera por partes, nunca como un único bytes en memoria
+CHUNK_ROWS = 50_000
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'dashboard_aco_exports')
+
+# Archivos exportados que se conservan en disco (los más antiguos se eliminan)
+MAX_EXPORT_FILES = 50
+
+
+def safe_name(nombre):
+    """
+    Nombre de archivo seguro (ej. 'planificacion_Cob < 45' -> 'planificacion_Cob_menor_45').
+    '<' y '>' se traducen para que 'Cob < 90' y 'Cob > 90' no den el mismo nombre.
+    """
+    nombre = str(nombre).replace('<', ' menor ').replace('>', ' mayor ')
+    return re.sub(r'[^\w.-]+', '_', nombre).strip('_')
+
+
+def sheet_name(nombre):
+    """
+    Nombre de hoja de Excel para una exportación (máximo 31 caracteres, sin caracteres reservados).
+    """
+    return re.sub(r'[\[\]:*?/\\]+', ' ', str(nombre)).strip()[:31] or 'Datos'
+
+
+def export_key(*partes):
+    """
+    Huella de una exportación a partir de lo que la página ya conoce (huella de su dataset y
+    parámetros de la vista), sin volver a hashear la tabla exportada en cada rerun.
+    """
+    return hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()[:16]
+
+
+def export_path(fingerprint, nombre, formato):
+    """
+    Ruta del archivo exportado para una huella de datos, nombre y formato.
+    La huella identifica el contenido filtrado: misma huella, mismo archivo.
+    El formato va en el nombre (los dos XLSX comparten extensión).
+    """
+    extension = EXPORT_FORMATS[formato][0]
+    return os.path.join(EXPORT_DIR, f"{safe_name(nombre)}_{fingerprint}_{safe_name(formato)}.{extension}")
+
+
+def write_csv(tabla, path, chunk_rows=CHUNK_ROWS):
+    """
+    CSV escrito por bloques de filas.
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for inicio in range(0, max(len(tabla), 1), chunk_rows):
+            tabla.iloc[inicio:inicio + chunk_rows].to_csv(f, index=False, header=(inicio == 0))
+
+
+def write_parquet(tabla, path, chunk_rows=CHUNK_ROWS):
+    """
+    Parquet escrito por row groups de chunk_rows filas (requiere pyarrow).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tabla = tabla.reset_index(drop=True)
+    # El esquema se infiere de la tabla completa (columnas object vacías en un bloque no cambian de tipo)
+    esquema = pa.Schema.from_pandas(tabla, preserve_index=False)
+    with pq.ParquetWriter(path, esquema) as writer:
+        for inicio in range(0, len(tabla), chunk_rows):
+            bloque = tabla.iloc[inicio:inicio + chunk_rows]
+            writer.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+
+
+def arrow_stream(tabla):
+    """
+    Tabla serializada en formato Arrow IPC (stream), para consumidores automáticos (requiere pyarrow).
+    Columnas object con tipos mezclados pasan a texto.
+    """
+    import pyarrow as pa
+
+    tabla = tabla.reset_index(drop=True)
+    mezcladas = [c for c in tabla.columns
+                 if tabla[c].dtype == object and pd.api.types.infer_dtype(tabla[c], skipna=True).startswith('mixed')]
+    if mezcladas:
+        tabla = tabla.assign(**{c: tabla[c].map(lambda x: x if pd.isna(x) else str(x)) for c in mezcladas})
+    tabla_arrow = pa.Table.from_pandas(tabla, preserve_index=False)
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabla_arrow.schema) as writer:
+        writer.write_table(tabla_arrow)
+    return destino.getvalue().to_pybytes()
+
+
+def pivot_months(tabla, fecha_col, id_col='Material'):
+    """
+    Lleva el formato largo a matrices id × mes por métrica (filas duplicadas se suman).
+    Retorna (ids, etiquetas de mes, {métrica: ndarray (n_id, n_mes)}).
+    """
+    ids_codigos, ids = pd.factorize(tabla[id_col], sort=True)
+    fechas = tabla[fecha_col]
+    if pd.api.types.is_datetime64_any_dtype(fechas):
+        codigos = month_codes(fechas)
+        mes_codigos, meses = pd.factorize(codigos, sort=True)
+        etiquetas = list(period_labels(np.asarray(meses)))
+    else:
+        mes_codigos, meses = pd.factorize(fechas.astype(str), sort=True)
+        etiquetas = list(meses)
+
+    n_id, n_mes = len(ids), len(etiquetas)
+    valido = (ids_codigos >= 0) & (mes_codigos >= 0)
+    plano = ids_codigos[valido] * n_mes + mes_codigos[valido]
+
+    metricas = {}
+    for col in tabla.columns:
+        if col in (id_col, fecha_col) or not pd.api.types.is_numeric_dtype(tabla[col]):
+            continue
+        valores = pd.to_numeric(tabla[col], errors='coerce').fillna(0).to_numpy(dtype=float)[valido]
+        metricas[col] = np.bincount(plano, weights=valores, minlength=n_id * n_mes).reshape(n_id, n_mes)
+    return np.asarray(ids), etiquetas, metricas
+
+
+def write_xlsx(tabla, path, nombre_hoja, chunk_rows=CHUNK_ROWS):
+    """
+    XLSX plano (una fila por fila de la tabla) en modo write_only de openpyxl, escrito por bloques.
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(sheet_name(nombre_hoja))
+    hoja.append([str(c) for c in tabla.columns])
+    for inicio in range(0, len(tabla), chunk_rows):
+        bloque = tabla.iloc[inicio:inicio + chunk_rows].astype(object)
+        for fila in bloque.where(bloque.notna(), None).itertuples(index=False, name=None):
+            hoja.append(list(fila))
+    libro.save(path)
+
+
+def write_xlsx_wide(tabla, path, fecha_col, id_col='Material'):
+    """
+    XLSX con los meses en columnas: una fila por material y métrica.
+    Usa el modo write_only de openpyxl (memoria constante: las filas se escriben y se liberan).
+    """
+    from openpyxl import Workbook
+
+    ids, meses, metricas = pivot_months(tabla, fecha_col, id_col)
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Planificación')
+    hoja.append([id_col, 'Métrica'] + meses)
+    for i, material in enumerate(ids):
+        for metrica, matriz in metricas.items():
+            hoja.append([material, metrica] + np.round(matriz[i], 2).tolist())
+    libro.save(path)
+
+
+def export_file(tabla, fingerprint, nombre, formato, fecha_col=None):
+    """
+    Genera (o reutiliza) el archivo exportado y retorna su ruta. Si ya existe un archivo
+    para la misma huella y formato no se vuelve a escribir.
+    """
+    path = export_path(fingerprint, nombre, formato)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=EXPORT_DIR, suffix='.tmp')
+    os.close(descriptor)
+    try:
+        if formato == 'CSV':
+            write_csv(tabla, temporal)
+        elif formato == 'Parquet':
+            write_parquet(tabla, temporal)
+        elif formato != 'XLSX' and fecha_col and fecha_col in tabla.columns and 'Material' in tabla.columns:
+            write_xlsx_wide(tabla, temporal, fecha_col)
+        else:
+            write_xlsx(tabla, temporal, nombre)
+        # Renombrado atómico: otra sesión nunca ve un archivo a medio escribir
+        os.replace(temporal, path)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+    _prune_exports()
+    return path
+
+
+def _prune_exports(max_files=MAX_EXPORT_FILES):
+    """
+    Elimina los archivos exportados más antiguos cuando se supera max_files.
+    """
+    archivos = [os.path.join(EXPORT_DIR, f) for f in os.listdir(EXPORT_DIR) if not f.endswith('.tmp')]
+    archivos.sort(key=os.path.getmtime, reverse=True)
+    for viejo in archivos[max_files:]:
+        try:
+            os.remove(viejo)
+        except OSError:
+            pass
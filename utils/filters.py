@@ -0,0 +1,51 @@
+import pandas as pd
+
+from .timing import timed
+
+
+# Meses seleccionados por defecto en el filtro Fecha Año/Mes (los últimos)
+DEFAULT_MONTHS = 3
+
+
+def default_dates(df, n=DEFAULT_MONTHS):
+    """
+    Fechas disponibles y selección por defecto del filtro de fecha: (todas ordenadas, las últimas n).
+    """
+    if 'Fecha' not in df.columns:
+        return [], []
+    fechas = sorted(df['Fecha'].dropna().unique())
+    return fechas, fechas[-n:]
+
+
+@timed()
+def filter_dataset(df, fechas=None, origenes=None, materiales=None, abc=None, xyz=None):
+    """
+    Aplica los filtros de la barra lateral. None en un filtro significa "Todas"/"Todos".
+    Una lista de fechas vacía no filtra (igual que el multiselect sin selección); en los demás
+    filtros una lista vacía deja el dataset vacío.
+    """
+    df_filtered = df.copy()
+
+    if fechas and 'Fecha' in df.columns:
+        df_filtered = df_filtered[df_filtered['Fecha'].isin(fechas)]
+
+    for col, valores in (('Origen', origenes), ('Material', materiales), ('ABC', abc), ('XYZ', xyz)):
+        if valores is not None and col in df.columns:
+            df_filtered = df_filtered[df_filtered[col].isin(valores)]
+
+    return df_filtered
+
+
+@timed()
+def future_rows(df, fecha_actual=None):
+    """
+    Filas desde la fecha actual en adelante (Evolución Futura). Retorna (df_futuro, sin_futuro):
+    si no hay fechas futuras se usa el dataset completo y sin_futuro es True.
+    """
+    if 'Fecha' not in df.columns or not pd.api.types.is_datetime64_any_dtype(df['Fecha']):
+        return df, False
+    fecha_actual = fecha_actual or pd.Timestamp.now()
+    df_futuro = df[df['Fecha'] >= fecha_actual]
+    if df_futuro.empty:
+        return df, True
+    return df_futuro, False
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from .calculations import ESTADOS_COBERTURA, calculate_cobertura_array
+from .timing import timed
+
+
+GRANULARIDADES = ['Mes', 'Trimestre', 'Año a la fecha (YTD)', 'Móvil 12 meses']
+
+# Métricas de flujo (se suman dentro del período) y de stock (se toma el último mes del período)
+FLOW_COLUMNS = ['FCST', 'Despachos KL', 'Dif_Abs', 'Cob_Sum', 'Cob_N', 'N_Meses'] + ESTADOS_COBERTURA + ['Sin Dato']
+STOCK_COLUMNS = ['Inv Kg-L']
+
+
+def month_codes(fechas):
+    """
+    Código entero de mes (meses desde enero 1970) para una serie/array de fechas.
+    Todas las agrupaciones de tiempo se hacen con aritmética sobre estos códigos.
+    """
+    return np.asarray(pd.to_datetime(fechas)).astype('datetime64[M]').astype(np.int64)
+
+
+def period_labels(codigos, granularidad='Mes'):
+    """
+    Etiquetas de período para códigos de mes, calculadas solo sobre los códigos únicos.
+    """
+    codigos = np.asarray(codigos, dtype=np.int64)
+    unicos, inversa = np.unique(codigos, return_inverse=True)
+    anio = unicos // 12 + 1970
+    mes = unicos % 12 + 1
+
+    if granularidad == 'Trimestre':
+        etiquetas = [f"{a}-T{(m - 1) // 3 + 1}" for a, m in zip(anio, mes)]
+    elif granularidad == 'Año a la fecha (YTD)':
+        etiquetas = [f"YTD {a}-{m:02d}" for a, m in zip(anio, mes)]
+    elif granularidad == 'Móvil 12 meses':
+        etiquetas = [f"R12 {a}-{m:02d}" for a, m in zip(anio, mes)]
+    else:
+        etiquetas = [f"{a}-{m:02d}" for a, m in zip(anio, mes)]
+    return np.array(etiquetas, dtype=object)[inversa]
+
+
+@timed()
+def monthly_aggregates(df):
+    """
+    Agregados mensuales base (una fila por mes) sobre los que se re-agrupa cualquier granularidad.
+    Incluye FCST, Despachos, Inventario, suma/conteo de Cob(D), error absoluto total del mes
+    (para WAPE) y conteo de filas por estado de cobertura.
+    """
+    if 'Fecha' not in df.columns:
+        return pd.DataFrame()
+
+    df = df[df['Fecha'].notna()]
+    if df.empty:
+        return pd.DataFrame()
+
+    codigos, inversa = np.unique(month_codes(df['Fecha']), return_inverse=True)
+    n = len(codigos)
+
+    def _sum(col):
+        if col not in df.columns:
+            return np.zeros(n)
+        return np.bincount(inversa, weights=pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(), minlength=n)
+
+    mensual = pd.DataFrame({'Codigo': codigos})
+    for col in ['FCST', 'Despachos KL', 'Inv Kg-L']:
+        mensual[col] = _sum(col)
+    mensual['Dif_Abs'] = np.abs(mensual['Despachos KL'] - mensual['FCST'])
+
+    if 'Cob(D)' in df.columns:
+        cob = pd.to_numeric(df['Cob(D)'], errors='coerce').to_numpy()
+        valido = ~np.isnan(cob)
+        mensual['Cob_Sum'] = np.bincount(inversa[valido], weights=cob[valido], minlength=n)
+        mensual['Cob_N'] = np.bincount(inversa[valido], minlength=n)
+    else:
+        mensual['Cob_Sum'] = 0.0
+        mensual['Cob_N'] = 0
+
+    estados = ESTADOS_COBERTURA + ['Sin Dato']
+    if 'Estado_Cobertura' in df.columns:
+        estado_idx = pd.Categorical(df['Estado_Cobertura'], categories=estados).codes
+        estado_idx = np.where(estado_idx < 0, len(estados) - 1, estado_idx)
+        conteo = np.bincount(inversa * len(estados) + estado_idx, minlength=n * len(estados)).reshape(n, len(estados))
+    else:
+        conteo = np.zeros((n, len(estados)), dtype=int)
+    for i, estado in enumerate(estados):
+        mensual[estado] = conteo[:, i]
+
+    mensual['N_Meses'] = 1
+    return mensual
+
+
+def _window_sums(codigos, valores, granularidad):
+    """
+    Sumas por ventana sobre meses ordenados: YTD (desde enero del mismo año) o móvil de 12 meses.
+    Se resuelve con sumas acumuladas y búsquedas binarias sobre los códigos de mes.
+    """
+    acumulado = np.vstack([np.zeros((1, valores.shape[1])), np.cumsum(valores, axis=0)])
+    fin = np.arange(1, len(codigos) + 1)
+    if granularidad == 'Año a la fecha (YTD)':
+        inicio_ventana = (codigos // 12) * 12
+    else:
+        inicio_ventana = codigos - 11
+    inicio = np.searchsorted(codigos, inicio_ventana, side='left')
+    return acumulado[fin] - acumulado[inicio]
+
+
+@timed()
+def rebucket(mensual, granularidad='Mes'):
+    """
+    Re-agrupa los agregados mensuales a la granularidad pedida sin volver a leer los datos.
+
+    - Mes: sin cambios
+    - Trimestre: código de mes // 3; flujos sumados, inventario del último mes del trimestre
+    - YTD / Móvil 12 meses: ventanas acumuladas que terminan en cada mes
+
+    Retorna columnas Periodo, Fecha (inicio del período), FCST, Despachos KL, Inv Kg-L, Cob(D) promedio,
+    Cobertura_Dias (inventario / FCST mensual promedio × 30), Dif_Wape_Abs, Wape_% y conteo por estado.
+    """
+    if mensual is None or mensual.empty:
+        return pd.DataFrame()
+
+    mensual = mensual.sort_values('Codigo')
+    codigos = mensual['Codigo'].to_numpy()
+    flujos = mensual[FLOW_COLUMNS].to_numpy(dtype=float)
+    stocks = mensual[STOCK_COLUMNS].to_numpy(dtype=float)
+
+    if granularidad == 'Trimestre':
+        trimestre = codigos // 3
+        unicos, inversa = np.unique(trimestre, return_inverse=True)
+        flujos = np.vstack([np.bincount(inversa, weights=flujos[:, j], minlength=len(unicos)) for j in range(flujos.shape[1])]).T
+        ultimo = np.r_[inversa[1:] != inversa[:-1], True]
+        stocks = stocks[ultimo]
+        codigos = unicos * 3
+    elif granularidad in ('Año a la fecha (YTD)', 'Móvil 12 meses'):
+        flujos = _window_sums(codigos, flujos, granularidad)
+
+    resultado = pd.DataFrame(flujos, columns=FLOW_COLUMNS)
+    resultado[STOCK_COLUMNS] = stocks
+    resultado.insert(0, 'Periodo', period_labels(codigos, granularidad))
+    resultado.insert(1, 'Fecha', pd.to_datetime(codigos.astype('datetime64[M]')))
+
+    resultado['Cob(D)'] = np.where(resultado['Cob_N'] > 0, resultado['Cob_Sum'] / resultado['Cob_N'].clip(lower=1), np.nan)
+    resultado['Cobertura_Dias'] = calculate_cobertura_array(
+        resultado['Inv Kg-L'].to_numpy(), (resultado['FCST'] / resultado['N_Meses']).to_numpy()
+    )
+    resultado['Dif_Wape_Abs'] = resultado['Dif_Abs']
+    resultado['Wape_%'] = np.where(
+        resultado['Despachos KL'] > 0,
+        resultado['Dif_Abs'] / resultado['Despachos KL'].where(resultado['Despachos KL'] > 0, 1) * 100,
+        0
+    )
+    return resultado.drop(columns=['Dif_Abs', 'Cob_Sum', 'Cob_N'])
+
+
+def estados_por_periodo(periodos):
+    """
+    Formato largo (Periodo, Estado_Cobertura, Cantidad, Porcentaje) para los gráficos 100% apilados.
+    """
+    estados = [e for e in ESTADOS_COBERTURA + ['Sin Dato'] if e in periodos.columns]
+    largo = periodos.melt(id_vars=['Periodo', 'Fecha'], value_vars=estados, var_name='Estado_Cobertura', value_name='Cantidad')
+    largo = largo[largo['Cantidad'] > 0]
+    total = largo.groupby('Periodo')['Cantidad'].transform('sum')
+    largo['Porcentaje'] = (largo['Cantidad'] / total * 100).round(1)
+    return largo.sort_values(['Fecha', 'Estado_Cobertura']).reset_index(drop=True)
@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from .calculations import ESTADOS_COBERTURA, categorize_cobertura_array
+from .timing import timed
+
+
+PAGE_SIZES = [25, 50, 100, 200]
+
+# Colores de fondo por estado de cobertura (crítico, alerta, ok); sin dato queda sin estilo
+COVERAGE_COLORS = ['background-color: #FFCDD2', 'background-color: #FFE082', 'background-color: #C8E6C9', '']
+
+
+# Columna con el estado de cobertura ya calculado por fila (fijo 45/90 o por SKU, ver safety_stock)
+ESTADO_COL = 'Estado_Cobertura'
+
+
+def coverage_codes(tabla, cob_col=None, estado_col=ESTADO_COL, umbral_critico=45, umbral_alerta=90):
+    """
+    Código de estado de cobertura por fila: 0 = crítico, 1 = alerta, 2 = ok, -1 = sin dato.
+    Si la tabla trae estado_col se usa ese estado (respeta los umbrales por SKU);
+    si no, se categorizan los días de cob_col con los umbrales fijos.
+    """
+    if estado_col and estado_col in tabla.columns:
+        return pd.Categorical(tabla[estado_col], categories=ESTADOS_COBERTURA).codes.astype(np.int8)
+    if cob_col and cob_col in tabla.columns:
+        return categorize_cobertura_array(pd.to_numeric(tabla[cob_col], errors='coerce').to_numpy(), umbral_critico, umbral_alerta)
+    return np.full(len(tabla), -1, dtype=np.int8)
+
+
+@timed()
+def filter_table(tabla, texto='', columnas_texto=('Material', 'Descripción'), cob_col=None, estados=None,
+                 estado_col=ESTADO_COL, umbral_critico=45, umbral_alerta=90):
+    """
+    Filtro del lado del servidor: subcadena (sin distinguir mayúsculas) en las columnas de texto
+    y, opcionalmente, estado de cobertura (ver coverage_codes). Retorna las posiciones de las filas que pasan.
+    """
+    mascara = np.ones(len(tabla), dtype=bool)
+
+    texto = str(texto or '').strip()
+    if texto:
+        coincide = np.zeros(len(tabla), dtype=bool)
+        for col in columnas_texto:
+            if col in tabla.columns:
+                coincide |= tabla[col].astype(str).str.contains(texto, case=False, regex=False).to_numpy()
+        mascara &= coincide
+
+    if cob_col and estados and cob_col in tabla.columns:
+        codigos = coverage_codes(tabla, cob_col, estado_col, umbral_critico, umbral_alerta)
+        permitidos = [i for i, e in enumerate(ESTADOS_COBERTURA) if e in estados]
+        mascara &= np.isin(codigos, permitidos)
+
+    return np.flatnonzero(mascara)
+
+
+def sort_positions(tabla, posiciones, columna=None, ascendente=True):
+    """
+    Ordena las posiciones filtradas por una columna (estable; los nulos quedan al final).
+    """
+    if not columna or columna not in tabla.columns or len(posiciones) == 0:
+        return posiciones
+
+    valores = tabla[columna].iloc[posiciones]
+    orden = valores.reset_index(drop=True).sort_values(ascending=ascendente, kind='stable', na_position='last').index.to_numpy()
+    return posiciones[orden]
+
+
+def page_bounds(n_filas, pagina, tamano):
+    """
+    Límites [inicio, fin) de la página pedida (1-indexada) y total de páginas.
+    """
+    n_paginas = max(math.ceil(n_filas / tamano), 1)
+    pagina = min(max(int(pagina), 1), n_paginas)
+    inicio = (pagina - 1) * tamano
+    return inicio, min(inicio + tamano, n_filas), n_paginas
+
+
+def coverage_styles(codigos):
+    """
+    Estilos CSS de cobertura para un array de códigos de estado (ver coverage_codes), vectorizado.
+    """
+    # El código -1 (sin dato) indexa el último elemento: sin estilo
+    return np.array(COVERAGE_COLORS, dtype=object)[np.asarray(codigos)]
+
+
+def style_page(pagina_df, cob_col=None, estado_col=ESTADO_COL):
+    """
+    Styler de la página visible: colores de cobertura en cob_col solo para las filas renderizadas,
+    según el estado de cada fila (ver coverage_codes).
+    """
+    if not cob_col or cob_col not in pagina_df.columns:
+        return pagina_df
+    estilos = coverage_styles(coverage_codes(pagina_df, cob_col, estado_col))
+    return pagina_df.style.apply(lambda columna: estilos, subset=[cob_col]).format(precision=2)
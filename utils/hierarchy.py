@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from .timing import timed
+
+
+# Jerarquía por defecto (de lo general a lo particular); los niveles ausentes en los datos se omiten
+DEFAULT_LEVELS = ['Segmento', 'Origen', 'Material']
+
+TOTAL_ID = 'Total'
+
+
+@timed()
+def hierarchical_rollup(df, levels=None):
+    """
+    Calcula todos los niveles de la jerarquía (Total, Segmento, Segmento×Origen, Segmento×Origen×Material)
+    en una sola pasada: se agrega una vez al nivel más fino y los niveles superiores se obtienen
+    sumando esos subtotales con bincount (equivalente a GROUPING SETS).
+
+    Métricas por nodo: FCST, Despachos, Inventario actual (foto por SKU), N° SKU, SKUs críticos y
+    cobertura en días (inventario / FCST mensual promedio × 30).
+
+    Retorna un DataFrame con columnas id, parent, Nivel, Etiqueta y métricas; apto para
+    px.sunburst / px.treemap (ids/parents) y para la tabla de árbol.
+    """
+    levels = [c for c in (levels or DEFAULT_LEVELS) if c in df.columns]
+    if 'Material' not in levels or df.empty:
+        return pd.DataFrame()
+
+    n_meses = max(df['Fecha'].nunique(), 1) if 'Fecha' in df.columns else 1
+
+    # Nivel más fino: una fila por combinación de niveles (claves faltantes como 'Sin dato')
+    claves = df[levels].astype(object).fillna('Sin dato').astype(str)
+    codigos, hojas = pd.factorize(pd.MultiIndex.from_frame(claves), sort=True)
+    n_hojas = len(hojas)
+
+    def _sum(col):
+        if col not in df.columns:
+            return np.zeros(n_hojas)
+        return np.bincount(codigos, weights=pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(), minlength=n_hojas)
+
+    metricas = {
+        'FCST': _sum('FCST'),
+        'Despachos': _sum('Despachos KL'),
+        'Inventario': np.zeros(n_hojas),
+        'N° SKU': np.ones(n_hojas),
+        'SKUs Críticos': np.zeros(n_hojas),
+    }
+    if 'Inv Kg-L' in df.columns:
+        # El inventario se repite en cada mes: por hoja (SKU) se toma el máximo, no la suma
+        inv = pd.to_numeric(df['Inv Kg-L'], errors='coerce').fillna(0).to_numpy()
+        maximo = np.zeros(n_hojas)
+        np.maximum.at(maximo, codigos, inv)
+        metricas['Inventario'] = maximo
+    if 'Estado_Cobertura' in df.columns:
+        critico = (df['Estado_Cobertura'] == 'Cob < 45').to_numpy()
+        metricas['SKUs Críticos'] = (np.bincount(codigos, weights=critico, minlength=n_hojas) > 0).astype(float)
+
+    hojas_df = pd.DataFrame(list(hojas), columns=levels)
+
+    nodos = []
+    # Niveles superiores: prefijos de la clave de hoja, agregados con bincount sobre las hojas
+    for profundidad in range(0, len(levels) + 1):
+        if profundidad == 0:
+            padre_codigos = np.zeros(n_hojas, dtype=int)
+            grupos = pd.DataFrame(index=[0])
+        else:
+            prefijo = hojas_df[levels[:profundidad]]
+            padre_codigos, grupos_idx = pd.factorize(pd.MultiIndex.from_frame(prefijo), sort=True)
+            grupos = pd.DataFrame(list(grupos_idx), columns=levels[:profundidad])
+
+        n_grupos = len(grupos)
+        nivel = pd.DataFrame({k: np.bincount(padre_codigos, weights=v, minlength=n_grupos) for k, v in metricas.items()})
+
+        if profundidad == 0:
+            nivel['id'] = TOTAL_ID
+            nivel['parent'] = ''
+            nivel['Etiqueta'] = TOTAL_ID
+            nivel['Nivel'] = TOTAL_ID
+        else:
+            partes = grupos.astype(str)
+            nivel['id'] = [TOTAL_ID + '/' + '/'.join(p) for p in partes.itertuples(index=False)]
+            nivel['parent'] = [TOTAL_ID + ('/' + '/'.join(p[:-1]) if len(p) > 1 else '') for p in partes.itertuples(index=False)]
+            nivel['Etiqueta'] = partes[levels[profundidad - 1]].to_numpy()
+            nivel['Nivel'] = levels[profundidad - 1]
+            for col in levels[:profundidad]:
+                nivel[col] = grupos[col].to_numpy()
+        nodos.append(nivel)
+
+    rollup = pd.concat(nodos, ignore_index=True)
+    fcst_mensual = rollup['FCST'] / n_meses
+    rollup['Cobertura (D)'] = np.where(fcst_mensual > 0, rollup['Inventario'] / fcst_mensual.where(fcst_mensual > 0, 1) * 30, np.nan)
+    rollup['N° SKU'] = rollup['N° SKU'].astype(int)
+    rollup['SKUs Críticos'] = rollup['SKUs Críticos'].astype(int)
+
+    orden = ['id', 'parent', 'Nivel', 'Etiqueta'] + levels + list(metricas) + ['Cobertura (D)']
+    return rollup[[c for c in orden if c in rollup.columns]].round(1)
@@ -0,0 +1,257 @@
+import sys
+import time
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .data_loader import DATA_DIR
+from .precompute import workbook_version
+from .uploads import new_upload_store, start_upload, upload_status
+
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+DEFAULT_SESIONES = 4
+DEFAULT_ACCIONES = 20
+
+# Peso de cada tipo de acción en el recorrido de una sesión
+PESOS_ACCIONES = {
+    'pagina': 0.45,      # cambiar de página
+    'filtro': 0.45,      # cambiar un filtro de la barra lateral
+    'busqueda': 0.05,    # buscar un material
+    'subida': 0.05,      # subir uno de los libros de data (lectura en segundo plano)
+}
+
+# Filtros de la barra lateral que cambian las sesiones: etiqueta -> tipo de widget
+FILTROS = {
+    'Origen': 'multiselect',
+    'Clase ABC': 'multiselect',
+    'Clase XYZ': 'multiselect',
+    'Agrupar por': 'selectbox',
+    'Granularidad': 'selectbox',
+    'Estado Cob(D)': 'selectbox',
+    'Umbrales Cob(D)': 'radio',
+}
+MENU_PAGINAS = 'Selecciona'
+
+# Percentiles de latencia informados
+PERCENTILES = [50, 90, 95, 99]
+
+# Historial de mediciones (una línea JSON por medición, ver startup.append_history)
+LOAD_HISTORY = PROJECT_DIR / "rendimiento" / "carga.jsonl"
+
+# Intervalo de muestreo del RSS del proceso
+RSS_INTERVAL_SECONDS = 0.05
+TIMEOUT_SECONDS = 600
+
+
+def current_rss():
+    """
+    RSS actual del proceso en bytes (psutil; sin psutil: /proc/self/status en Linux o, en otros Unix,
+    el pico de getrusage). Retorna 0 si no hay forma de medirlo.
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) * 1024
+    except OSError:
+        pass
+    if sys.platform == 'win32':
+        return 0
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss viene en bytes en macOS y en kilobytes en Linux y los demás Unix
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+class _RssSampler(threading.Thread):
+    """
+    Muestrea el RSS del proceso mientras corren las sesiones y guarda el pico.
+    """
+    def __init__(self, intervalo=RSS_INTERVAL_SECONDS):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico = current_rss()
+        self._fin = threading.Event()
+
+    def run(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, current_rss())
+
+    def stop(self):
+        self._fin.set()
+        self.join()
+        self.pico = max(self.pico, current_rss())
+        return self.pico
+
+
+def _widget(at, tipo, etiqueta):
+    elementos = [w for w in getattr(at.sidebar, tipo) if w.label.startswith(etiqueta)]
+    return elementos[0] if elementos else None
+
+
+def _plan_action(at, rng, tipos, pesos):
+    """
+    Elige la próxima acción de la sesión y prepara el widget. Retorna el nombre de la acción
+    (ej. 'pagina', 'filtro:Origen') o None si no hay widget disponible (pantalla de bienvenida o error).
+    """
+    tipo = rng.choice(tipos, p=pesos)
+    if tipo == 'pagina':
+        menu = _widget(at, 'radio', MENU_PAGINAS)
+        if menu is None:
+            return None
+        menu.set_value(rng.choice([o for o in menu.options if o != menu.value]))
+        return 'pagina'
+    if tipo == 'filtro':
+        etiqueta = rng.choice(list(FILTROS))
+        widget = _widget(at, FILTROS[etiqueta], etiqueta)
+        if widget is None or not widget.options:
+            return None
+        opcion = rng.choice(widget.options)
+        if FILTROS[etiqueta] == 'multiselect':
+            # La mitad de las veces se vuelve a "Todas" para no dejar la sesión sin datos
+            widget.set_value([widget.options[0]] if rng.random() < 0.5 else [opcion])
+        else:
+            widget.set_value(opcion)
+        return f"filtro:{etiqueta}"
+    if tipo == 'busqueda':
+        widget = _widget(at, 'text_input', 'Buscar material')
+        if widget is None:
+            return None
+        widget.set_value(rng.choice(['', '4', '40', 'herb', 'fung 5l', 'kg']))
+        return 'busqueda'
+    return 'subida'
+
+
+def _upload(store, libros, rng, sesion, timeout=TIMEOUT_SECONDS):
+    """
+    Sube un libro de data por el mismo camino que el dashboard (uploads.start_upload) y espera a que
+    termine. Retorna (segundos, error o None).
+    """
+    path = Path(rng.choice(libros))
+    clave = f"{sesion}:{path.name}:{time.perf_counter_ns()}"
+    inicio = time.perf_counter()
+    start_upload(store, clave, path.read_bytes(), path.name, sesion=sesion)
+    while time.perf_counter() - inicio < timeout:
+        estado = upload_status(store, clave)
+        if estado is None or estado['estado'] != 'leyendo':
+            break
+        time.sleep(0.05)
+    segundos = time.perf_counter() - inicio
+    if estado is None or estado['estado'] == 'leyendo':
+        return segundos, 'tiempo agotado'
+    return segundos, estado['error']
+
+
+def run_session(n, acciones, libros, store, seed, pausa=0.0, registros=None, timeout=TIMEOUT_SECONDS):
+    """
+    Una sesión del dashboard (AppTest): fija uno de los libros de data, abre la app y ejecuta
+    'acciones' acciones al azar (páginas, filtros, búsquedas y subidas). Cada rerun se agrega a 'registros'
+    como {'sesion', 'accion', 'segundos', 'error'}.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng(seed)
+    registros = registros if registros is not None else []
+    tipos = list(PESOS_ACCIONES)
+    pesos = np.array([PESOS_ACCIONES[t] for t in tipos]) / sum(PESOS_ACCIONES.values())
+
+    at = AppTest.from_file(str(PROJECT_DIR / 'app.py'), default_timeout=timeout)
+    if libros:
+        # Cada sesión trabaja con uno de los libros de data (como si hubiera abierto el dashboard en otra versión)
+        at.session_state['version_libro'] = workbook_version(rng.choice(libros))
+
+    def rerun(accion):
+        inicio = time.perf_counter()
+        try:
+            at.run()
+            error = str(at.exception[0].value) if len(at.exception) else None
+        except Exception as e:
+            error = str(e)
+        registros.append({'sesion': n, 'accion': accion, 'segundos': time.perf_counter() - inicio, 'error': error})
+
+    rerun('inicio')
+    for _ in range(acciones):
+        if pausa:
+            time.sleep(rng.exponential(pausa))
+        accion = _plan_action(at, rng, tipos, pesos)
+        if accion == 'subida':
+            if libros:
+                segundos, error = _upload(store, libros, rng, f"carga-{n}", timeout)
+                registros.append({'sesion': n, 'accion': 'subida', 'segundos': segundos, 'error': error})
+            continue
+        if accion is not None:
+            rerun(accion)
+    return registros
+
+
+def latency_summary(segundos):
+    """
+    Percentiles (PERCENTILES), media y máximo de una lista de latencias en segundos.
+    """
+    if len(segundos) == 0:
+        return {}
+    valores = np.asarray(segundos, dtype=float)
+    resumen = {f"p{p}": float(np.percentile(valores, p)) for p in PERCENTILES}
+    resumen.update(media=float(valores.mean()), max=float(valores.max()), n=int(len(valores)))
+    return resumen
+
+
+def run_load(sesiones=DEFAULT_SESIONES, acciones=DEFAULT_ACCIONES, seed=0, pausa=0.0, calentar=True):
+    """
+    Simula 'sesiones' sesiones concurrentes (un hilo por sesión en este proceso, como en el servidor:
+    comparten cachés, pool de lectura y memoria). calentar: una sesión previa de una sola vista
+    llena los cachés para medir el régimen estable. Los libros son los de DATA_DIR (DASHBOARD_DATA_DIR
+    debe definirse antes de importar utils: la app corre en este mismo proceso).
+    Retorna {'sesiones', 'acciones', 'reruns', 'errores', 'segundos', 'throughput' (reruns/s),
+    'latencia' (todos los reruns), 'por_accion' {tipo: resumen}, 'subidas', 'rss_inicial', 'rss_pico'}.
+    El RSS es el de este proceso: no incluye los procesos del pool que leen los libros subidos.
+    """
+    from streamlit import logger
+    logger.set_log_level('error')
+    libros = sorted(str(p) for p in Path(DATA_DIR).glob('*.xls*') if not p.name.startswith('~$'))
+    store = new_upload_store()
+    if calentar:
+        run_session(-1, 0, libros, store, seed)
+
+    rss_inicial = current_rss()
+    muestreo = _RssSampler()
+    muestreo.start()
+    registros = []
+    hilos = [threading.Thread(target=run_session, args=(n, acciones, libros, store, seed + n + 1, pausa, registros),
+                              daemon=True)
+             for n in range(sesiones)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+    rss_pico = muestreo.stop()
+
+    reruns = [r for r in registros if r['accion'] != 'subida']
+    subidas = [r for r in registros if r['accion'] == 'subida']
+    tipos = sorted({r['accion'].split(':')[0] for r in reruns})
+    return {
+        'sesiones': sesiones,
+        'acciones': acciones,
+        'libros': [Path(p).name for p in libros],
+        'reruns': len(reruns),
+        'errores': sorted({r['error'] for r in registros if r['error']}),
+        'segundos': segundos,
+        'throughput': len(reruns) / segundos if segundos else 0.0,
+        'latencia': latency_summary([r['segundos'] for r in reruns]),
+        'por_accion': {t: latency_summary([r['segundos'] for r in reruns if r['accion'].split(':')[0] == t])
+                       for t in tipos},
+        'subidas': latency_summary([r['segundos'] for r in subidas]),
+        'rss_inicial': rss_inicial,
+        'rss_pico': rss_pico,
+    }
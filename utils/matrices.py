@@ -0,0 +1,141 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .timing import timed
+
+
+# Columnas numéricas que se llevan a matrices SKU × mes (si existen en el DataFrame)
+MATRIX_VALUE_COLUMNS = ['FCST', 'Inv Kg-L', 'Despachos KL', 'Prod Kg-L', 'Q']
+
+# Atributos descriptivos por SKU (se toma el primer valor de cada material)
+ATTRIBUTE_COLUMNS = ['Origen', 'Segmento', 'Descripción']
+
+
+@timed()
+def dataset_fingerprint(df):
+    """
+    Calcula una huella corta del contenido de un DataFrame.
+    Se usa como clave de caché: dos DataFrames con el mismo contenido producen la misma huella.
+    """
+    if df is None or df.empty:
+        return "vacio"
+
+    h = hashlib.sha1()
+    h.update(str(tuple(df.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+@timed()
+def build_sku_month_matrices(df, value_cols=None):
+    """
+    Convierte el formato largo (una fila por Material y Fecha) en matrices densas SKU × mes.
+
+    Retorna un diccionario con:
+    - 'materiales': array con los códigos de material (orden de las filas)
+    - 'fechas': DatetimeIndex ordenado (orden de las columnas)
+    - 'atributos': DataFrame por SKU con Origen/Segmento/Descripción, indexado por Material
+    - 'valores': dict columna -> ndarray float (n_sku, n_mes); filas duplicadas se suman
+    - 'presente': ndarray bool (n_sku, n_mes), True si el par Material/Fecha existe en los datos
+    - 'mat_codes' / 'fecha_codes': códigos enteros de cada fila original (para volver al formato largo)
+    """
+    if df is None or df.empty or 'Material' not in df.columns or 'Fecha' not in df.columns:
+        return None
+
+    if value_cols is None:
+        value_cols = [c for c in MATRIX_VALUE_COLUMNS if c in df.columns]
+
+    df = df.dropna(subset=['Material', 'Fecha'])
+
+    mat_codes, materiales = pd.factorize(df['Material'], sort=True)
+    fecha_codes, fechas = pd.factorize(df['Fecha'], sort=True)
+    n_sku, n_mes = len(materiales), len(fechas)
+
+    # Índice plano de cada fila en la matriz: permite agregar con bincount en una sola pasada
+    flat = mat_codes * n_mes + fecha_codes
+    size = n_sku * n_mes
+
+    valores = {}
+    for col in value_cols:
+        vals = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(dtype=float)
+        valores[col] = np.bincount(flat, weights=vals, minlength=size).reshape(n_sku, n_mes)
+
+    presente = np.bincount(flat, minlength=size).reshape(n_sku, n_mes) > 0
+
+    attr_cols = [c for c in ATTRIBUTE_COLUMNS if c in df.columns]
+    if attr_cols:
+        atributos = df[attr_cols].groupby(mat_codes).first().reindex(range(n_sku))
+    else:
+        atributos = pd.DataFrame(index=range(n_sku))
+    atributos.index = pd.Index(materiales, name='Material')
+
+    return {
+        'materiales': np.asarray(materiales),
+        'fechas': pd.DatetimeIndex(fechas),
+        'atributos': atributos,
+        'valores': valores,
+        'presente': presente,
+        'mat_codes': mat_codes,
+        'fecha_codes': fecha_codes,
+    }
+
+
+def inventory_snapshot(matrices, inv_col='Inv Kg-L'):
+    """
+    Inventario actual por SKU (n_sku,). El inventario es una foto por SKU repetida en cada mes,
+    por lo que se toma el valor del primer mes con dato.
+    """
+    presente = matrices['presente']
+    primer_mes = presente.argmax(axis=1)
+    return matrices['valores'][inv_col][np.arange(presente.shape[0]), primer_mes]
+
+
+def actual_months(matrices, desp_col='Despachos KL', hoy=None):
+    """
+    Meses con despachos registrados (n_mes,): hasta el último mes con despachos en los datos y
+    anteriores al mes en curso. Los meses abiertos o futuros traen despachos en cero, no un real.
+    """
+    fechas = matrices['fechas']
+    if desp_col not in matrices['valores'] or len(fechas) == 0:
+        return np.zeros(len(fechas), dtype=bool)
+
+    con_despachos = (matrices['valores'][desp_col] != 0).any(axis=0)
+    if not con_despachos.any():
+        return np.zeros(len(fechas), dtype=bool)
+
+    mes_actual = (pd.Timestamp.now() if hoy is None else pd.Timestamp(hoy)).to_period('M').start_time
+    return (np.arange(len(fechas)) <= np.flatnonzero(con_despachos)[-1]) & (fechas < mes_actual)
+
+
+def horizon_months(fechas, hoy=None):
+    """
+    Meses del horizonte proyectado (n_mes,): desde el mes en curso (igual que Evolución Futura).
+    Si no hay meses futuros, todos.
+    """
+    hoy = pd.Timestamp.now() if hoy is None else pd.Timestamp(hoy)
+    horizonte = np.asarray(fechas >= hoy.to_period('M').start_time)
+    if not horizonte.any():
+        horizonte = np.ones(len(fechas), dtype=bool)
+    return horizonte
+
+
+def attribute_mask(matrices, dimension, valor):
+    """
+    Retorna una máscara booleana (n_sku,) con los SKUs cuyo atributo coincide con el valor.
+    dimension puede ser 'Material' o cualquier columna de matrices['atributos'].
+    'Todas' (o vacío) selecciona todos los SKUs.
+    """
+    n_sku = len(matrices['materiales'])
+    if not dimension or dimension == 'Todas':
+        return np.ones(n_sku, dtype=bool)
+
+    if dimension == 'Material':
+        columna = matrices['materiales']
+    elif dimension in matrices['atributos'].columns:
+        columna = matrices['atributos'][dimension].to_numpy()
+    else:
+        return np.zeros(n_sku, dtype=bool)
+
+    return pd.Series(columna).astype(str).str.strip().to_numpy() == str(valor).strip()
@@ -0,0 +1,143 @@
+import os
+
+import pandas as pd
+
+
+# Fracción de la memoria del contenedor disponible para leer libros (todas las cargas a la vez)
+INGEST_MEMORY_FRACTION = 0.5
+
+# Fracción que puede ocupar una sola sesión (sus cargas en curso y terminadas)
+SESSION_MEMORY_FRACTION = 0.25
+
+# Memoria por fila del formato largo: 8 bytes por columna más los textos de cada fila (material, descripción...).
+# Medido como RSS del proceso tras load_from_excel + process_data: ~280 bytes por fila con 8 columnas.
+BYTES_POR_COLUMNA = 8
+BYTES_POR_FILA = 220
+
+# Pico de la lectura en memoria respecto del resultado: el Forecast despivotado en el proceso lector,
+# su copia en el servidor, la vista previa y el merge con el inventario (medido: ~2.4 veces).
+PICO_EN_MEMORIA = 2.5
+
+# Lectura en disco: el resultado (leído del Parquet final) más un bloque de SPILL_CHUNK_ROWS filas
+# en el proceso lector, que no crece con el libro (medido: ~90 MB con bloques de 50.000 filas)
+PICO_EN_DISCO = 1.1
+MEMORIA_POR_BLOQUE = 128 << 20
+
+# Columnas del formato largo además de las de identificación (Fecha, FCST, Inv Kg-L, Despachos KL)
+COLUMNAS_CALCULADAS = 4
+
+# Bytes comprimidos por celda en un .xlsx (para estimar filas cuando el libro no declara dimensiones)
+BYTES_XLSX_POR_CELDA = 4
+
+# Modos de lectura según el presupuesto
+MODO_MEMORIA, MODO_DISCO, MODO_ESPERA, MODO_RECHAZO = 'memoria', 'disco', 'espera', 'rechazo'
+
+
+def container_memory():
+    """
+    Memoria total disponible para el proceso en bytes: límite del cgroup (contenedor) o memoria física.
+    """
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                valor = f.read().strip()
+        except OSError:
+            continue
+        # 'max' o un número enorme significan sin límite
+        if valor.isdigit() and int(valor) < 1 << 60:
+            return int(valor)
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 4 << 30
+
+
+def memory_budgets(total=None):
+    """
+    Presupuestos de memoria para la lectura de libros: {'global': bytes, 'sesion': bytes}.
+    """
+    total = total or container_memory()
+    return {'global': int(total * INGEST_MEMORY_FRACTION), 'sesion': int(total * SESSION_MEMORY_FRACTION)}
+
+
+def estimate_ingest(inspeccion, tamaño_archivo):
+    """
+    Estima el tamaño del dataset a partir de inspect_workbook: filas del formato largo,
+    bytes del resultado y picos de la lectura en memoria y en disco.
+    """
+    dimensiones = inspeccion['dimensiones']
+    tipo = 'forecast' if 'forecast' in dimensiones else 'generica'
+    filas, columnas = dimensiones.get(tipo) or (None, None)
+    if filas is None:
+        # Sin dimensiones declaradas: todas las celdas del archivo en esta hoja (cota superior)
+        columnas = max(inspeccion['columnas_fecha'] + 4, 8)
+        filas = tamaño_archivo // (BYTES_XLSX_POR_CELDA * columnas)
+
+    if tipo == 'forecast' and inspeccion['columnas_fecha']:
+        filas_largas = filas * inspeccion['columnas_fecha']
+        columnas_largas = max(columnas - inspeccion['columnas_fecha'], 1) + COLUMNAS_CALCULADAS
+    else:
+        filas_largas, columnas_largas = filas, columnas
+
+    resultado = filas_largas * (BYTES_POR_COLUMNA * columnas_largas + BYTES_POR_FILA)
+    return {
+        'archivo': tamaño_archivo,
+        'filas': filas,
+        'columnas': columnas,
+        'columnas_fecha': inspeccion['columnas_fecha'],
+        'filas_largas': filas_largas,
+        'resultado': resultado,
+        'pico_memoria': int(resultado * PICO_EN_MEMORIA),
+        'pico_disco': int(resultado * PICO_EN_DISCO) + MEMORIA_POR_BLOQUE,
+    }
+
+
+def plan_ingest(estimacion, uso_global, uso_sesion, presupuestos):
+    """
+    Modo de lectura de un libro según lo que ya ocupan las demás cargas:
+    MODO_MEMORIA si el pico en memoria cabe, MODO_DISCO si solo cabe por bloques en disco,
+    MODO_ESPERA si cabría al liberarse otras cargas y MODO_RECHAZO si no cabe nunca.
+    """
+    libre_global = presupuestos['global'] - uso_global
+    libre_sesion = presupuestos['sesion'] - uso_sesion
+    if estimacion['pico_memoria'] <= min(libre_global, libre_sesion):
+        return MODO_MEMORIA
+    if estimacion['pico_disco'] <= min(libre_global, libre_sesion):
+        return MODO_DISCO
+    if estimacion['pico_disco'] <= min(presupuestos['global'], libre_sesion):
+        # Cabe en la sesión, pero otras sesiones ocupan el presupuesto global
+        return MODO_ESPERA
+    return MODO_RECHAZO
+
+
+def format_bytes(n):
+    """
+    Tamaño legible (ej. 1536 -> '1.5 KB').
+    """
+    n = float(n)
+    for unidad in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024:
+            return f"{n:,.0f} {unidad}" if unidad == 'B' else f"{n:,.1f} {unidad}"
+        n /= 1024
+    return f"{n:,.1f} TB"
+
+
+def size_report(estimacion, presupuestos=None, uso_global=0, uso_sesion=0):
+    """
+    Tabla Concepto/Valor con el tamaño estimado del libro y el presupuesto de memoria.
+    """
+    filas = [
+        ('Tamaño del archivo', format_bytes(estimacion['archivo'])),
+        ('Filas de la hoja principal', f"{estimacion['filas']:,}"),
+        ('Columnas de mes', f"{estimacion['columnas_fecha']:,}"),
+        ('Filas del dataset (formato largo)', f"{estimacion['filas_largas']:,}"),
+        ('Memoria estimada del dataset', format_bytes(estimacion['resultado'])),
+        ('Pico estimado leyendo en memoria', format_bytes(estimacion['pico_memoria'])),
+        ('Pico estimado leyendo por bloques en disco', format_bytes(estimacion['pico_disco'])),
+    ]
+    if presupuestos is not None:
+        filas += [
+            ('Presupuesto por sesión', f"{format_bytes(presupuestos['sesion'])} ({format_bytes(uso_sesion)} en uso)"),
+            ('Presupuesto global', f"{format_bytes(presupuestos['global'])} ({format_bytes(uso_global)} en uso)"),
+        ]
+    return pd.DataFrame(filas, columns=['Concepto', 'Valor'])
@@ -0,0 +1,183 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from .scenarios import RECEIPT_COLUMNS
+from .matrices import horizon_months, inventory_snapshot
+from .timing import timed
+
+
+# Elementos (paths × SKU × mes) por lote: acota la memoria de cada lote a ~80 MB en float32
+BATCH_ELEMENTS = 20_000_000
+
+# Por debajo de este total de elementos no conviene pagar el arranque de procesos
+MIN_ELEMENTS_FOR_POOL = 50_000_000
+
+# Los errores relativos se acotan para que un mes atípico no domine la distribución
+ERROR_CLIP = (-1.0, 3.0)
+
+
+def new_simulation_pool(max_workers=None):
+    """
+    Pool de procesos para repartir las trayectorias de la simulación.
+    Se usa 'spawn' porque el servidor de Streamlit es multi-hilo y fork no es seguro ahí.
+    Quien lo crea lo cierra (ver simulate_stockout_risk) o lo comparte como recurso (ver cache.py).
+    """
+    return ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1,
+                               mp_context=multiprocessing.get_context('spawn'))
+
+
+def forecast_error_stats(fcst, desp, presente, min_obs=3):
+    """
+    Media y desviación del error relativo (Despachos / FCST - 1) por SKU.
+    Solo se usan meses con FCST y Despachos positivos. Los SKUs con menos de min_obs
+    meses válidos usan la distribución agregada de todos los SKUs.
+    Retorna (mu, sigma, n_obs), arrays de largo n_sku.
+    """
+    valido = presente & (fcst > 0) & (desp > 0)
+    ratio = np.where(valido, desp / np.where(fcst > 0, fcst, 1) - 1, 0.0)
+    ratio = np.clip(ratio, *ERROR_CLIP) * valido
+
+    n_obs = valido.sum(axis=1)
+    n_safe = np.maximum(n_obs, 1)
+    mu = ratio.sum(axis=1) / n_safe
+    var = (ratio ** 2).sum(axis=1) / n_safe - mu ** 2
+    sigma = np.sqrt(np.maximum(var, 0) * n_safe / np.maximum(n_safe - 1, 1))
+
+    total = valido.sum()
+    if total > 1:
+        mu_global = ratio.sum() / total
+        sigma_global = np.sqrt(max((ratio ** 2).sum() / total - mu_global ** 2, 0))
+    else:
+        mu_global, sigma_global = 0.0, 0.0
+
+    pocos = n_obs < min_obs
+    mu = np.where(pocos, mu_global, mu)
+    sigma = np.where(pocos, sigma_global, sigma)
+    return mu, sigma, n_obs
+
+
+def _simulate_chunk(fcst, inv0, recepciones, mu, sigma, seed, n_paths, batch_paths):
+    """
+    Simula n_paths trayectorias de demanda en lotes vectorizados (batch_paths × SKU × mes).
+    Retorna (quiebres_mes, quiebres_horizonte): conteos de trayectorias con inventario
+    proyectado negativo por SKU y mes, y por SKU en cualquier mes del horizonte.
+    """
+    rng = np.random.default_rng(seed)
+    n_sku, n_mes = fcst.shape
+    quiebres_mes = np.zeros((n_sku, n_mes), dtype=np.int64)
+    quiebres_horizonte = np.zeros(n_sku, dtype=np.int64)
+
+    fcst = fcst.astype(np.float32)
+    recepciones = recepciones.astype(np.float32)
+    mu = mu.astype(np.float32)[:, None]
+    sigma = sigma.astype(np.float32)[:, None]
+    inv0 = inv0.astype(np.float32)[:, None]
+
+    restantes = n_paths
+    while restantes > 0:
+        b = min(batch_paths, restantes)
+        # Operaciones in-place sobre el mismo buffer para no crear temporales del tamaño del lote
+        buf = rng.standard_normal((b, n_sku, n_mes), dtype=np.float32)
+        buf *= sigma
+        buf += 1 + mu
+        np.maximum(buf, 0, out=buf)
+        buf *= fcst                                 # demanda simulada
+        np.subtract(recepciones, buf, out=buf)      # flujo neto del mes
+        np.cumsum(buf, axis=2, out=buf)
+        buf += inv0                                 # inventario proyectado a fin de mes
+        quiebre = buf < 0
+        quiebres_mes += quiebre.sum(axis=0)
+        quiebres_horizonte += quiebre.any(axis=2).sum(axis=0)
+        restantes -= b
+
+    return quiebres_mes, quiebres_horizonte
+
+
+def simulate_stockout_risk(fcst, inv0, recepciones, mu, sigma, n_paths=10_000, seed=42, max_workers=None, pool=None):
+    """
+    Estima por Monte Carlo la probabilidad de quiebre de stock por SKU y mes.
+
+    La demanda de cada trayectoria es FCST × (1 + mu + sigma·z), con z normal estándar y
+    mu/sigma del error histórico de cada SKU. El inventario se proyecta desde inv0 sumando
+    recepciones y restando demanda mes a mes; hay quiebre cuando queda negativo.
+
+    Las trayectorias se reparten entre procesos cuando el volumen lo justifica: en `pool` si se entrega,
+    o en un pool que se crea y se cierra en esta llamada.
+    Retorna (prob_mes (n_sku, n_mes), prob_horizonte (n_sku,)).
+    """
+    n_sku, n_mes = fcst.shape
+    if n_sku == 0 or n_mes == 0 or n_paths <= 0:
+        return np.zeros((n_sku, n_mes)), np.zeros(n_sku)
+
+    batch_paths = max(1, BATCH_ELEMENTS // (n_sku * n_mes))
+    max_workers = max_workers or os.cpu_count() or 1
+    n_tasks = max_workers if n_paths * n_sku * n_mes >= MIN_ELEMENTS_FOR_POOL else 1
+
+    # Semillas independientes por tarea para que los procesos no repitan trayectorias
+    seeds = np.random.SeedSequence(seed).spawn(n_tasks)
+    paths_por_tarea = [n_paths // n_tasks + (1 if i < n_paths % n_tasks else 0) for i in range(n_tasks)]
+    args = [(fcst, inv0, recepciones, mu, sigma, s, p, batch_paths) for s, p in zip(seeds, paths_por_tarea) if p > 0]
+
+    if len(args) == 1:
+        resultados = [_simulate_chunk(*args[0])]
+    elif pool is not None:
+        resultados = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        with new_simulation_pool(max_workers) as pool:
+            resultados = list(pool.map(_simulate_chunk, *zip(*args)))
+
+    quiebres_mes = sum(r[0] for r in resultados)
+    quiebres_horizonte = sum(r[1] for r in resultados)
+    return quiebres_mes / n_paths, quiebres_horizonte / n_paths
+
+
+@timed()
+def stockout_risk_from_matrices(matrices, n_paths=10_000, seed=42, pool=None, hoy=None):
+    """
+    Prepara los insumos de simulate_stockout_risk desde las matrices SKU × mes y
+    retorna un diccionario con las probabilidades y una tabla resumen por SKU.
+    El error de forecast sale de toda la historia; el inventario actual se proyecta desde
+    el mes en curso (si no hay meses futuros, sobre todos los meses). 'fechas' son los meses simulados.
+    """
+    valores = matrices['valores']
+    if 'FCST' not in valores or 'Inv Kg-L' not in valores:
+        return None
+
+    fcst = valores['FCST']
+    presente = matrices['presente']
+    desp = valores.get('Despachos KL', np.zeros_like(fcst))
+    recepciones = next((valores[c] for c in RECEIPT_COLUMNS if c in valores), np.zeros_like(fcst))
+
+    horizonte = horizon_months(matrices['fechas'], hoy)
+    fechas = matrices['fechas'][horizonte]
+
+    inv0 = inventory_snapshot(matrices)
+
+    mu, sigma, n_obs = forecast_error_stats(fcst, desp, presente)
+    prob_mes, prob_horizonte = simulate_stockout_risk(
+        np.where(presente, fcst, 0)[:, horizonte], inv0, recepciones[:, horizonte], mu, sigma,
+        n_paths=n_paths, seed=seed, pool=pool
+    )
+
+    tabla = matrices['atributos'].reset_index()
+    tabla['Inv Inicial'] = inv0
+    tabla['Error Medio %'] = (mu * 100).round(1)
+    tabla['Desv. Error %'] = (sigma * 100).round(1)
+    tabla['Meses Historia'] = n_obs
+    tabla['Prob. Quiebre %'] = (prob_horizonte * 100).round(1)
+    tabla['Primer Mes Riesgo > 50%'] = pd.Series(fechas[(prob_mes > 0.5).argmax(axis=1)]).where(
+        (prob_mes > 0.5).any(axis=1)
+    )
+    tabla = tabla.sort_values('Prob. Quiebre %', ascending=False)
+
+    return {
+        'fechas': fechas,
+        'prob_mes': prob_mes,
+        'prob_horizonte': prob_horizonte,
+        'tabla': tabla,
+        'sin_historia': bool((desp > 0).sum() == 0),
+    }
@@ -0,0 +1,362 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from .data_loader import AVISO_ERROR, DATA_DIR, find_local_workbook, load_from_excel, process_data
+from .matrices import build_sku_month_matrices, dataset_fingerprint
+from .montecarlo import stockout_risk_from_matrices
+from .baseline import baseline_forecasts
+from .tracking import tracking_signal_from_matrices
+from .safety_stock import DEFAULT_SERVICE_LEVEL, safety_stock_table
+from .segmentation import abc_xyz_table, add_segment_columns
+from .hierarchy import hierarchical_rollup
+from .granularity import monthly_aggregates
+from .ranking import material_aggregates
+from .search import build_material_index
+from .replenishment import default_origin_parameters
+from .reports import monthly_cells
+from .filters import default_dates, filter_dataset, future_rows
+from .timing import cache_event
+
+
+# Carpeta de los agregados precalculados (ver precalcular.py); el dashboard los lee antes de calcular
+PRECOMPUTE_DIR = DATA_DIR / "precalculado"
+
+MANIFEST_NAME = "manifiesto.json"
+
+# Cambia cuando cambia el contenido de algún agregado: invalida los precálculos anteriores
+PRECOMPUTE_FORMAT = 1
+
+# Trayectorias de Monte Carlo precalculadas (valor por defecto de la página de Riesgo de Quiebre)
+DEFAULT_N_PATHS = 10_000
+
+# Estado del trabajador de vigilar_datos.py (latido, libro en proceso, último resultado)
+WORKER_STATUS_NAME = "trabajador.json"
+
+# Cada cuánto revisa el trabajador la carpeta data; sin latido por 3 intervalos se lo da por detenido
+WATCH_INTERVAL_SECONDS = 30
+WORKER_STALE_INTERVALS = 3
+
+# Segundos sin cambios de tamaño ni fecha antes de leer un libro (no leer un archivo a medio copiar)
+SETTLE_SECONDS = 5
+
+
+def workbook_version(path):
+    """
+    Versión de un libro sin leerlo: [ruta, tamaño, fecha de modificación en ns] (None si no hay libro).
+    Es la clave con la que las sesiones fijan el dataset que están usando.
+    """
+    if path is None:
+        return None
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return [str(path), info.st_size, info.st_mtime_ns]
+
+
+def workbook_key(path, bloque=1 << 20):
+    """
+    Huella del contenido de un libro (no de su nombre ni fecha): identifica su dataset precalculado.
+    """
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for parte in iter(lambda: f.read(bloque), b''):
+            sha.update(parte)
+    return sha.hexdigest()[:16]
+
+
+def entry_path(nombre, claves, directorio=PRECOMPUTE_DIR):
+    """
+    Archivo de un agregado: nombre de la función y hash de sus claves (huella del dataset y parámetros).
+    """
+    texto = json.dumps([PRECOMPUTE_FORMAT, nombre, *claves], default=str)
+    return Path(directorio) / f"{nombre}-{hashlib.sha1(texto.encode()).hexdigest()[:20]}.pkl"
+
+
+def save_entry(nombre, claves, valor, directorio=PRECOMPUTE_DIR):
+    """
+    Guarda un agregado (renombrado atómico: el dashboard nunca lee un archivo a medio escribir).
+    Retorna la ruta.
+    """
+    path = entry_path(nombre, claves, directorio)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, path)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return path
+
+
+def read_or_compute(nombre, claves, calcular, directorio=PRECOMPUTE_DIR):
+    """
+    Agregado precalculado si existe; si no (o no se puede leer), calcular().
+    """
+    path = entry_path(nombre, claves, directorio)
+    if path.exists():
+        try:
+            with open(path, 'rb') as f:
+                valor = pickle.load(f)
+            cache_event(f"precalculo.{nombre}", True)
+            return valor
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Precálculo dañado o de otra versión del código: se recalcula
+            pass
+    cache_event(f"precalculo.{nombre}", False)
+    return calcular()
+
+
+def _write_json(path, valor):
+    """
+    Escribe un JSON con renombrado atómico (lo leen las sesiones mientras el trabajador escribe).
+    """
+    descriptor, temporal = tempfile.mkstemp(dir=Path(path).parent, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            json.dump(valor, f, ensure_ascii=False, indent=2)
+        os.replace(temporal, path)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def _prune(directorio, manifiesto):
+    """
+    Elimina los agregados que no son del precálculo vigente ni del anterior
+    (las sesiones abiertas con la versión anterior del libro la siguen leyendo).
+    """
+    conservar = {e['archivo'] for m in (manifiesto, manifiesto.get('anterior') or {}) for e in m.get('entradas', [])}
+    for path in Path(directorio).glob('*.pkl'):
+        if path.name not in conservar:
+            path.unlink(missing_ok=True)
+
+
+def precompute_workbook(path, directorio=PRECOMPUTE_DIR, n_paths=DEFAULT_N_PATHS, avisos=None, progreso=None):
+    """
+    Lee un libro y guarda en 'directorio' el dataset leído y los agregados que el dashboard
+    calcula al abrirse con los filtros por defecto (últimos meses, todas las clases y orígenes):
+    índice de materiales, ABC/XYZ, matrices SKU × mes, stock de seguridad, baselines, señal de rastreo,
+    agregados mensuales y por material, roll-up jerárquico, riesgo de quiebre y el cubo de la API.
+    Las claves son las mismas que usan utils/cache.py y utils/api.py, así que cualquier vista que coincida se lee sin calcular.
+    progreso(nombre, segundos) se llama después de cada agregado. Retorna el manifiesto (también en manifiesto.json),
+    o None si el libro no se pudo leer.
+    El manifiesto se escribe al final: hasta entonces las sesiones siguen con el precálculo anterior,
+    que se conserva junto al nuevo (ver _prune).
+    """
+    inicio = time.perf_counter()
+    entradas = []
+
+    def guardar(nombre, claves, calcular):
+        t = time.perf_counter()
+        valor = calcular()
+        save_entry(nombre, claves, valor, directorio)
+        segundos = time.perf_counter() - t
+        entradas.append({'nombre': nombre, 'claves': [str(c) for c in claves], 'segundos': round(segundos, 3),
+                         'archivo': entry_path(nombre, claves, directorio).name})
+        if progreso is not None:
+            progreso(nombre, segundos)
+        return valor
+
+    version = workbook_version(path)
+    clave_libro = workbook_key(path)
+    raw = load_from_excel(path, avisos=avisos)
+    if raw is None or raw.empty:
+        return None
+    Path(directorio).mkdir(parents=True, exist_ok=True)
+    guardar('dataset', (clave_libro,), lambda: raw)
+
+    # Dataset completo (índice de búsqueda, segmentación y umbrales por SKU)
+    df = process_data(raw)
+    huella = dataset_fingerprint(df)
+    guardar('material_index', (huella,), lambda: build_material_index(df))
+    matrices = guardar('matrices', (huella,), lambda: build_sku_month_matrices(df))
+    # Parámetros por Origen por defecto, tal como los inicializa app.py para el editor de Reposición
+    parametros_json = None
+    if 'Origen' in df.columns and df['Origen'].notna().any():
+        parametros_json = default_origin_parameters(sorted(df['Origen'].dropna().unique())).to_json(orient='records')
+    parametros = pd.DataFrame(json.loads(parametros_json)) if parametros_json else None
+    if matrices is None:
+        segmentos = {'FCST': None}
+    else:
+        segmentos = {base: guardar('abc_xyz', (huella, base), lambda: abc_xyz_table(matrices, base))
+                     for base in ('FCST', 'Inventario')}
+        guardar('safety_stock', (huella, DEFAULT_SERVICE_LEVEL, parametros_json),
+                lambda: safety_stock_table(matrices, DEFAULT_SERVICE_LEVEL, parametros))
+
+    # Historia segmentada (WAPE: matrices, baselines y señal de rastreo)
+    df = add_segment_columns(df, segmentos['FCST'])
+    huella_historia = dataset_fingerprint(df)
+    matrices_historia = guardar('matrices', (huella_historia,), lambda: build_sku_month_matrices(df))
+    if matrices_historia is not None:
+        # Reposición y riesgo de quiebre: stock de seguridad y simulación sobre la historia completa
+        guardar('safety_stock', (huella_historia, DEFAULT_SERVICE_LEVEL, parametros_json),
+                lambda: safety_stock_table(matrices_historia, DEFAULT_SERVICE_LEVEL, parametros))
+        guardar('stockout_risk', (huella_historia, n_paths, 42),
+                lambda: stockout_risk_from_matrices(matrices_historia, n_paths=n_paths, seed=42))
+    if matrices_historia is not None and 'Despachos KL' in matrices_historia['valores']:
+        guardar('baselines', (huella_historia,), lambda: baseline_forecasts(matrices_historia['valores']['Despachos KL']))
+        if 'FCST' in matrices_historia['valores']:
+            guardar('tracking', (huella_historia,), lambda: tracking_signal_from_matrices(matrices_historia))
+    # Cubo mensual Origen × estado de cobertura y jerarquía del libro completo (API de indicadores, ver servir_api.py)
+    guardar('monthly_cells', (huella_historia, 'Origen'), lambda: monthly_cells(df, 'Origen'))
+    guardar('rollup', (huella_historia,), lambda: hierarchical_rollup(df))
+
+    # Vista por defecto (últimos meses) y su proyección futura
+    df_vista = filter_dataset(df, fechas=default_dates(df)[1])
+    df_futuro, _ = future_rows(df_vista)
+    for vista in (df_vista, df_futuro):
+        huella_vista = dataset_fingerprint(vista)
+        guardar('monthly_aggregates', (huella_vista,), lambda: monthly_aggregates(vista))
+        guardar('material_aggregates', (huella_vista, 'FCST', 'Despachos KL'),
+                lambda: material_aggregates(vista, 'FCST', 'Despachos KL'))
+    huella_vista = dataset_fingerprint(df_vista)
+    guardar('rollup', (huella_vista,), lambda: hierarchical_rollup(df_vista))
+
+    anterior = read_manifest(directorio)
+    if anterior is not None:
+        anterior.pop('anterior', None)
+        if anterior.get('clave_libro') == clave_libro:
+            anterior = None
+    manifiesto = {
+        'archivo': Path(path).name,
+        'version': version,
+        'clave_libro': clave_libro,
+        'huella': huella,
+        'filas': len(raw),
+        'creado': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'entradas': entradas,
+        'anterior': anterior,
+    }
+    _write_json(Path(directorio) / MANIFEST_NAME, manifiesto)
+    _prune(directorio, manifiesto)
+    return manifiesto
+
+
+def read_manifest(directorio=PRECOMPUTE_DIR):
+    """
+    Manifiesto del último precálculo (None si no hay).
+    """
+    try:
+        with open(Path(directorio) / MANIFEST_NAME, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def published_key(version, directorio=PRECOMPUTE_DIR):
+    """
+    Clave del dataset precalculado de una versión del libro (vigente o anterior); None si no está precalculada.
+    """
+    manifiesto = read_manifest(directorio) or {}
+    for m in (manifiesto, manifiesto.get('anterior') or {}):
+        if version is not None and m.get('version') == list(version):
+            return m.get('clave_libro')
+    return None
+
+
+def write_worker_status(directorio=PRECOMPUTE_DIR, **estado):
+    """
+    Latido del trabajador: estado ('esperando', 'procesando', 'listo', 'error'), versión del libro e intervalo.
+    """
+    Path(directorio).mkdir(parents=True, exist_ok=True)
+    _write_json(Path(directorio) / WORKER_STATUS_NAME, dict(estado, latido=time.time()))
+
+
+def read_worker_status(directorio=PRECOMPUTE_DIR):
+    """
+    Último estado del trabajador, o None si no hay uno activo (sin latido reciente).
+    """
+    try:
+        with open(Path(directorio) / WORKER_STATUS_NAME, encoding='utf-8') as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    intervalo = estado.get('intervalo', WATCH_INTERVAL_SECONDS)
+    if time.time() - estado.get('latido', 0) > WORKER_STALE_INTERVALS * intervalo:
+        return None
+    return estado
+
+
+def is_version_ready(version, directorio=PRECOMPUTE_DIR):
+    """
+    True si las sesiones pueden pasar a esta versión del libro: ya está precalculada, o no hay un
+    trabajador activo que la vaya a precalcular, o el trabajador no pudo leerla (se lee como siempre).
+    """
+    if version is None or published_key(version, directorio) is not None:
+        return True
+    estado = read_worker_status(directorio)
+    if estado is None:
+        return True
+    return estado.get('version') == list(version) and estado.get('estado') == 'error'
+
+
+def watch_data(directorio=PRECOMPUTE_DIR, intervalo=WATCH_INTERVAL_SECONDS, n_paths=DEFAULT_N_PATHS,
+               registro=None, una_vez=False):
+    """
+    Trabajador de precálculo: revisa la carpeta data cada 'intervalo' segundos y, cuando el libro
+    que carga el dashboard es nuevo o cambió, lo precalcula (precompute_workbook). Un libro con el
+    mismo contenido (ej. copiado de nuevo) solo actualiza la versión del manifiesto.
+    registro(mensaje) recibe el avance. una_vez: revisa una sola vez y retorna.
+    """
+    registro = registro or (lambda mensaje: None)
+
+    def latido(estado, version=None, **extra):
+        write_worker_status(directorio, estado=estado, version=version, intervalo=intervalo, pid=os.getpid(), **extra)
+
+    while True:
+        version = workbook_version(find_local_workbook())
+        manifiesto = read_manifest(directorio) or {}
+        estado = read_worker_status(directorio) or {}
+        ya_fallo = estado.get('estado') == 'error' and estado.get('version') == version
+
+        if version is None or manifiesto.get('version') == version or ya_fallo:
+            latido(estado.get('estado', 'esperando') if ya_fallo else 'esperando', version)
+        elif time.time() - version[2] / 1e9 < SETTLE_SECONDS:
+            # Recién modificado: puede estar copiándose todavía
+            latido('esperando', version)
+        else:
+            path = Path(version[0])
+            if manifiesto.get('clave_libro') == workbook_key(path):
+                manifiesto['version'] = version
+                _write_json(Path(directorio) / MANIFEST_NAME, manifiesto)
+                registro(f"{path.name}: mismo contenido, versión actualizada")
+                latido('listo', version)
+            else:
+                registro(f"{path.name}: precalculando...")
+                latido('procesando', version)
+                avisos = []
+                try:
+                    nuevo = precompute_workbook(
+                        path, directorio, n_paths, avisos,
+                        progreso=lambda nombre, segundos: latido('procesando', version, agregado=nombre)
+                    )
+                except Exception as e:
+                    nuevo = None
+                    avisos.append({'nivel': AVISO_ERROR, 'mensaje': f"{type(e).__name__}: {e}"})
+                if nuevo is None or workbook_version(path) != version:
+                    errores = [a['mensaje'] for a in avisos if a['nivel'] == AVISO_ERROR]
+                    if nuevo is None:
+                        registro(f"{path.name}: no se pudo precalcular. {' '.join(errores)}")
+                        latido('error', version, error=' '.join(errores))
+                    else:
+                        # El libro cambió mientras se leía: se vuelve a precalcular en la próxima revisión
+                        latido('esperando', version)
+                else:
+                    registro(f"{path.name}: {nuevo['filas']:,} filas, {len(nuevo['entradas'])} agregados "
+                             f"en {nuevo['segundos']:.1f} s")
+                    latido('listo', version)
+
+        if una_vez:
+            return read_worker_status(directorio)
+        time.sleep(intervalo)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from .timing import timed
+
+
+# Regla de agregación por material: los flujos se suman en el horizonte, el inventario es una foto
+# por SKU repetida en cada mes (se toma el máximo) y la cobertura se promedia
+STOCK_COLUMNS = ['Inv Kg-L', 'Inv (M/Usd)', 'Inv (MKL)', 'Inventario']
+MEAN_COLUMNS = ['Cob(D)', 'Cob (D)', 'Cobertura']
+FLOW_COLUMNS = ['FCST', 'Despachos KL', 'Prod Kg-L', 'Q']
+
+RANKING_ATTRIBUTES = ['Origen', 'Descripción']
+
+
+@timed()
+def material_aggregates(df, fcst_col='FCST', desp_col='Despachos KL'):
+    """
+    Agrega el formato largo a una fila por Material en una sola pasada (factorize + bincount).
+    Incluye las métricas numéricas conocidas, el WAPE por SKU y los atributos descriptivos
+    (primer valor de cada material). Retorna un DataFrame con columna Material.
+    """
+    if df is None or df.empty or 'Material' not in df.columns:
+        return pd.DataFrame()
+
+    codigos, materiales = pd.factorize(df['Material'], sort=True)
+    valido = codigos >= 0
+    codigos = codigos[valido]
+    n = len(materiales)
+
+    agregados = pd.DataFrame({'Material': np.asarray(materiales)})
+
+    # Primera fila de cada material (return_index entrega la primera aparición de cada código)
+    _, primero = np.unique(codigos, return_index=True)
+    for col in RANKING_ATTRIBUTES:
+        if col in df.columns:
+            agregados[col] = df[col].to_numpy()[valido][primero]
+
+    conteo = np.bincount(codigos, minlength=n)
+    columnas = [c for c in FLOW_COLUMNS + STOCK_COLUMNS + MEAN_COLUMNS + [fcst_col, desp_col] if c in df.columns]
+    for col in dict.fromkeys(columnas):
+        valores = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)[valido]
+        if col in STOCK_COLUMNS:
+            maximo = np.full(n, -np.inf)
+            np.maximum.at(maximo, codigos, np.nan_to_num(valores, nan=-np.inf))
+            agregados[col] = np.where(np.isfinite(maximo), maximo, np.nan)
+        elif col in MEAN_COLUMNS:
+            no_nulo = ~np.isnan(valores)
+            suma = np.bincount(codigos[no_nulo], weights=valores[no_nulo], minlength=n)
+            n_validos = np.bincount(codigos[no_nulo], minlength=n)
+            agregados[col] = np.where(n_validos > 0, suma / np.maximum(n_validos, 1), np.nan)
+        else:
+            agregados[col] = np.bincount(codigos, weights=np.nan_to_num(valores), minlength=n)
+
+    if fcst_col in agregados.columns and desp_col in agregados.columns:
+        fcst = agregados[fcst_col].to_numpy()
+        desp = agregados[desp_col].to_numpy()
+        dif = np.abs(desp - fcst)
+        agregados['Wape (%)'] = np.where(desp != 0, dif / np.where(desp != 0, desp, 1) * 100, 0)
+        agregados['Dif Wape Abs(MKL)'] = dif
+
+    agregados['N° Meses'] = conteo
+    return agregados
+
+
+def top_k_positions(valores, k, largest=True):
+    """
+    Posiciones de los k mayores (o menores) valores, ordenadas. Usa np.argpartition (O(n))
+    y solo ordena los k elegidos. Los NaN se excluyen.
+    """
+    valores = np.asarray(valores, dtype=float)
+    candidatos = np.flatnonzero(~np.isnan(valores))
+    if len(candidatos) == 0 or k <= 0:
+        return np.array([], dtype=int)
+
+    claves = -valores[candidatos] if largest else valores[candidatos]
+    if k < len(candidatos):
+        elegidos = np.argpartition(claves, k - 1)[:k]
+    else:
+        elegidos = np.arange(len(candidatos))
+    elegidos = elegidos[np.argsort(claves[elegidos], kind='stable')]
+    return candidatos[elegidos]
+
+
+@timed()
+def rank_materials(agregados, metricas, k=15, columnas=None):
+    """
+    Rankings top-k y bottom-k de varias métricas a la vez sobre la tabla por material.
+
+    metricas: lista de columnas de agregados a rankear.
+    columnas: columnas a mostrar en cada ranking (por defecto Material, la métrica y los atributos).
+
+    Retorna {métrica: {'mayores': DataFrame, 'menores': DataFrame}}.
+    """
+    rankings = {}
+    if agregados is None or agregados.empty:
+        return rankings
+
+    for metrica in metricas:
+        if metrica not in agregados.columns:
+            continue
+        mostrar = columnas or ['Material', metrica] + [c for c in RANKING_ATTRIBUTES if c in agregados.columns]
+        mostrar = [c for c in dict.fromkeys(mostrar) if c in agregados.columns]
+        valores = agregados[metrica].to_numpy()
+        rankings[metrica] = {
+            'mayores': agregados.iloc[top_k_positions(valores, k, largest=True)][mostrar].reset_index(drop=True),
+            'menores': agregados.iloc[top_k_positions(valores, k, largest=False)][mostrar].reset_index(drop=True),
+        }
+    return rankings
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from .calculations import calculate_cobertura_array
+from .scenarios import RECEIPT_COLUMNS, project_inventory
+from .matrices import horizon_months, inventory_snapshot
+from .timing import timed
+
+
+# Parámetros por defecto cuando un Origen no tiene configuración propia
+DEFAULT_LEAD_TIME_DIAS = 60
+DEFAULT_MULTIPLO = 1.0
+
+
+def default_origin_parameters(origenes):
+    """
+    Tabla editable de parámetros de reposición por Origen (lead time en días y múltiplo de pedido).
+    """
+    return pd.DataFrame({
+        'Origen': list(origenes),
+        'Lead Time (días)': DEFAULT_LEAD_TIME_DIAS,
+        'Múltiplo Pedido': DEFAULT_MULTIPLO,
+    })
+
+
+def origin_parameters(origenes, previos=None):
+    """
+    Parámetros por Origen para los orígenes del dataset: conserva los valores de `previos`
+    (ej. los editados en la página Reposición) y usa los valores por defecto para los demás.
+    """
+    parametros = default_origin_parameters(origenes)
+    if previos is None or previos.empty or 'Origen' not in previos.columns:
+        return parametros
+    editados = previos.drop_duplicates('Origen').set_index('Origen').reindex(parametros['Origen'])
+    for columna in parametros.columns.drop('Origen'):
+        if columna in editados.columns:
+            valores = pd.to_numeric(editados[columna], errors='coerce').to_numpy(dtype=float)
+            parametros[columna] = np.where(np.isnan(valores), parametros[columna], valores).astype(parametros[columna].dtype)
+    return parametros
+
+
+def origin_parameter(matrices, parametros, columna, default):
+    """Valor de un parámetro por SKU según su Origen (default si el Origen no está configurado)."""
+    n_sku = len(matrices['materiales'])
+    if parametros is None or parametros.empty or 'Origen' not in matrices['atributos'].columns:
+        return np.full(n_sku, float(default))
+    mapa = pd.to_numeric(parametros.set_index('Origen')[columna], errors='coerce')
+    mapa = mapa[~mapa.index.duplicated()]
+    return mapa.reindex(matrices['atributos']['Origen'].to_numpy()).fillna(default).to_numpy(dtype=float)
+
+
+@timed()
+def suggest_orders(matrices, parametros_origen=None, cobertura_objetivo=90, umbral_reorden=45, hoy=None):
+    """
+    Calcula en una sola pasada vectorizada la cantidad y fecha límite de pedido de cada SKU.
+
+    - El inventario se proyecta desde el mes en curso con FCST y recepciones planificadas.
+    - El mes de necesidad es el primero en que la cobertura proyectada cae bajo umbral_reorden.
+    - La cantidad lleva la cobertura de ese mes a cobertura_objetivo, redondeada hacia arriba
+      al múltiplo de pedido del Origen.
+    - La fecha límite es el inicio del mes de necesidad menos el lead time del Origen.
+
+    cobertura_objetivo y umbral_reorden aceptan un escalar o un array por SKU (n_sku,).
+    Retorna un DataFrame con una fila por SKU que requiere pedido.
+    """
+    valores = matrices['valores']
+    if 'FCST' not in valores or 'Inv Kg-L' not in valores or len(matrices['fechas']) == 0:
+        return pd.DataFrame()
+
+    hoy = pd.Timestamp.now().normalize() if hoy is None else pd.Timestamp(hoy)
+    fechas = matrices['fechas']
+
+    horizonte = horizon_months(fechas, hoy)
+
+    presente = matrices['presente']
+    fcst = np.where(presente, valores['FCST'], 0)[:, horizonte]
+    receipt_col = next((c for c in RECEIPT_COLUMNS if c in valores), None)
+    recepciones = valores[receipt_col][:, horizonte] if receipt_col else np.zeros_like(fcst)
+    fechas_h = fechas[horizonte]
+
+    inv0 = inventory_snapshot(matrices)
+
+    inv_inicio = project_inventory(fcst, inv0, recepciones)
+    cobertura = calculate_cobertura_array(inv_inicio, fcst)
+
+    objetivo = np.broadcast_to(np.asarray(cobertura_objetivo, dtype=float), (len(inv0),))
+    reorden = np.broadcast_to(np.asarray(umbral_reorden, dtype=float), (len(inv0),))
+
+    bajo_umbral = (cobertura < reorden[:, None]) & presente[:, horizonte]
+    necesita = bajo_umbral.any(axis=1)
+    mes_idx = bajo_umbral.argmax(axis=1)
+    filas = np.arange(len(inv0))
+
+    fcst_mes = fcst[filas, mes_idx]
+    inv_mes = inv_inicio[filas, mes_idx]
+    cantidad = np.maximum(fcst_mes * objetivo / 30 - inv_mes, 0)
+
+    multiplo = origin_parameter(matrices, parametros_origen, 'Múltiplo Pedido', DEFAULT_MULTIPLO)
+    multiplo = np.where(multiplo > 0, multiplo, 1)
+    cantidad = np.ceil(cantidad / multiplo) * multiplo
+
+    lead_time = origin_parameter(matrices, parametros_origen, 'Lead Time (días)', DEFAULT_LEAD_TIME_DIAS)
+    mes_necesidad = fechas_h.to_numpy()[mes_idx]
+    fecha_limite = mes_necesidad - lead_time.astype('timedelta64[D]')
+
+    tabla = matrices['atributos'].reset_index()
+    tabla['Mes Necesidad'] = mes_necesidad
+    tabla['Inv Proyectado'] = inv_mes
+    tabla['FCST Mes'] = fcst_mes
+    tabla['Cob. Proyectada (D)'] = cobertura[filas, mes_idx]
+    tabla['Cob. Objetivo (D)'] = objetivo
+    tabla['Cantidad Sugerida'] = cantidad
+    tabla['Múltiplo'] = multiplo
+    tabla['Lead Time (días)'] = lead_time
+    tabla['Fecha Límite Pedido'] = fecha_limite
+    tabla['Estado Pedido'] = np.where(
+        fecha_limite < np.datetime64(hoy), 'Atrasado',
+        np.where(fecha_limite < np.datetime64(hoy + pd.Timedelta(days=30)), 'Pedir este mes', 'Planificado')
+    )
+
+    numericas = tabla.select_dtypes('number').columns
+    tabla[numericas] = tabla[numericas].round(1)
+
+    tabla = tabla[necesita & (cantidad > 0)]
+    return tabla.sort_values(['Fecha Límite Pedido', 'Material']).reset_index(drop=True)
+
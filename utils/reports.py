@@ -0,0 +1,411 @@
+import os
+import html
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from .calculations import ESTADOS_COBERTURA, calculate_estado_stats, calculate_distribucion_origen
+from .granularity import monthly_aggregates, rebucket, estados_por_periodo
+from .ranking import material_aggregates, rank_materials
+from .exports import safe_name
+
+
+# Páginas incluidas en cada reporte (mismo orden que en el dashboard)
+REPORT_PAGES = ['Principal', 'Estado de Coberturas', 'Evolución Futura', 'WAPE']
+
+REPORT_FORMATS = ('html', 'pdf')
+
+# Columnas que necesitan los workers (se envían una sola vez por proceso)
+REPORT_COLUMNS = ['Material', 'Descripción', 'Origen', 'Segmento', 'Fecha', 'FCST', 'Despachos KL',
+                  'Inv Kg-L', 'Inv (M/Usd)', 'Cob(D)', 'Estado_Cobertura', 'ABC', 'XYZ', 'ABC-XYZ']
+
+# Columnas sumables de los agregados mensuales (Dif_Abs se recalcula después de sumar)
+_CELL_SUM_COLUMNS = ['FCST', 'Despachos KL', 'Inv Kg-L', 'Cob_Sum', 'Cob_N'] + ESTADOS_COBERTURA + ['Sin Dato']
+
+# Tamaño de página de los PDF (px a 96 dpi, A4 apaisado aprox.)
+PAGE_WIDTH = 1400
+PAGE_HEIGHT = 990
+
+COLORES_ESTADO = {'Cob < 45': '#EF5350', 'Cob < 90': '#FFA726', 'Cob > 90': '#66BB6A', 'Sin Dato': '#B0BEC5'}
+
+# Estado de cada worker: dataset y agregados compartidos, recibidos una vez en el initializer
+_worker_state = {}
+
+
+def pdf_available():
+    """
+    La exportación estática (PDF) requiere kaleido; sin él solo se generan reportes HTML.
+    """
+    return importlib.util.find_spec('kaleido') is not None
+
+
+def report_combinations(df, group_col='Origen'):
+    """
+    Combinaciones (grupo, estado) a reportar: 'Todas' más cada valor de group_col,
+    por 'Todas' más cada estado de cobertura.
+    """
+    grupos = ['Todas']
+    if group_col in df.columns:
+        grupos += sorted(df[group_col].dropna().astype(str).unique())
+    return [(grupo, estado) for grupo in grupos for estado in ['Todas'] + ESTADOS_COBERTURA]
+
+
+def monthly_cells(df, group_col='Origen'):
+    """
+    Agregados mensuales por celda (grupo × estado de cobertura), calculados una sola vez.
+    Los agregados de cualquier combinación se obtienen sumando sus celdas (ver combine_cells).
+    """
+    claves = [c for c in (group_col, 'Estado_Cobertura') if c in df.columns]
+    if not claves:
+        return monthly_aggregates(df)
+
+    partes = []
+    for llave, grupo in df.groupby(claves, observed=True, dropna=False, sort=False):
+        mensual = monthly_aggregates(grupo)
+        if mensual.empty:
+            continue
+        for col, valor in zip(claves, llave if isinstance(llave, tuple) else (llave,)):
+            mensual[col] = valor
+        partes.append(mensual)
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+
+def combine_cells(celdas, grupo='Todas', estado='Todas', group_col='Origen', desde=None):
+    """
+    Agregados mensuales de una combinación a partir de las celdas (mismo formato que monthly_aggregates).
+    desde: fecha de corte opcional (solo meses que empiezan en o después de esa fecha).
+    """
+    if celdas is None or celdas.empty:
+        return pd.DataFrame()
+
+    mascara = np.ones(len(celdas), dtype=bool)
+    if grupo != 'Todas' and group_col in celdas.columns:
+        mascara &= (celdas[group_col].astype(str) == grupo).to_numpy()
+    if estado != 'Todas' and 'Estado_Cobertura' in celdas.columns:
+        mascara &= (celdas['Estado_Cobertura'] == estado).to_numpy()
+    if desde is not None:
+        mascara &= pd.to_datetime(celdas['Codigo'].to_numpy().astype('datetime64[M]')) >= desde
+    seleccion = celdas[mascara]
+    if seleccion.empty:
+        return pd.DataFrame()
+
+    mensual = seleccion.groupby('Codigo', as_index=False)[_CELL_SUM_COLUMNS].sum()
+    mensual['Dif_Abs'] = np.abs(mensual['Despachos KL'] - mensual['FCST'])
+    mensual['N_Meses'] = 1
+    return mensual
+
+
+def filter_combination(df, grupo='Todas', estado='Todas', group_col='Origen'):
+    """
+    Filas del dataset para una combinación (mismos filtros que Origen y Estado Cob(D) del dashboard).
+    """
+    mascara = np.ones(len(df), dtype=bool)
+    if grupo != 'Todas' and group_col in df.columns:
+        mascara &= (df[group_col].astype(str) == grupo).to_numpy()
+    if estado != 'Todas' and 'Estado_Cobertura' in df.columns:
+        mascara &= (df['Estado_Cobertura'] == estado).to_numpy()
+    return df[mascara]
+
+
+def _table(tabla, decimales=1):
+    """
+    go.Table a partir de un DataFrame (números redondeados).
+    """
+    import plotly.graph_objects as go
+
+    tabla = tabla.copy()
+    for col in tabla.columns:
+        if pd.api.types.is_float_dtype(tabla[col]):
+            tabla[col] = tabla[col].round(decimales)
+    return go.Table(
+        header=dict(values=[f"<b>{c}</b>" for c in tabla.columns], fill_color='#2E7D32', font=dict(color='white', size=11)),
+        cells=dict(values=[tabla[c].astype(str).tolist() for c in tabla.columns], font=dict(size=10), height=22)
+    )
+
+
+def _layout(fig, titulo):
+    """
+    Formato común de las páginas del reporte.
+    """
+    fig.update_layout(
+        title=dict(text=titulo, x=0.01, font=dict(size=20, color='#2E7D32')),
+        width=PAGE_WIDTH, height=PAGE_HEIGHT,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=50, r=50, t=110, b=40),
+        barmode='group'
+    )
+    return fig
+
+
+def figure_principal(periodos, stats, titulo):
+    """
+    Página Principal: SKUs por estado, estados por período y evolutivo de cobertura.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(
+        rows=2, cols=2, column_widths=[0.35, 0.65], row_heights=[0.45, 0.55], vertical_spacing=0.12,
+        specs=[[{'type': 'table'}, {'type': 'xy'}], [{'type': 'xy', 'colspan': 2, 'secondary_y': True}, None]],
+        subplot_titles=('Material por Estado', 'Material por Estado (%)', 'Evolutivo Cobertura')
+    )
+    if not stats.empty:
+        fig.add_trace(_table(stats[['Estado', 'Cantidad_SKU', 'Porcentaje_SKU']]), row=1, col=1)
+    if not periodos.empty:
+        largo = estados_por_periodo(periodos)
+        for estado, datos in largo.groupby('Estado_Cobertura', sort=False):
+            fig.add_trace(go.Bar(x=datos['Periodo'], y=datos['Porcentaje'], name=estado, offsetgroup='estado',
+                                 marker_color=COLORES_ESTADO.get(estado), showlegend=False), row=1, col=2)
+        fig.add_trace(go.Bar(x=periodos['Periodo'], y=periodos['Despachos KL'], name='Despachos KL', offsetgroup='despachos',
+                             marker_color='#FF6B9D'), row=2, col=1)
+        fig.add_trace(go.Bar(x=periodos['Periodo'], y=periodos['FCST'], name='FCST Act', offsetgroup='fcst',
+                             marker_color='#4A90E2'), row=2, col=1)
+        fig.add_trace(go.Scatter(x=periodos['Periodo'], y=periodos['Inv Kg-L'], name='Inventario', mode='lines+markers',
+                                 line=dict(color='#FFA726', width=3)), row=2, col=1)
+        fig.add_trace(go.Scatter(x=periodos['Periodo'], y=periodos['Cobertura_Dias'], name='Cobertura (Días)', mode='lines+markers',
+                                 line=dict(color='#66BB6A', width=2, dash='dash')), row=2, col=1, secondary_y=True)
+    _layout(fig, titulo)
+    # Apiladas por offsetgroup: los estados comparten grupo (100%), FCST y Despachos quedan lado a lado
+    fig.update_layout(barmode='relative')
+    fig.update_yaxes(range=[0, 100], row=1, col=2)
+    return fig
+
+
+def figure_estado(periodos, distribucion, rankings, titulo, group_col='Origen', value_col='Inv Kg-L'):
+    """
+    Página Estado de Coberturas / Evolución Futura: evolución del inventario, distribución y top 15.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(
+        rows=2, cols=2, column_widths=[0.6, 0.4], row_heights=[0.45, 0.55], vertical_spacing=0.12,
+        specs=[[{'type': 'xy', 'secondary_y': True}, {'type': 'xy'}], [{'type': 'table'}, {'type': 'table'}]],
+        subplot_titles=('Evolución del Inventario', f'Distribución por {group_col}', 'Top 15 de mayor valor', 'Top 15 de menor valor')
+    )
+    if not periodos.empty:
+        fig.add_trace(go.Bar(x=periodos['Periodo'], y=periodos['Inv Kg-L'], name='Inventario', marker_color='#EF5350'), row=1, col=1)
+        fig.add_trace(go.Scatter(x=periodos['Periodo'], y=periodos['Cob(D)'], name='Promedio Cobertura (D)', mode='lines+markers',
+                                 line=dict(color='#2196F3', width=3)), row=1, col=1, secondary_y=True)
+    if not distribucion.empty:
+        fig.add_trace(go.Bar(x=distribucion['N_SKU'], y=distribucion[group_col].astype(str), orientation='h',
+                             name='SKUs', marker_color='#6BBE45', showlegend=False), row=1, col=2)
+    for col, clave in ((1, 'mayores'), (2, 'menores')):
+        tabla = rankings.get(value_col, {}).get(clave)
+        if tabla is not None and not tabla.empty:
+            fig.add_trace(_table(tabla), row=2, col=col)
+    return _layout(fig, titulo)
+
+
+def figure_wape(periodos, rankings_wape, titulo):
+    """
+    Página WAPE: FCST vs. Despachos y WAPE % por período, tabla por período y materiales con mayor error.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(
+        rows=2, cols=2, column_widths=[0.45, 0.55], row_heights=[0.45, 0.55], vertical_spacing=0.12,
+        specs=[[{'type': 'xy', 'colspan': 2, 'secondary_y': True}, None], [{'type': 'table'}, {'type': 'table'}]],
+        subplot_titles=('Evolución WAPE', 'Cálculo WAPE', 'Mayores 15 (WAPE %)')
+    )
+    if not periodos.empty:
+        fig.add_trace(go.Bar(x=periodos['Periodo'], y=periodos['FCST'], name='FCST', marker_color='#4A90E2'), row=1, col=1)
+        fig.add_trace(go.Bar(x=periodos['Periodo'], y=periodos['Despachos KL'], name='Despachos', marker_color='#1565C0'), row=1, col=1)
+        fig.add_trace(go.Scatter(x=periodos['Periodo'], y=periodos['Wape_%'], name='Wape%', mode='lines+markers',
+                                 line=dict(color='#FF6B00', width=3)), row=1, col=1, secondary_y=True)
+        tabla = periodos[['Periodo', 'FCST', 'Despachos KL', 'Dif_Wape_Abs', 'Wape_%']].tail(18)
+        fig.add_trace(_table(tabla), row=2, col=1)
+    mayores = rankings_wape.get('mayores')
+    if mayores is not None and not mayores.empty:
+        fig.add_trace(_table(mayores), row=2, col=2)
+    return _layout(fig, titulo)
+
+
+def build_report_figures(df, celdas, grupo, estado, group_col='Origen', granularidad='Mes', fecha_corte=None):
+    """
+    Figuras de las cuatro páginas para una combinación, con los mismos cálculos que el dashboard
+    (agregados por período, rankings por material, estado y distribución). Retorna {página: figura}
+    o None si la combinación no tiene datos.
+    """
+    datos = filter_combination(df, grupo, estado, group_col)
+    if datos.empty:
+        return None
+
+    fecha_corte = fecha_corte if fecha_corte is not None else pd.Timestamp.now()
+    etiqueta = f"{group_col}: {grupo} · Estado: {estado} · {granularidad}"
+
+    periodos = rebucket(combine_cells(celdas, grupo, estado, group_col), granularidad)
+    futuros = datos[datos['Fecha'] >= fecha_corte] if 'Fecha' in datos.columns else datos
+    if futuros.empty:
+        futuros = datos
+        periodos_futuros = periodos
+    else:
+        periodos_futuros = rebucket(combine_cells(celdas, grupo, estado, group_col, desde=fecha_corte), granularidad)
+
+    value_col = 'Inv (M/Usd)' if 'Inv (M/Usd)' in datos.columns else 'Inv Kg-L'
+    agregados = material_aggregates(datos)
+    rankings = rank_materials(agregados, [value_col], k=15)
+    rankings_futuros = rank_materials(material_aggregates(futuros), [value_col], k=15)
+
+    rankings_wape = {}
+    if 'Wape (%)' in agregados.columns:
+        con_despachos = agregados[agregados['Despachos KL'] > 0]
+        columnas = ['Material'] + (['Origen'] if 'Origen' in con_despachos.columns else []) + ['Wape (%)', 'Dif Wape Abs(MKL)']
+        rankings_wape = rank_materials(con_despachos, ['Wape (%)'], k=15, columnas=columnas).get('Wape (%)', {})
+
+    return {
+        'Principal': figure_principal(periodos, calculate_estado_stats(datos), f"📊 Principal — {etiqueta}"),
+        'Estado de Coberturas': figure_estado(
+            periodos, calculate_distribucion_origen(datos, group_col), rankings,
+            f"🎯 Estado de Coberturas — {etiqueta}", group_col, value_col
+        ),
+        'Evolución Futura': figure_estado(
+            periodos_futuros, calculate_distribucion_origen(futuros, group_col), rankings_futuros,
+            f"📈 Evolución Futura — {etiqueta}", group_col, value_col
+        ),
+        'WAPE': figure_wape(periodos, rankings_wape, f"📉 WAPE (Kg-L) — {etiqueta}"),
+    }
+
+
+def combination_folder(grupo, estado):
+    """
+    Carpeta de una combinación dentro del directorio de salida (ej. 'LAMPA__Cob_menor_45').
+    """
+    return f"{safe_name(grupo)}__{safe_name(estado)}"
+
+
+def write_html_report(figuras, carpeta, titulo):
+    """
+    reporte.html de una combinación: páginas interactivas que usan ../plotly.min.js (funciona sin conexión).
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    secciones = [
+        f"<section><h2>{html.escape(pagina)}</h2>{fig.to_html(full_html=False, include_plotlyjs=False)}</section>"
+        for pagina, fig in figuras.items()
+    ]
+    path = os.path.join(carpeta, 'reporte.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(
+            "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+            f"<title>{html.escape(titulo)}</title><script src='../plotly.min.js'></script>"
+            "<style>body{font-family:sans-serif;margin:1rem 2rem}h1,h2{color:#2E7D32}"
+            "section{page-break-after:always}</style></head><body>"
+            f"<h1>{html.escape(titulo)}</h1>{''.join(secciones)}</body></html>"
+        )
+    return [path]
+
+
+def write_pdf_report(figuras, carpeta):
+    """
+    Un PDF estático por página (01_Principal.pdf, ...), renderizado con kaleido.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    archivos = []
+    for i, (pagina, fig) in enumerate(figuras.items(), start=1):
+        path = os.path.join(carpeta, f"{i:02d}_{safe_name(pagina)}.pdf")
+        fig.write_image(path, format='pdf', width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        archivos.append(path)
+    return archivos
+
+
+def _init_worker(df, celdas, opciones):
+    """
+    Initializer del pool: el dataset y las celdas se reciben una sola vez por proceso.
+    """
+    _worker_state.update(df=df, celdas=celdas, opciones=opciones)
+
+
+def _render_combination(combinacion):
+    """
+    Genera el reporte de una combinación dentro de un worker. Retorna un resumen (o None sin datos).
+    """
+    grupo, estado = combinacion
+    opciones = _worker_state['opciones']
+    figuras = build_report_figures(
+        _worker_state['df'], _worker_state['celdas'], grupo, estado,
+        opciones['group_col'], opciones['granularidad'], opciones['fecha_corte']
+    )
+    if figuras is None:
+        return None
+
+    carpeta = os.path.join(opciones['salida'], combination_folder(grupo, estado))
+    titulo = f"Reporte S&OP ACO — {opciones['group_col']}: {grupo} · Estado: {estado}"
+    archivos, errores = [], []
+    if 'html' in opciones['formatos']:
+        archivos += write_html_report(figuras, carpeta, titulo)
+    if 'pdf' in opciones['formatos']:
+        # kaleido necesita un navegador Chrome; si falla se conserva el HTML y se informa el error
+        try:
+            archivos += write_pdf_report(figuras, carpeta)
+        except Exception as e:
+            errores.append(f"PDF no generado: {e}")
+    return {'grupo': grupo, 'estado': estado, 'carpeta': carpeta, 'archivos': archivos, 'errores': errores}
+
+
+def _write_index(salida, resultados, titulo):
+    """
+    index.html con un enlace por combinación generada.
+    """
+    filas = ''.join(
+        f"<li><a href='{os.path.basename(r['carpeta'])}/reporte.html'>{html.escape(r['grupo'])} · {html.escape(r['estado'])}</a></li>"
+        for r in resultados
+    )
+    path = os.path.join(salida, 'index.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(titulo)}</title></head>"
+                f"<body style='font-family:sans-serif'><h1>{html.escape(titulo)}</h1><ul>{filas}</ul></body></html>")
+    return path
+
+
+def generate_reports(df, salida, group_col='Origen', granularidad='Mes', formatos=REPORT_FORMATS,
+                     combinaciones=None, max_workers=None, fecha_corte=None):
+    """
+    Genera los reportes de todas las combinaciones (grupo × estado) en paralelo.
+
+    - Los agregados mensuales por celda se calculan una sola vez y se comparten con los workers
+    - Cada worker recibe el dataset una vez (initializer) y procesa combinaciones completas
+    - Con un solo worker (o una sola combinación) se genera en el proceso actual
+
+    Retorna la lista de resúmenes {'grupo', 'estado', 'carpeta', 'archivos', 'errores'}.
+    """
+    columnas = [c for c in REPORT_COLUMNS if c in df.columns]
+    if group_col in df.columns and group_col not in columnas:
+        columnas.append(group_col)
+    df = df[columnas]
+
+    # Sin kaleido instalado solo se genera HTML
+    formatos = tuple(f for f in formatos if f != 'pdf' or pdf_available())
+    combinaciones = combinaciones or report_combinations(df, group_col)
+    celdas = monthly_cells(df, group_col)
+    opciones = {
+        'salida': salida, 'group_col': group_col, 'granularidad': granularidad, 'formatos': formatos,
+        'fecha_corte': fecha_corte if fecha_corte is not None else pd.Timestamp.now(),
+    }
+
+    os.makedirs(salida, exist_ok=True)
+    if 'html' in formatos:
+        # plotly.js se escribe una sola vez para todos los reportes (funcionan sin conexión)
+        from plotly.offline import get_plotlyjs
+        with open(os.path.join(salida, 'plotly.min.js'), 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(combinaciones))
+    if max_workers <= 1:
+        _init_worker(df, celdas, opciones)
+        resultados = [_render_combination(c) for c in combinaciones]
+    else:
+        # 'spawn' como en montecarlo: fork no es seguro desde el servidor multi-hilo de Streamlit
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(df, celdas, opciones)
+        ) as pool:
+            resultados = list(pool.map(_render_combination, combinaciones))
+
+    resultados = [r for r in resultados if r is not None]
+    if 'html' in formatos:
+        _write_index(salida, resultados, f"Reportes S&OP ACO — {granularidad}")
+    return resultados
@@ -0,0 +1,105 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from .calculations import categorize_cobertura_series
+from .replenishment import origin_parameter, DEFAULT_LEAD_TIME_DIAS
+from .timing import timed
+
+
+DEFAULT_SERVICE_LEVEL = 0.95
+
+# Relación entre umbral de alerta y umbral crítico (la misma que los umbrales fijos 90 / 45)
+ALERTA_FACTOR = 2.0
+
+
+def service_level_z(nivel_servicio):
+    """Factor z de la normal estándar para un nivel de servicio (ej. 0.95 -> 1.645)."""
+    nivel = min(max(float(nivel_servicio), 0.5), 0.9999)
+    return NormalDist().inv_cdf(nivel)
+
+
+@timed()
+def safety_stock_table(matrices, nivel_servicio=DEFAULT_SERVICE_LEVEL, parametros_origen=None, min_obs=3):
+    """
+    Stock de seguridad por SKU a partir de la variabilidad del error de forecast.
+
+    SS = z(nivel de servicio) × σ(Despachos - FCST) × √(lead time en meses)
+
+    σ se calcula sobre los meses con despachos registrados. Los SKUs con menos de min_obs meses
+    usan el coeficiente de variación del error agregado aplicado a su FCST medio.
+    La cobertura objetivo por SKU (días) = lead time + días de stock de seguridad, y se usa como
+    umbral crítico; el umbral de alerta es ALERTA_FACTOR veces el crítico.
+    """
+    valores = matrices['valores']
+    if 'FCST' not in valores or 'Despachos KL' not in valores:
+        return None
+
+    fcst = valores['FCST']
+    desp = valores['Despachos KL']
+    presente = matrices['presente']
+
+    valido = presente & (desp > 0)
+    error = np.where(valido, desp - fcst, 0.0)
+    n_obs = valido.sum(axis=1)
+    n_safe = np.maximum(n_obs, 1)
+    media = error.sum(axis=1) / n_safe
+    var = ((error - media[:, None]) ** 2 * valido).sum(axis=1) / np.maximum(n_safe - 1, 1)
+    sigma = np.sqrt(var)
+
+    meses_fcst = np.maximum(presente.sum(axis=1), 1)
+    demanda_media = np.where(presente, fcst, 0).sum(axis=1) / meses_fcst
+
+    # Respaldo para SKUs con poca historia: CV del error agregado × demanda media del SKU
+    n_validos = max(valido.sum(), 1)
+    fcst_medio = np.where(valido, fcst, 0).sum() / n_validos
+    cv_global = np.sqrt((error ** 2).sum() / n_validos) / fcst_medio if fcst_medio > 0 else 0.0
+    pocos = n_obs < min_obs
+    sigma = np.where(pocos, cv_global * demanda_media, sigma)
+
+    lead_time = origin_parameter(matrices, parametros_origen, 'Lead Time (días)', DEFAULT_LEAD_TIME_DIAS)
+    z = service_level_z(nivel_servicio)
+    stock_seguridad = z * sigma * np.sqrt(lead_time / 30)
+
+    dias_ss = np.where(demanda_media > 0, stock_seguridad / np.where(demanda_media > 0, demanda_media, 1) * 30, np.nan)
+    cobertura_objetivo = lead_time + dias_ss
+
+    tabla = matrices['atributos'].reset_index()
+    tabla['Meses Historia'] = n_obs
+    tabla['Demanda Media'] = demanda_media
+    tabla['σ Error'] = sigma
+    tabla['Lead Time (días)'] = lead_time
+    tabla['Stock Seguridad'] = stock_seguridad
+    tabla['Días SS'] = dias_ss
+    tabla['Cob. Objetivo (D)'] = cobertura_objetivo
+    tabla['Umbral Alerta (D)'] = cobertura_objetivo * ALERTA_FACTOR
+
+    numericas = tabla.select_dtypes('number').columns
+    tabla[numericas] = tabla[numericas].round(1)
+    return tabla
+
+
+def per_sku_thresholds(tabla_ss, materiales, default_critico=45, default_alerta=90):
+    """
+    Umbrales crítico y de alerta alineados a una serie de materiales (ej. las filas del dataset).
+    Los SKUs sin cobertura objetivo (sin demanda) usan los umbrales fijos.
+    """
+    objetivo = tabla_ss.set_index('Material')['Cob. Objetivo (D)']
+    objetivo = objetivo[~objetivo.index.duplicated()]
+    critico = pd.Series(materiales).map(objetivo).fillna(default_critico).to_numpy()
+    alerta = np.where(pd.Series(materiales).map(objetivo).isna(), default_alerta, critico * ALERTA_FACTOR)
+    return critico, alerta
+
+
+@timed()
+def apply_safety_stock_thresholds(df, tabla_ss):
+    """
+    Recalcula Estado_Cobertura usando la cobertura objetivo de cada SKU en lugar de 45/90 días.
+    """
+    if tabla_ss is None or 'Cob(D)' not in df.columns or 'Material' not in df.columns:
+        return df
+    df = df.copy()
+    critico, alerta = per_sku_thresholds(tabla_ss, df['Material'])
+    df['Estado_Cobertura'] = categorize_cobertura_series(df['Cob(D)'].to_numpy(), critico, alerta).to_numpy()
+    return df
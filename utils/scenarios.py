@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from .calculations import calculate_cobertura_array, categorize_cobertura_array
+from .matrices import attribute_mask, horizon_months, inventory_snapshot
+from .timing import timed
+
+
+# Columnas que se interpretan como recepciones/producción planificada, en orden de prioridad
+RECEIPT_COLUMNS = ['Prod Kg-L', 'Q']
+
+ESCENARIO_BASE = {
+    'nombre': 'Base',
+    'multiplicadores': [],
+    'umbral_critico': 45,
+    'umbral_alerta': 90,
+}
+
+
+def _to_number(value, default):
+    """Convierte un valor de la tabla editable a número, usando default si está vacío o no es válido."""
+    numero = pd.to_numeric(value, errors='coerce')
+    return default if pd.isna(numero) else numero
+
+
+def _to_text(value, default=''):
+    """Convierte un valor de la tabla editable a texto, usando default si está vacío."""
+    return default if value is None or pd.isna(value) or str(value).strip() == '' else str(value).strip()
+
+
+def scenarios_from_table(df_escenarios):
+    """
+    Convierte la tabla editable de escenarios en una lista de definiciones.
+    Las filas con el mismo nombre de escenario se combinan: sus multiplicadores se acumulan
+    y los umbrales se toman de la primera fila.
+    """
+    escenarios = {}
+    if df_escenarios is None or df_escenarios.empty:
+        return []
+
+    for _, row in df_escenarios.iterrows():
+        nombre = _to_text(row.get('Escenario'))
+        if not nombre:
+            continue
+
+        if nombre not in escenarios:
+            escenarios[nombre] = {
+                'nombre': nombre,
+                'multiplicadores': [],
+                'umbral_critico': float(_to_number(row.get('Umbral crítico'), 45)),
+                'umbral_alerta': float(_to_number(row.get('Umbral alerta'), 90)),
+            }
+
+        factor = _to_number(row.get('Factor FCST'), 1)
+        if factor != 1:
+            escenarios[nombre]['multiplicadores'].append({
+                'dimension': _to_text(row.get('Dimensión'), 'Todas'),
+                'valor': _to_text(row.get('Valor')),
+                'factor': float(factor),
+            })
+
+    return list(escenarios.values())
+
+
+def project_inventory(fcst, inv0, recepciones):
+    """
+    Inventario proyectado al inicio de cada mes: inv0 más recepciones menos FCST de los meses anteriores.
+    fcst y recepciones son (..., n_sku, n_mes); inv0 es (n_sku,).
+    """
+    flujo = recepciones - fcst
+    return inv0[:, None] + np.cumsum(flujo, axis=-1) - flujo
+
+
+@timed()
+def run_scenarios(matrices, escenarios, fcst_col='FCST', inv_col='Inv Kg-L', hoy=None):
+    """
+    Evalúa todos los escenarios a la vez sobre las matrices SKU × mes.
+
+    Cada escenario puede:
+    - multiplicar el FCST de los SKUs que cumplan una dimensión (Origen, Segmento, Material o Todas)
+    - cambiar los umbrales de cobertura crítica/alerta
+
+    El escenario 'Base' se agrega siempre al inicio. Todos, incluida la base, se proyectan igual:
+    desde el inventario actual y el mes en curso (ver matrices.horizon_months), restando el FCST
+    del escenario y sumando las recepciones planificadas si el archivo las trae.
+
+    Retorna un diccionario con 'nombres', 'fechas' (meses proyectados) y 'fcst', 'cobertura' y 'estado'
+    (n_escenarios, n_sku, n_mes), más 'resumen' y 'criticos_mes' de todos los SKUs (ver scenario_summary).
+    """
+    valores = matrices['valores']
+    if fcst_col not in valores or inv_col not in valores:
+        return None
+
+    escenarios = [ESCENARIO_BASE] + [e for e in escenarios if e['nombre'] != ESCENARIO_BASE['nombre']]
+    n_sku = len(matrices['materiales'])
+
+    horizonte = horizon_months(matrices['fechas'], hoy)
+    presente = matrices['presente'][:, horizonte]
+    fcst = np.where(presente, valores[fcst_col][:, horizonte], 0)
+    receipt_col = next((c for c in RECEIPT_COLUMNS if c in valores), None)
+    recepciones = valores[receipt_col][:, horizonte] if receipt_col else np.zeros_like(fcst)
+    inv0 = inventory_snapshot(matrices, inv_col)
+
+    # Multiplicadores (S, N): el único bucle es sobre las reglas, el cálculo pesado es por broadcasting
+    multiplicador = np.ones((len(escenarios), n_sku))
+    for s, esc in enumerate(escenarios):
+        for regla in esc['multiplicadores']:
+            mask = attribute_mask(matrices, regla['dimension'], regla['valor'])
+            multiplicador[s, mask] *= regla['factor']
+
+    umbral_critico = np.array([e['umbral_critico'] for e in escenarios], dtype=float)[:, None, None]
+    umbral_alerta = np.array([e['umbral_alerta'] for e in escenarios], dtype=float)[:, None, None]
+
+    fcst_s = fcst[None, :, :] * multiplicador[:, :, None]
+    inv_s = np.maximum(project_inventory(fcst_s, inv0, recepciones[None, :, :]), 0)
+
+    cobertura = calculate_cobertura_array(inv_s, fcst_s)
+    cobertura = np.where(presente[None, :, :], cobertura, np.nan)
+    estado = categorize_cobertura_array(cobertura, umbral_critico, umbral_alerta)
+
+    resultado = {
+        'nombres': [e['nombre'] for e in escenarios],
+        'umbrales': [f"{e['umbral_critico']:.0f} / {e['umbral_alerta']:.0f}" for e in escenarios],
+        'fechas': matrices['fechas'][horizonte],
+        'fcst': fcst_s,
+        'cobertura': cobertura,
+        'estado': estado,
+    }
+    resultado['resumen'], resultado['criticos_mes'] = scenario_summary(resultado)
+    return resultado
+
+
+def scenario_summary(resultado, filas=None, meses=None):
+    """
+    Resumen comparativo y SKUs críticos por mes de cada escenario, opcionalmente solo para
+    un subconjunto de SKUs (filas, máscara (n_sku,)) y meses (máscara sobre resultado['fechas']).
+    Retorna (resumen, criticos_mes) como DataFrames listos para mostrar.
+    """
+    estado = resultado['estado']
+    if filas is None:
+        filas = np.ones(estado.shape[1], dtype=bool)
+    if meses is None:
+        meses = np.ones(estado.shape[2], dtype=bool)
+    estado = estado[:, filas][:, :, meses]
+    fcst = resultado['fcst'][:, filas][:, :, meses]
+    criticos = estado == 0
+
+    resumen = pd.DataFrame({
+        'Escenario': resultado['nombres'],
+        'Umbrales': resultado['umbrales'],
+        'Filas Críticas': criticos.sum(axis=(1, 2)),
+        'Filas Alerta': (estado == 1).sum(axis=(1, 2)),
+        'Filas OK': (estado == 2).sum(axis=(1, 2)),
+        'SKUs Críticos': criticos.any(axis=2).sum(axis=1),
+        'FCST Total': fcst.sum(axis=(1, 2)),
+    })
+    con_dato = (estado >= 0).sum(axis=(1, 2))
+    resumen['% Críticas'] = np.where(con_dato > 0, resumen['Filas Críticas'] / np.maximum(con_dato, 1) * 100, 0).round(1)
+    resumen['Δ SKUs Críticos'] = resumen['SKUs Críticos'] - resumen['SKUs Críticos'].iloc[0]
+
+    criticos_mes = pd.DataFrame(criticos.sum(axis=1), index=resultado['nombres'], columns=resultado['fechas'][meses])
+    criticos_mes = criticos_mes.rename_axis('Escenario').reset_index().melt(
+        id_vars='Escenario', var_name='Fecha', value_name='SKUs Críticos'
+    )
+    return resumen, criticos_mes
@@ -0,0 +1,173 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from .timing import timed
+
+
+# Similitud mínima de trigramas (fracción de trigramas de la búsqueda presentes) para coincidencias aproximadas
+MIN_SIMILITUD = 0.5
+
+# Máximo de resultados que se devuelven por búsqueda (el filtro "todas las coincidencias" no tiene límite)
+DEFAULT_LIMIT = 100
+
+
+def _normalize(texto):
+    """
+    Minúsculas y sin tildes, para que 'Fungicida' y 'fúngicida' coincidan.
+    """
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def _trigrams(texto):
+    """
+    Trigramas de un texto (con un espacio de relleno al inicio y al final).
+    """
+    texto = f" {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+@timed()
+def build_material_index(df):
+    """
+    Índice de búsqueda sobre códigos de Material y Descripción, construido una vez por dataset.
+
+    - Prefijo de código: códigos normalizados ordenados (np.searchsorted)
+    - Prefijo de palabra: palabras de la descripción ordenadas, con el SKU de cada una
+    - Subcadena y aproximada: listas invertidas de trigramas -> SKUs
+    - 'etiquetas': Material -> 'Material — Descripción' para los selectores
+    """
+    if df is None or df.empty or 'Material' not in df.columns:
+        return None
+
+    if 'Descripción' in df.columns:
+        catalogo = df[['Material', 'Descripción']].dropna(subset=['Material']).drop_duplicates('Material')
+        descripciones = catalogo['Descripción'].fillna('').astype(str).to_numpy()
+    else:
+        catalogo = df[['Material']].dropna().drop_duplicates()
+        descripciones = np.full(len(catalogo), '', dtype=object)
+
+    materiales = catalogo['Material'].to_numpy()
+    codigos = np.array([_normalize(m).strip() for m in materiales], dtype=object)
+    textos = np.array([f"{c} {_normalize(d).strip()}".strip() for c, d in zip(codigos, descripciones)], dtype=object)
+
+    orden_codigos = np.argsort(codigos.astype(str), kind='stable')
+    rango_codigo = np.empty(len(codigos), dtype=np.int64)
+    rango_codigo[orden_codigos] = np.arange(len(codigos))
+
+    # Palabras de la descripción (una entrada por palabra y SKU)
+    palabras, palabra_sku = [], []
+    for i, d in enumerate(descripciones):
+        for p in _normalize(d).split():
+            palabras.append(p)
+            palabra_sku.append(i)
+    palabras = np.array(palabras, dtype=str)
+    palabra_sku = np.array(palabra_sku, dtype=np.int64)
+    orden_palabras = np.argsort(palabras, kind='stable')
+
+    # Listas invertidas de trigramas: se factorizan los trigramas y se agrupan los SKUs por código
+    gramas, grama_sku = [], []
+    for i, t in enumerate(textos):
+        g = _trigrams(t)
+        gramas.extend(g)
+        grama_sku.extend([i] * len(g))
+    grama_codigos, vocabulario = pd.factorize(pd.Series(gramas, dtype=object))
+    grama_sku = np.array(grama_sku, dtype=np.int64)
+    orden = np.argsort(grama_codigos, kind='stable')
+    limites = np.searchsorted(grama_codigos[orden], np.arange(len(vocabulario) + 1))
+
+    index = {
+        'materiales': materiales,
+        'descripciones': descripciones,
+        'textos': textos,
+        'codigos_ordenados': codigos.astype(str)[orden_codigos],
+        'orden_codigos': orden_codigos,
+        'rango_codigo': rango_codigo,
+        'palabras_ordenadas': palabras[orden_palabras],
+        'palabra_sku': palabra_sku[orden_palabras],
+        'vocabulario': {g: k for k, g in enumerate(vocabulario)},
+        'postings': grama_sku[orden],
+        'limites': limites,
+    }
+    index['etiquetas'] = material_labels(index)
+    return index
+
+
+def _prefix_range(ordenados, prefijo):
+    """
+    Rango [inicio, fin) de los elementos de un array ordenado que empiezan con el prefijo.
+    """
+    inicio = np.searchsorted(ordenados, prefijo, side='left')
+    fin = np.searchsorted(ordenados, prefijo + '\uffff', side='left')
+    return inicio, fin
+
+
+@timed()
+def search_materials(index, consulta, limit=DEFAULT_LIMIT, min_similitud=MIN_SIMILITUD):
+    """
+    Busca materiales por código o descripción. Orden de relevancia:
+    código exacto > prefijo de código > prefijo de palabra de la descripción > subcadena > aproximada
+    (por similitud de trigramas, tolera errores de tipeo).
+
+    Retorna un array con los valores de Material (limit=None para todas las coincidencias).
+    """
+    if index is None:
+        return np.array([], dtype=object)
+
+    q = _normalize(consulta).strip()
+    if not q:
+        return np.array([], dtype=object)
+
+    n = len(index['materiales'])
+    puntaje = np.zeros(n)
+
+    # Prefijo de código
+    inicio, fin = _prefix_range(index['codigos_ordenados'], q)
+    puntaje[index['orden_codigos'][inicio:fin]] = 4.0
+    exactos = index['orden_codigos'][inicio:fin][index['codigos_ordenados'][inicio:fin] == q]
+    puntaje[exactos] = 5.0
+
+    # Prefijo de palabra en la descripción (consultas de una palabra; las de varias van por subcadena)
+    if ' ' not in q:
+        inicio, fin = _prefix_range(index['palabras_ordenadas'], q)
+        skus = index['palabra_sku'][inicio:fin]
+        puntaje[skus] = np.maximum(puntaje[skus], 3.0)
+
+    # Subcadena / aproximada por trigramas
+    gramas = [index['vocabulario'][g] for g in _trigrams(q) if g in index['vocabulario']]
+    n_gramas = len(_trigrams(q))
+    if gramas and n_gramas:
+        listas = [index['postings'][index['limites'][g]:index['limites'][g + 1]] for g in gramas]
+        similitud = np.bincount(np.concatenate(listas), minlength=n) / n_gramas
+        candidatos = np.flatnonzero(similitud >= min_similitud)
+        if len(candidatos):
+            textos = index['textos'][candidatos]
+            contiene = np.fromiter((q in t for t in textos), dtype=bool, count=len(candidatos))
+            # Subcadena exacta: 2 + similitud; aproximada: solo similitud (< 2)
+            puntaje_grama = np.where(contiene, 2.0 + similitud[candidatos] / 10, similitud[candidatos])
+            puntaje[candidatos] = np.maximum(puntaje[candidatos], puntaje_grama)
+
+    encontrados = np.flatnonzero(puntaje > 0)
+    if len(encontrados) == 0:
+        return np.array([], dtype=object)
+
+    # Mayor puntaje primero; a igual puntaje, orden por código
+    orden = np.lexsort((index['rango_codigo'][encontrados], -puntaje[encontrados]))
+    resultado = encontrados[orden]
+    if limit is not None:
+        resultado = resultado[:limit]
+    return index['materiales'][resultado]
+
+
+def material_labels(index):
+    """
+    Diccionario Material -> 'Material — Descripción' para mostrar en los selectores.
+    """
+    if index is None:
+        return {}
+    return {
+        m: f"{m} — {d}" if d else str(m)
+        for m, d in zip(index['materiales'], index['descripciones'])
+    }
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from .matrices import actual_months, inventory_snapshot
+from .timing import timed
+
+
+# Participación acumulada que cierra las clases A y B (el resto es C)
+ABC_LIMITS = (0.80, 0.95)
+
+# Coeficiente de variación que cierra las clases X e Y (el resto es Z)
+XYZ_LIMITS = (0.5, 1.0)
+
+SEGMENT_COLUMNS = ['ABC', 'XYZ', 'ABC-XYZ']
+
+
+def abc_classes(volumen, limites=ABC_LIMITS):
+    """
+    Clasificación ABC vectorizada: ordena por volumen descendente y corta por participación acumulada.
+    Un SKU es A si la participación acumulada antes de él es menor al primer límite
+    (así el SKU más grande siempre es A). Volumen cero o negativo es C.
+    """
+    volumen = np.nan_to_num(np.asarray(volumen, dtype=float))
+    clases = np.full(len(volumen), 'C', dtype=object)
+    total = volumen[volumen > 0].sum()
+    if total <= 0:
+        return clases
+
+    orden = np.argsort(-volumen, kind='stable')
+    ordenado = np.maximum(volumen[orden], 0)
+    participacion_previa = (np.cumsum(ordenado) - ordenado) / total
+
+    clases[orden] = np.select(
+        [participacion_previa < limites[0], participacion_previa < limites[1]],
+        ['A', 'B'],
+        default='C'
+    )
+    clases[volumen <= 0] = 'C'
+    return clases
+
+
+def xyz_classes(demanda, presente, limites=XYZ_LIMITS):
+    """
+    Clasificación XYZ vectorizada por coeficiente de variación de la demanda mensual (n_sku, n_mes).
+    Retorna (clases, cv). SKUs sin demanda son Z.
+    """
+    n = np.maximum(presente.sum(axis=1), 1)
+    valores = np.where(presente, demanda, 0.0)
+    media = valores.sum(axis=1) / n
+    var = (np.where(presente, demanda - media[:, None], 0.0) ** 2).sum(axis=1) / n
+    cv = np.where(media > 0, np.sqrt(var) / np.where(media > 0, media, 1), np.inf)
+
+    clases = np.select([cv <= limites[0], cv <= limites[1]], ['X', 'Y'], default='Z').astype(object)
+    return clases, cv
+
+
+@timed()
+def abc_xyz_table(matrices, base='FCST', hoy=None):
+    """
+    Segmentación ABC/XYZ por SKU en una sola pasada sobre las matrices SKU × mes.
+    base: 'FCST' (volumen de forecast del horizonte) o 'Inventario' (inventario actual).
+    La variabilidad (XYZ) usa los despachos de los meses con despachos registrados
+    (ver matrices.actual_months); si no hay, el FCST de todos los meses.
+    Retorna un DataFrame indexado por Material con columnas categóricas ABC, XYZ y ABC-XYZ.
+    """
+    valores = matrices['valores']
+    presente = matrices['presente']
+
+    if base == 'Inventario' and 'Inv Kg-L' in valores:
+        volumen = inventory_snapshot(matrices)
+    elif 'FCST' in valores:
+        volumen = valores['FCST'].sum(axis=1)
+    else:
+        return None
+
+    meses_reales = actual_months(matrices, hoy=hoy)
+    if meses_reales.any():
+        demanda_col, meses_demanda = 'Despachos KL', presente & meses_reales[None, :]
+    elif 'FCST' in valores:
+        demanda_col, meses_demanda = 'FCST', presente
+    else:
+        return None
+
+    abc = abc_classes(volumen)
+    xyz, cv = xyz_classes(valores[demanda_col], meses_demanda)
+
+    tabla = pd.DataFrame({
+        'ABC': pd.Categorical(abc, categories=['A', 'B', 'C']),
+        'XYZ': pd.Categorical(xyz, categories=['X', 'Y', 'Z']),
+        'Volumen ABC': volumen,
+        'CV Demanda': np.round(cv, 2),
+    }, index=pd.Index(matrices['materiales'], name='Material'))
+    tabla['ABC-XYZ'] = pd.Categorical(
+        tabla['ABC'].astype(str) + tabla['XYZ'].astype(str),
+        categories=[a + x for a in 'ABC' for x in 'XYZ']
+    )
+    return tabla
+
+
+@timed()
+def add_segment_columns(df, tabla):
+    """
+    Agrega las columnas ABC, XYZ y ABC-XYZ (categóricas) al DataFrame en formato largo.
+    """
+    if tabla is None or 'Material' not in df.columns:
+        return df
+    df = df.copy()
+    posiciones = tabla.index.get_indexer(df['Material'])
+    for col in SEGMENT_COLUMNS:
+        codigos = np.where(posiciones >= 0, tabla[col].cat.codes.to_numpy()[posiciones], -1)
+        df[col] = pd.Categorical.from_codes(codigos, categories=tabla[col].cat.categories)
+    return df
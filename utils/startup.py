@@ -0,0 +1,201 @@
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import subprocess
+import urllib.request
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+# Presupuesto de arranque en segundos por etapa (medir_arranque.py termina con error si se excede)
+STARTUP_BUDGET = {
+    'importaciones': 0.5,   # módulos del dashboard con streamlit y pandas ya cargados (como en el servidor)
+    'bienvenida': 1.5,      # primera ejecución de app.py sin libro en data (pantalla de bienvenida)
+    'primera_vista': 15.0,  # primera ejecución de app.py con el libro de data (lee el precálculo si existe)
+    'salud': 8.0,           # desde streamlit run hasta que /_stcore/health responde
+    'docker': 20.0,         # desde docker run hasta que /_stcore/health responde
+}
+
+# Historial de mediciones (una línea JSON por medición) para seguir el arranque entre versiones
+STARTUP_HISTORY = PROJECT_DIR / "rendimiento" / "arranque.jsonl"
+
+# Módulos que no deben cargarse para la pantalla de bienvenida
+DEFERRED_MODULES = ['plotly.express', 'plotly.graph_objects', 'plotly.subplots',
+                    'pages.page_principal', 'pages.page_wape', 'pages.page_escenarios']
+
+HEALTH_PATH = '/_stcore/health'
+
+# Se ejecuta en un intérprete nuevo: streamlit y pandas se importan antes de medir (el servidor ya los tiene)
+_APPTEST_SCRIPT = '''
+import sys, time, json, logging
+import streamlit, pandas
+from streamlit.testing.v1 import AppTest
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+modulos = set(sys.modules)
+inicio = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+at.run()
+segundos = time.perf_counter() - inicio
+print(json.dumps({
+    'segundos': segundos,
+    'errores': [str(e.value) for e in at.exception],
+    'modulos': sorted(m for m in set(sys.modules) - modulos if not m.startswith('_')),
+}))
+'''
+
+_IMPORT_SCRIPT = '''
+import sys, time, json, logging
+import streamlit, pandas
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+inicio = time.perf_counter()
+for modulo in sys.argv[1:]:
+    __import__(modulo)
+print(json.dumps({'segundos': time.perf_counter() - inicio}))
+'''
+
+# Módulos que app.py importa al inicio (medidos en 'importaciones')
+APP_IMPORTS = ['utils.data_loader', 'utils.filters', 'utils.matrices', 'utils.safety_stock', 'utils.segmentation',
+               'utils.granularity', 'utils.search', 'utils.cache', 'utils.widgets']
+
+
+def _run_python(script, args, env=None):
+    resultado = subprocess.run(
+        [sys.executable, '-c', script, *args], cwd=PROJECT_DIR, capture_output=True, text=True,
+        env=dict(os.environ, **(env or {}))
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1] if resultado.stderr.strip() else 'error')
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def measure_imports(modulos=APP_IMPORTS):
+    """
+    Segundos en importar los módulos de app.py en un intérprete nuevo, con streamlit y pandas ya cargados.
+    """
+    return _run_python(_IMPORT_SCRIPT, modulos)['segundos']
+
+
+def measure_first_run(data_dir=None):
+    """
+    Primera ejecución de app.py (AppTest) en un intérprete nuevo. data_dir: carpeta de datos a usar
+    (una carpeta vacía mide la pantalla de bienvenida). Retorna {'segundos', 'errores', 'modulos'}.
+    """
+    env = {'DASHBOARD_DATA_DIR': str(data_dir)} if data_dir is not None else None
+    return _run_python(_APPTEST_SCRIPT, [str(PROJECT_DIR / 'app.py')], env)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_health(port, proceso=None, timeout=120):
+    """
+    Espera a que /_stcore/health responda 200. Retorna los segundos o None si no respondió a tiempo.
+    """
+    inicio = time.perf_counter()
+    url = f"http://127.0.0.1:{port}{HEALTH_PATH}"
+    while time.perf_counter() - inicio < timeout:
+        if proceso is not None and proceso.poll() is not None:
+            return None
+        try:
+            with urllib.request.urlopen(url, timeout=1) as respuesta:
+                if respuesta.status == 200:
+                    return time.perf_counter() - inicio
+        except OSError:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def measure_server(timeout=120):
+    """
+    Segundos desde 'streamlit run app.py' hasta que el healthcheck responde (None si no arrancó).
+    """
+    port = _free_port()
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', 'app.py', '--server.headless', 'true',
+         '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+        cwd=PROJECT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        return _wait_health(port, proceso, timeout)
+    finally:
+        proceso.terminate()
+        try:
+            proceso.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+
+
+def measure_docker(imagen, timeout=180):
+    """
+    Arranque en frío del contenedor: segundos desde 'docker run' hasta que el healthcheck responde.
+    Retorna None si no respondió a tiempo. Requiere docker en el PATH.
+    """
+    port = _free_port()
+    inicio = time.perf_counter()
+    contenedor = subprocess.run(
+        ['docker', 'run', '-d', '--rm', '-p', f"{port}:8501", imagen], capture_output=True, text=True, check=True
+    ).stdout.strip()
+    try:
+        segundos = _wait_health(port, timeout=timeout)
+        return None if segundos is None else time.perf_counter() - inicio
+    finally:
+        subprocess.run(['docker', 'stop', '-t', '5', contenedor], capture_output=True)
+
+
+def measure_startup(repeticiones=3, docker=None, servidor=True):
+    """
+    Mide cada etapa del arranque (mínimo de 'repeticiones' intentos, el menos afectado por ruido).
+    Retorna {'etapas': {etapa: segundos}, 'diferidos': módulos cargados sin necesidad, 'errores': [...]}.
+    """
+    etapas, errores = {}, []
+    etapas['importaciones'] = min(measure_imports() for _ in range(repeticiones))
+
+    with tempfile.TemporaryDirectory() as vacia:
+        corridas = [measure_first_run(vacia) for _ in range(repeticiones)]
+    etapas['bienvenida'] = min(c['segundos'] for c in corridas)
+    diferidos = sorted({m for c in corridas for m in c['modulos'] if m in DEFERRED_MODULES})
+    errores += [e for c in corridas for e in c['errores']]
+
+    corrida = measure_first_run()
+    etapas['primera_vista'] = corrida['segundos']
+    errores += corrida['errores']
+
+    if servidor:
+        etapas['salud'] = measure_server()
+    if docker:
+        etapas['docker'] = measure_docker(docker)
+    return {'etapas': etapas, 'diferidos': diferidos, 'errores': sorted(set(errores))}
+
+
+def check_budget(etapas, presupuesto=STARTUP_BUDGET):
+    """
+    Compara cada etapa con su presupuesto: lista de (etapa, segundos, límite, dentro del presupuesto).
+    Una etapa que no terminó (None) queda fuera del presupuesto.
+    """
+    return [(etapa, segundos, presupuesto.get(etapa),
+             segundos is not None and (presupuesto.get(etapa) is None or segundos <= presupuesto[etapa]))
+            for etapa, segundos in etapas.items()]
+
+
+def append_history(medicion, path=STARTUP_HISTORY):
+    """
+    Agrega una medición al historial (JSONL) con fecha y commit de git si está disponible.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    registro = dict(medicion, fecha=time.strftime('%Y-%m-%dT%H:%M:%S'), commit=commit)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    return registro
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+
+MESES_ES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio', 'Agosto',
+            'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+
+ORIGENES = ['LAMPA', 'LAMPA (M)', 'LEA', 'TERCEROS']
+PESOS_ORIGEN = [0.45, 0.1, 0.25, 0.2]
+SEGMENTOS = ['Herbicidas', 'Fungicidas', 'Insecticidas', 'Fertilizantes', 'Coadyuvantes']
+UNIDADES = ['L', 'KG']
+
+# Columnas sin uso que traen los libros reales (sus nombres no deben coincidir con las palabras clave
+# de los encabezados: material, codigo, producto, libre, bloqueado, total, cantidad...)
+COLUMNAS_BASURA = ['Familia', 'Responsable', 'Comentario', 'Canal', 'Marca', 'Presentación',
+                   'Cliente Clave', 'Observaciones', 'Clasificación Interna', 'Vigencia']
+
+# Filas de título sobre los encabezados (como el reporte exportado)
+FILAS_TITULO = 3
+
+# Fracción de SKUs sin stock y de materiales en stock que no están en el Forecast
+SIN_STOCK = 0.05
+SOLO_STOCK = 0.03
+
+
+def _junk_columns(n):
+    return [COLUMNAS_BASURA[i] if i < len(COLUMNAS_BASURA) else f"Campo Extra {i + 1}" for i in range(n)]
+
+
+def _fill_junk(tabla, nombres, rng):
+    for i, col in enumerate(nombres):
+        if i % 3 == 0:
+            tabla[col] = rng.choice(['', 'N/A', 'Revisar', 'OK'], len(tabla))
+        elif i % 3 == 1:
+            tabla[col] = rng.integers(0, 1000, len(tabla))
+        else:
+            tabla[col] = np.where(rng.random(len(tabla)) < 0.7, np.nan, rng.random(len(tabla)).round(3))
+    return tabla
+
+
+def month_labels(inicio, meses):
+    """
+    Encabezados de mes del Forecast ('Enero 2026', ...) desde 'inicio' (AAAA-MM).
+    """
+    primero = pd.Period(inicio, freq='M')
+    return [f"{MESES_ES[p.month - 1]} {p.year}" for p in (primero + i for i in range(meses))]
+
+
+def synthetic_tables(n_skus=1000, meses=18, lotes=3, columnas_basura=5, inicio=None, seed=0):
+    """
+    Hojas de un libro Master ACOL sintético: {'Fcst Actual', 'StockACOL', 'Master Actual'} como DataFrames.
+    - Fcst Actual: un SKU por fila y un mes por columna; demanda con estacionalidad, intermitencia y vacíos.
+    - StockACOL: entre 1 y 'lotes' lotes por SKU (libre, bloqueado, tránsito y calidad); algunos SKUs sin stock
+      y algunos materiales que no están en el Forecast.
+    - Master Actual: datos maestros y despachos de los meses pasados.
+    inicio: primer mes (AAAA-MM); por defecto, la mitad del horizonte queda en el pasado.
+    """
+    rng = np.random.default_rng(seed)
+    hoy = pd.Period(pd.Timestamp.now(), freq='M')
+    inicio = inicio or str(hoy - meses // 2)
+    etiquetas = month_labels(inicio, meses)
+    periodos = [pd.Period(inicio, freq='M') + i for i in range(meses)]
+
+    materiales = np.array([f"{400000 + i * 7}" for i in range(n_skus)])
+    descripciones = np.array([f"{rng.choice(SEGMENTOS)[:4].upper()} {i:05d} {rng.choice(['5L', '1L', '20L', '25KG', '1KG'])}"
+                              for i in range(n_skus)])
+    segmentos = rng.choice(SEGMENTOS, n_skus)
+    origenes = rng.choice(ORIGENES, n_skus, p=PESOS_ORIGEN)
+    unidades = rng.choice(UNIDADES, n_skus)
+
+    # Demanda: nivel log-normal (pocos SKUs concentran el volumen), estacionalidad e intermitencia por SKU
+    nivel = rng.lognormal(4, 1.3, n_skus)
+    fase = rng.integers(0, 12, n_skus)
+    amplitud = rng.uniform(0, 0.6, n_skus)
+    intermitencia = rng.uniform(0, 0.5, n_skus)
+    mes = np.array([p.month for p in periodos])
+    estacional = 1 + amplitud[:, None] * np.sin(2 * np.pi * (mes[None, :] + fase[:, None]) / 12)
+    demanda = nivel[:, None] * estacional * rng.gamma(4, 0.25, (n_skus, meses))
+    demanda[rng.random((n_skus, meses)) < intermitencia[:, None]] = 0
+    demanda = demanda.round(1)
+    vacios = rng.random((n_skus, meses)) < 0.01
+
+    fcst = pd.DataFrame({'CODIGO SAP': materiales, 'PRODUCTO': descripciones, 'UM': unidades,
+                         'Segmento': segmentos, 'Origen': origenes})
+    fcst = _fill_junk(fcst, _junk_columns(columnas_basura), rng)
+    fcst = pd.concat([fcst, pd.DataFrame(np.where(vacios, np.nan, demanda), columns=etiquetas)], axis=1)
+
+    # Stock: 1..lotes lotes por SKU; el total cubre entre 0 y ~6 meses de demanda
+    con_stock = np.flatnonzero(rng.random(n_skus) >= SIN_STOCK)
+    n_lotes = rng.integers(1, max(lotes, 1) + 1, len(con_stock))
+    filas = np.repeat(con_stock, n_lotes)
+    cobertura = rng.gamma(2, 1.2, n_skus)[filas] / np.repeat(n_lotes, n_lotes)
+    libre = (nivel[filas] * cobertura * rng.uniform(0.6, 1.0, len(filas))).round(1)
+    stock = pd.DataFrame({
+        'Material': materiales[filas],
+        'Nombre Material': descripciones[filas],
+        'Centro': rng.choice(['CL01', 'CL02', 'CL05'], len(filas)),
+        'Almacén': rng.choice(['A100', 'A200', 'B300', 'TRAN'], len(filas)),
+        'Lote': [f"L{rng.integers(10**6, 10**7)}" for _ in range(len(filas))],
+        'Libre utilización': libre,
+        'Bloqueado': np.where(rng.random(len(filas)) < 0.1, (libre * 0.2).round(1), 0.0),
+        'En Transito': np.where(rng.random(len(filas)) < 0.15, (libre * 0.5).round(1), 0.0),
+        'Control Calidad': np.where(rng.random(len(filas)) < 0.05, (libre * 0.1).round(1), 0.0),
+    })
+    n_extra = int(n_skus * SOLO_STOCK)
+    if n_extra:
+        extra = stock.sample(n_extra, replace=True, random_state=seed).copy()
+        extra['Material'] = [f"{900000 + i}" for i in range(n_extra)]
+        stock = pd.concat([stock, extra], ignore_index=True)
+    stock = _fill_junk(stock, _junk_columns(columnas_basura), rng)
+
+    # Master: despachos de los meses pasados (FCST con error de pronóstico por SKU)
+    pasados = [i for i, p in enumerate(periodos) if p < hoy]
+    error = rng.uniform(0.05, 0.6, n_skus)
+    despachos = demanda[:, pasados] * rng.lognormal(0, error[:, None], (n_skus, len(pasados)))
+    master = pd.DataFrame({'Material': materiales, 'Descripción': descripciones, 'Origen': origenes,
+                           'Segmento': segmentos, 'UM': unidades})
+    master = _fill_junk(master, _junk_columns(columnas_basura), rng)
+    master = pd.concat([master, pd.DataFrame(despachos.round(1), columns=[f"Desp {etiquetas[i]}" for i in pasados])], axis=1)
+
+    return {'Fcst Actual': fcst, 'StockACOL': stock, 'Master Actual': master}
+
+
+def synthetic_workbook(path, n_skus=1000, meses=18, lotes=3, columnas_basura=5, inicio=None, seed=0):
+    """
+    Escribe un libro Master ACOL sintético (ver synthetic_tables) con el mismo formato que el real:
+    filas de título sobre los encabezados del Forecast y hojas Fcst Actual, StockACOL y Master Actual.
+    Retorna {hoja: (filas, columnas)}.
+    """
+    hojas = synthetic_tables(n_skus, meses, lotes, columnas_basura, inicio, seed)
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        titulo = pd.DataFrame([['Forecast Actual - Abastecimiento ACO'], [f"Generado {pd.Timestamp.now():%d-%m-%Y}"]])
+        titulo.to_excel(writer, sheet_name='Fcst Actual', header=False, index=False)
+        hojas['Fcst Actual'].to_excel(writer, sheet_name='Fcst Actual', startrow=FILAS_TITULO, index=False)
+        hojas['StockACOL'].to_excel(writer, sheet_name='StockACOL', index=False)
+        hojas['Master Actual'].to_excel(writer, sheet_name='Master Actual', index=False)
+    return {hoja: tabla.shape for hoja, tabla in hojas.items()}
+
+
+def add_dispatches(df, master):
+    """
+    Despachos KL del formato largo desde la hoja Master Actual sintética (columnas 'Desp <Mes Año>').
+    load_from_excel todavía no lee los despachos del Master, así que sin esto las métricas de WAPE,
+    baselines y señal de rastreo no tendrían datos.
+    """
+    columnas = [c for c in master.columns if str(c).startswith('Desp ')]
+    if df is None or df.empty or not columnas:
+        return df
+    largo = master.melt(id_vars='Material', value_vars=columnas, var_name='Mes', value_name='Despachos KL')
+    meses = {f"{m} {a}": (a, i + 1) for a in range(1990, 2100) for i, m in enumerate(MESES_ES)
+             if f"Desp {m} {a}" in columnas}
+    largo['Fecha'] = [pd.Timestamp(*meses[c[5:]], 1) for c in largo['Mes']]
+    largo['Material'] = largo['Material'].astype(str)
+    df = df.drop(columns=['Despachos KL'], errors='ignore')
+    df = df.merge(largo[['Material', 'Fecha', 'Despachos KL']], on=['Material', 'Fecha'], how='left')
+    df['Despachos KL'] = df['Despachos KL'].fillna(0)
+    return df
@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+# Traza de cada rerun del dashboard (una línea JSON por rerun, solo se agregan líneas)
+TRACE_PATH = PROJECT_DIR / "rendimiento" / "trazas.jsonl"
+
+# Métricas acumuladas del proceso en formato de texto de Prometheus (para el scraper local)
+METRICS_PATH = PROJECT_DIR / "rendimiento" / "metricas.prom"
+METRICS_INTERVAL_SECONDS = 15
+
+# DASHBOARD_TIMING=0 deja de escribir la traza y las métricas (el panel de rendimiento sigue disponible)
+TIMING_WRITE = os.environ.get('DASHBOARD_TIMING', '1') != '0'
+
+# Prefijos de las etapas
+ETAPA_PAGINA, ETAPA_SECCION, ETAPA_CACHE = 'pagina.', 'seccion.', 'cache.'
+
+# Cada hilo de Streamlit ejecuta una sesión a la vez: la traza en curso es del hilo.
+# Sin traza en curso (línea de comandos, API, procesos de lectura) las mediciones no hacen nada.
+_local = threading.local()
+
+_metricas = {
+    'lock': threading.Lock(),
+    'reruns': 0,
+    'segundos': 0.0,
+    'etapas': {},        # etapa -> [cantidad, segundos, filas]
+    'cache': {},         # nombre -> [aciertos, fallos]
+    'escritura': 0.0,
+}
+
+
+def start_trace(**atributos):
+    """
+    Inicia la traza del rerun en curso (atributos: sesión, página...).
+    """
+    _local.traza = {
+        'atributos': atributos, 'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'), 't0': time.perf_counter(),
+        'etapas': [], 'abiertas': [], 'cache': {}, 'calculos': [],
+    }
+
+
+def current_trace():
+    return getattr(_local, 'traza', None)
+
+
+def annotate(**atributos):
+    """
+    Agrega atributos a la traza en curso (ej. la página elegida).
+    """
+    traza = current_trace()
+    if traza is not None:
+        traza['atributos'].update(atributos)
+
+
+def _rows(valor):
+    """
+    Filas de un resultado (DataFrame, Series o el primer elemento de una tupla); None si no aplica.
+    """
+    if isinstance(valor, tuple) and valor:
+        valor = valor[0]
+    forma = getattr(valor, 'shape', None)
+    return int(forma[0]) if forma else None
+
+
+def _open(traza, nombre, filas=None, seccion=False):
+    registro = {'etapa': nombre, 'nivel': len(traza['abiertas']), 'desde': time.perf_counter() - traza['t0'],
+                'filas': filas}
+    if seccion:
+        registro['seccion'] = True
+    traza['abiertas'].append(registro)
+    return registro
+
+
+def _close(traza):
+    registro = traza['abiertas'].pop()
+    registro['segundos'] = time.perf_counter() - traza['t0'] - registro['desde']
+    traza['etapas'].append(registro)
+
+
+@contextmanager
+def stage(nombre, filas=None):
+    """
+    Mide una etapa del rerun en curso. Entrega el registro de la etapa para agregar datos
+    (ej. registro['filas'] = len(df)). Las etapas pueden anidarse.
+    """
+    traza = current_trace()
+    if traza is None:
+        yield {}
+        return
+    registro = _open(traza, nombre, filas)
+    try:
+        yield registro
+    finally:
+        # Las secciones abiertas dentro de la etapa terminan con ella
+        while traza['abiertas'] and traza['abiertas'][-1] is not registro:
+            _close(traza)
+        if traza['abiertas']:
+            _close(traza)
+
+
+def section(titulo):
+    """
+    Marca el comienzo de una sección (de una página o de la app): la sección anterior del mismo nivel
+    termina aquí, y la última al terminar la etapa que la contiene (o con end_section).
+    """
+    traza = current_trace()
+    if traza is None:
+        return
+    end_section()
+    _open(traza, ETAPA_SECCION + titulo, seccion=True)
+
+
+def end_section():
+    """
+    Termina la sección abierta, si la hay.
+    """
+    traza = current_trace()
+    if traza is not None and traza['abiertas'] and traza['abiertas'][-1].get('seccion'):
+        _close(traza)
+
+
+def timed(nombre=None):
+    """
+    Decorador: mide cada llamada como etapa (por defecto con el nombre de la función) y registra
+    las filas del resultado.
+    """
+    def decorar(func):
+        etapa = nombre or func.__name__
+
+        @functools.wraps(func)
+        def medida(*args, **kwargs):
+            if current_trace() is None:
+                return func(*args, **kwargs)
+            with stage(etapa) as registro:
+                resultado = func(*args, **kwargs)
+                registro['filas'] = _rows(resultado)
+            return resultado
+        return medida
+    return decorar
+
+
+def cache_event(nombre, acierto):
+    """
+    Registra un acierto o fallo de caché en el rerun en curso.
+    """
+    traza = current_trace()
+    if traza is not None:
+        conteo = traza['cache'].setdefault(nombre, [0, 0])
+        conteo[0 if acierto else 1] += 1
+
+
+def cache_miss():
+    """
+    Llamada desde el cuerpo de una función cacheada: si se ejecuta, la llamada fue un fallo de caché.
+    """
+    traza = current_trace()
+    if traza is not None and traza['calculos']:
+        traza['calculos'][-1] = True
+
+
+def traced_cache(nombre):
+    """
+    Decorador sobre una función de st.cache_data / st.cache_resource cuyo cuerpo llama a cache_miss():
+    mide cada llamada como etapa 'cache.<nombre>' y registra si fue acierto o fallo.
+    """
+    def decorar(func):
+        @functools.wraps(func)
+        def medida(*args, **kwargs):
+            traza = current_trace()
+            if traza is None:
+                return func(*args, **kwargs)
+            traza['calculos'].append(False)
+            try:
+                with stage(ETAPA_CACHE + nombre) as registro:
+                    resultado = func(*args, **kwargs)
+                    registro['filas'] = _rows(resultado)
+            finally:
+                calculado = traza['calculos'].pop()
+            registro['acierto'] = not calculado
+            cache_event(nombre, not calculado)
+            return resultado
+        if hasattr(func, 'clear'):
+            medida.clear = func.clear
+        return medida
+    return decorar
+
+
+def finish_trace(path=TRACE_PATH, metrics_path=METRICS_PATH):
+    """
+    Termina la traza del rerun en curso: la agrega al archivo JSONL, acumula las métricas del proceso
+    y reescribe el archivo de Prometheus cada METRICS_INTERVAL_SECONDS. Retorna la traza
+    {'fecha', 'segundos', 'etapas' (en orden de inicio), 'cache', ...atributos} o None si no había.
+    """
+    traza = current_trace()
+    if traza is None:
+        return None
+    _local.traza = None
+    while traza['abiertas']:
+        # Secciones abiertas y etapas interrumpidas (st.rerun, st.stop o una excepción)
+        _close(traza)
+    resultado = dict(traza['atributos'], fecha=traza['fecha'], segundos=time.perf_counter() - traza['t0'],
+                     etapas=sorted(traza['etapas'], key=lambda e: e['desde']), cache=traza['cache'])
+    _accumulate(resultado)
+    if TIMING_WRITE:
+        try:
+            _append_trace(resultado, path)
+            _write_metrics_throttled(metrics_path)
+        except OSError:
+            pass
+    return resultado
+
+
+def _accumulate(traza):
+    with _metricas['lock']:
+        _metricas['reruns'] += 1
+        _metricas['segundos'] += traza['segundos']
+        for etapa in traza['etapas']:
+            acumulado = _metricas['etapas'].setdefault(etapa['etapa'], [0, 0.0, 0])
+            acumulado[0] += 1
+            acumulado[1] += etapa['segundos']
+            acumulado[2] += etapa['filas'] or 0
+        for nombre, (aciertos, fallos) in traza['cache'].items():
+            acumulado = _metricas['cache'].setdefault(nombre, [0, 0])
+            acumulado[0] += aciertos
+            acumulado[1] += fallos
+
+
+def _append_trace(traza, path):
+    linea = json.dumps(traza, ensure_ascii=False, default=str) + '\n'
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with _metricas['lock']:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(linea)
+
+
+def _label(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def metrics_text():
+    """
+    Métricas acumuladas del proceso en formato de texto de Prometheus.
+    """
+    with _metricas['lock']:
+        etapas = {k: list(v) for k, v in _metricas['etapas'].items()}
+        cache = {k: list(v) for k, v in _metricas['cache'].items()}
+        reruns, segundos = _metricas['reruns'], _metricas['segundos']
+    lineas = [
+        '# HELP dashboard_rerun_seconds Duración de los reruns del dashboard.',
+        '# TYPE dashboard_rerun_seconds summary',
+        f'dashboard_rerun_seconds_sum {segundos:.6f}',
+        f'dashboard_rerun_seconds_count {reruns}',
+        '# HELP dashboard_stage_seconds Duración de cada etapa, cálculo y sección de página.',
+        '# TYPE dashboard_stage_seconds summary',
+    ]
+    for etapa, (cantidad, total, _) in sorted(etapas.items()):
+        lineas.append(f'dashboard_stage_seconds_sum{{etapa="{_label(etapa)}"}} {total:.6f}')
+        lineas.append(f'dashboard_stage_seconds_count{{etapa="{_label(etapa)}"}} {cantidad}')
+    lineas += ['# HELP dashboard_stage_rows_total Filas producidas por cada etapa.',
+               '# TYPE dashboard_stage_rows_total counter']
+    lineas += [f'dashboard_stage_rows_total{{etapa="{_label(etapa)}"}} {filas}'
+               for etapa, (_, _, filas) in sorted(etapas.items()) if filas]
+    lineas += ['# HELP dashboard_cache_requests_total Llamadas a funciones cacheadas por resultado.',
+               '# TYPE dashboard_cache_requests_total counter']
+    for nombre, (aciertos, fallos) in sorted(cache.items()):
+        lineas.append(f'dashboard_cache_requests_total{{cache="{_label(nombre)}",resultado="acierto"}} {aciertos}')
+        lineas.append(f'dashboard_cache_requests_total{{cache="{_label(nombre)}",resultado="fallo"}} {fallos}')
+    return '\n'.join(lineas) + '\n'
+
+
+def write_metrics(path=METRICS_PATH):
+    """
+    Escribe las métricas acumuladas (reemplazo atómico: el scraper nunca lee un archivo a medias).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporal = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporal.write_text(metrics_text(), encoding='utf-8')
+    os.replace(temporal, path)
+
+
+def _write_metrics_throttled(path):
+    with _metricas['lock']:
+        ahora = time.monotonic()
+        if ahora - _metricas['escritura'] < METRICS_INTERVAL_SECONDS and _metricas['reruns'] > 1:
+            return
+        _metricas['escritura'] = ahora
+    write_metrics(path)
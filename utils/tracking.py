@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from .matrices import actual_months
+from .timing import timed
+
+
+# Límite habitual de la señal de rastreo: |TS| > 4 indica sesgo sostenido
+DEFAULT_TS_LIMIT = 4.0
+
+
+def tracking_signal(materiales, fechas, errores, validos):
+    """
+    Señal de rastreo por SKU y mes desde las matrices de error (n_sku, n_mes).
+    TS = error acumulado / MAD, con MAD = promedio de errores absolutos hasta ese mes;
+    los meses no válidos no suman error ni cuentan como observación.
+    """
+    errores = np.where(validos, errores, 0.0)
+
+    cfe = np.cumsum(errores, axis=1)
+    sum_abs = np.cumsum(np.abs(errores), axis=1)
+    n = np.cumsum(validos, axis=1)
+
+    mad = np.where(n > 0, sum_abs / np.maximum(n, 1), 0)
+    ts = np.where(mad > 0, cfe / np.where(mad > 0, mad, 1), 0.0)
+    ts = np.where(n > 0, ts, np.nan)
+
+    return {
+        'materiales': np.asarray(materiales),
+        'fechas': pd.DatetimeIndex(fechas),
+        'cfe': errores.sum(axis=1),                # error acumulado (Despachos - FCST)
+        'sum_abs': np.abs(errores).sum(axis=1),    # suma de errores absolutos
+        'n': validos.sum(axis=1).astype(float),    # meses con despachos registrados
+        'ts': ts,                                  # señal de rastreo por SKU y mes
+    }
+
+
+@timed()
+def tracking_signal_from_matrices(matrices, hoy=None):
+    """
+    Calcula la señal de rastreo desde las matrices SKU × mes.
+    Solo cuentan los meses con despachos registrados (ver matrices.actual_months): un mes futuro
+    trae despachos en cero y sumaría -FCST como si fuera error.
+    """
+    errores = matrices['valores']['Despachos KL'] - matrices['valores']['FCST']
+    validos = matrices['presente'] & actual_months(matrices, hoy=hoy)[None, :]
+    return tracking_signal(matrices['materiales'], matrices['fechas'], errores, validos)
+
+
+@timed()
+def tracking_alerts(state, atributos=None, limite=DEFAULT_TS_LIMIT, materiales=None):
+    """
+    Tabla de señal de rastreo por SKU con la alerta de sesgo.
+    TS > límite: Sub-forecast (se despacha más de lo proyectado).
+    TS < -límite: Sobre-forecast (se proyecta más de lo que se despacha).
+    """
+    n = state['n']
+    ts_actual = state['ts'][:, -1] if state['ts'].shape[1] else np.full(len(n), np.nan)
+
+    tabla = pd.DataFrame({
+        'Material': state['materiales'],
+        'Tracking Signal': ts_actual,
+        'Error Acumulado': state['cfe'],
+        'MAD': np.where(n > 0, state['sum_abs'] / np.maximum(n, 1), np.nan),
+        'Meses': n.astype(int),
+    })
+    if atributos is not None and 'Origen' in atributos.columns:
+        tabla.insert(1, 'Origen', atributos['Origen'].reindex(tabla['Material']).values)
+
+    tabla['Alerta'] = np.select(
+        [tabla['Tracking Signal'] > limite, tabla['Tracking Signal'] < -limite],
+        ['Sub-forecast', 'Sobre-forecast'],
+        default='OK'
+    )
+
+    if materiales is not None:
+        tabla = tabla[tabla['Material'].isin(materiales)]
+
+    tabla = tabla[tabla['Meses'] > 0]
+    return tabla.assign(_orden=tabla['Tracking Signal'].abs()).sort_values('_orden', ascending=False).drop(columns='_orden').round(2)
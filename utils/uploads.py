@@ -0,0 +1,288 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+
+from .data_loader import (
+    inspect_workbook, read_forecast_sheet, read_stock_sheet, read_generic_sheet, consolidate_sheets,
+    read_forecast_sheet_chunked, consolidate_spilled, read_spilled,
+)
+from .memory_guard import (
+    memory_budgets, estimate_ingest, plan_ingest, MODO_MEMORIA, MODO_DISCO, MODO_ESPERA, MODO_RECHAZO,
+)
+
+
+# Procesos de lectura compartidos por todas las sesiones (openpyxl retiene el GIL: en hilos frenaría al servidor)
+UPLOAD_WORKERS = 2
+
+# Trabajos de carga recordados (los más antiguos se descartan)
+MAX_UPLOAD_JOBS = 4
+
+# Segundos que una carga espera a que otras liberen memoria antes de rechazarse
+MEMORY_WAIT_SECONDS = 300
+
+# Estado de cada hoja dentro de un trabajo
+HOJA_PENDIENTE, HOJA_LEYENDO, HOJA_LISTA = 'pendiente', 'leyendo', 'lista'
+
+# Etiqueta visible de cada tipo de hoja
+TIPOS_HOJA = {'forecast': 'Forecast', 'stock': 'Inventario', 'generica': 'Primera hoja', 'consolidado': 'Consolidación en disco'}
+
+
+def _new_pool():
+    """
+    Pool de procesos de lectura ('spawn': fork no es seguro desde el servidor multi-hilo de Streamlit).
+    """
+    return ProcessPoolExecutor(max_workers=UPLOAD_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
+
+def new_upload_store():
+    """
+    Almacén de trabajos de carga: pool de procesos, trabajos por clave, presupuestos de memoria y lock.
+    """
+    return {'pool': _new_pool(), 'trabajos': {}, 'presupuestos': memory_budgets(), 'lock': threading.Lock()}
+
+
+def _read_sheet(path, tipo, hoja):
+    """
+    Lee una hoja según su tipo (se ejecuta en un proceso del pool).
+    """
+    if tipo == 'forecast':
+        return read_forecast_sheet(path, hoja)
+    if tipo == 'stock':
+        return read_stock_sheet(path, hoja)
+    return read_generic_sheet(path, hoja)
+
+
+def _update(store, trabajo, **cambios):
+    """
+    Actualiza un trabajo bajo el lock; 'version' cambia en cada actualización visible.
+    """
+    with store['lock']:
+        trabajo.update(cambios)
+        trabajo['version'] += 1
+
+
+def _memory_in_use(store, trabajo):
+    """
+    Memoria reservada por los demás trabajos (global y de la misma sesión). Llamar con el lock tomado.
+    """
+    otros = [t for t in store['trabajos'].values() if t is not trabajo]
+    return (sum(t['reserva'] for t in otros),
+            sum(t['reserva'] for t in otros if t['sesion'] == trabajo['sesion']))
+
+
+def _admit(store, trabajo, estimacion, espera=MEMORY_WAIT_SECONDS):
+    """
+    Decide el modo de lectura y reserva su pico de memoria. Si otras cargas ocupan el presupuesto
+    global se espera (hasta 'espera' segundos) a que terminen. Retorna MODO_MEMORIA, MODO_DISCO o MODO_RECHAZO.
+    """
+    limite = time.time() + espera
+    while True:
+        with store['lock']:
+            uso_global, uso_sesion = _memory_in_use(store, trabajo)
+            modo = plan_ingest(estimacion, uso_global, uso_sesion, store['presupuestos'])
+            if modo == MODO_ESPERA and time.time() > limite:
+                modo = MODO_RECHAZO
+            if modo in (MODO_MEMORIA, MODO_DISCO):
+                trabajo['reserva'] = estimacion['pico_memoria' if modo == MODO_MEMORIA else 'pico_disco']
+            if modo != trabajo['modo']:
+                trabajo.update(modo=modo, uso=(uso_global, uso_sesion))
+                trabajo['version'] += 1
+        if modo != MODO_ESPERA:
+            return modo
+        time.sleep(1)
+
+
+def _parse_in_memory(store, trabajo, path, plan):
+    """
+    Lee las hojas completas en el pool. Al terminar el Forecast publica una vista previa
+    (sin inventario); retorna el dataset consolidado (mismo resultado que load_from_excel).
+    """
+    pool = store['pool']
+    _update(store, trabajo, hojas={tipo: HOJA_LEYENDO for tipo in plan})
+    futuros = {pool.submit(_read_sheet, path, tipo, hoja): tipo for tipo, hoja in plan.items()}
+
+    leidas = {}
+    for futuro in as_completed(futuros):
+        tipo = futuros[futuro]
+        leidas[tipo] = futuro.result()
+        hojas_estado = dict(trabajo['hojas'], **{tipo: HOJA_LISTA})
+        if tipo == 'forecast' and len(leidas) < len(plan) and not leidas['forecast'].empty:
+            _update(store, trabajo, hojas=hojas_estado, vista_previa=consolidate_sheets(leidas['forecast']))
+        else:
+            _update(store, trabajo, hojas=hojas_estado)
+
+    if 'generica' in leidas:
+        return leidas['generica']
+    if leidas['forecast'].empty:
+        return _read_generic(store, trabajo, path)
+    return consolidate_sheets(leidas['forecast'], leidas.get('stock'))
+
+
+def _parse_spilled(store, trabajo, path, plan):
+    """
+    Lectura para libros que no caben en memoria: el Forecast se despivota por bloques a Parquet,
+    se consolida con el inventario también por bloques y solo el resultado final se carga.
+    Sin vista previa (duplicaría la memoria que se quiere ahorrar).
+    """
+    pool = store['pool']
+    directorio = tempfile.mkdtemp(prefix='dashboard_aco_carga_')
+    try:
+        path_fcst = os.path.join(directorio, 'forecast.parquet')
+        path_final = os.path.join(directorio, 'consolidado.parquet')
+        _update(store, trabajo, hojas=dict({tipo: HOJA_LEYENDO for tipo in plan}, consolidado=HOJA_PENDIENTE))
+        futuros = {pool.submit(read_forecast_sheet_chunked, path, plan['forecast'], path_fcst): 'forecast'}
+        if 'stock' in plan:
+            futuros[pool.submit(_read_sheet, path, 'stock', plan['stock'])] = 'stock'
+
+        leidas = {}
+        for futuro in as_completed(futuros):
+            tipo = futuros[futuro]
+            leidas[tipo] = futuro.result()
+            _update(store, trabajo, hojas=dict(trabajo['hojas'], **{tipo: HOJA_LISTA}))
+
+        if not leidas['forecast']:
+            return _read_generic(store, trabajo, path)
+        _update(store, trabajo, hojas=dict(trabajo['hojas'], consolidado=HOJA_LEYENDO))
+        pool.submit(consolidate_spilled, path_fcst, leidas.get('stock'), path_final).result()
+        _update(store, trabajo, hojas=dict(trabajo['hojas'], consolidado=HOJA_LISTA))
+        return read_spilled(path_final)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def _read_generic(store, trabajo, path):
+    """
+    Igual que load_from_excel: sin Forecast utilizable se usa la primera hoja.
+    """
+    _update(store, trabajo, hojas=dict(trabajo['hojas'], generica=HOJA_LEYENDO))
+    return store['pool'].submit(_read_sheet, path, 'generica', 0).result()
+
+
+def _parse_workbook(store, trabajo, path):
+    """
+    Inspecciona el libro, estima su tamaño y lo lee en memoria o por bloques en disco según el presupuesto.
+    Retorna el dataset, o None si no cabe (el informe de tamaño queda en el trabajo).
+    """
+    inspeccion = store['pool'].submit(inspect_workbook, path).result()
+    estimacion = estimate_ingest(inspeccion, os.path.getsize(path))
+    _update(store, trabajo, informe=estimacion)
+
+    plan = {tipo: hoja for tipo, hoja in inspeccion['hojas'].items() if hoja}
+    if 'forecast' not in plan:
+        plan = {'generica': 0}
+
+    modo = _admit(store, trabajo, estimacion)
+    if modo == MODO_RECHAZO:
+        return None
+    if modo == MODO_DISCO and 'forecast' in plan:
+        return _parse_spilled(store, trabajo, path, plan)
+    return _parse_in_memory(store, trabajo, path, plan)
+
+
+def _run_upload(store, trabajo, path):
+    """
+    Hilo de un trabajo de carga: solo espera a los procesos y consolida (barato), así el servidor
+    sigue atendiendo a las demás sesiones. Si un proceso del pool muere, el pool se recrea y se reintenta una vez.
+    Al terminar, la reserva de memoria queda en el tamaño estimado del dataset (que sigue en memoria).
+    """
+    try:
+        for intento in range(2):
+            try:
+                resultado = _parse_workbook(store, trabajo, path)
+                if resultado is None:
+                    _update(store, trabajo, estado='error', reserva=0, fin=time.time(),
+                            error="El libro es demasiado grande para la memoria disponible.")
+                else:
+                    _update(store, trabajo, estado='listo', resultado=resultado, fin=time.time(),
+                            reserva=trabajo['informe']['resultado'])
+                return
+            except BrokenProcessPool:
+                with store['lock']:
+                    store['pool'] = _new_pool()
+                if intento:
+                    raise
+    except MemoryError:
+        _update(store, trabajo, estado='error', reserva=0, fin=time.time(),
+                error="Memoria insuficiente para leer el libro.")
+    except Exception as e:
+        _update(store, trabajo, estado='error', reserva=0, error=str(e) or type(e).__name__, fin=time.time())
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def start_upload(store, clave, contenido, nombre='', sesion=None):
+    """
+    Inicia (una sola vez por clave) la lectura en segundo plano de un libro subido.
+    contenido son los bytes del archivo; se escriben a un temporal que leen los procesos del pool.
+    sesion identifica a quien sube el archivo para el presupuesto de memoria por sesión: sus cargas
+    terminadas anteriores se descartan (una sesión muestra un solo archivo subido a la vez).
+    Retorna el estado actual del trabajo (ver upload_status).
+    """
+    with store['lock']:
+        if clave in store['trabajos']:
+            return _snapshot(store['trabajos'][clave])
+
+        sufijo = os.path.splitext(nombre)[1] or '.xlsx'
+        descriptor, path = tempfile.mkstemp(suffix=sufijo)
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(contenido)
+
+        trabajo = {
+            'clave': clave, 'nombre': nombre, 'estado': 'leyendo', 'hojas': {}, 'vista_previa': None,
+            'resultado': None, 'error': None, 'inicio': time.time(), 'fin': None, 'version': 0,
+            'sesion': sesion, 'modo': None, 'informe': None, 'uso': (0, 0), 'reserva': 0,
+            'presupuestos': store['presupuestos'],
+        }
+        # Descartar las cargas terminadas anteriores de la misma sesión y luego las más antiguas
+        terminados = [k for k, t in store['trabajos'].items() if t['estado'] != 'leyendo']
+        for k in [k for k in terminados if sesion is not None and store['trabajos'][k]['sesion'] == sesion]:
+            del store['trabajos'][k]
+            terminados.remove(k)
+        for k in terminados[:max(len(store['trabajos']) + 1 - MAX_UPLOAD_JOBS, 0)]:
+            del store['trabajos'][k]
+        store['trabajos'][clave] = trabajo
+
+    threading.Thread(target=_run_upload, args=(store, trabajo, path), daemon=True).start()
+    return upload_status(store, clave)
+
+
+def _snapshot(trabajo):
+    """
+    Copia superficial del trabajo (los DataFrames no se modifican una vez publicados).
+    """
+    return dict(trabajo, hojas=dict(trabajo['hojas']))
+
+
+def upload_status(store, clave):
+    """
+    Estado de un trabajo: 'estado' ('leyendo', 'listo' o 'error'), 'hojas' (tipo -> estado),
+    'vista_previa' y 'resultado' (DataFrames o None), 'error', 'version' y tiempos. None si no existe.
+    'modo' es el modo de lectura (memoria, disco, espera o rechazo), 'informe' la estimación de tamaño
+    (ver memory_guard.estimate_ingest), 'presupuestos' los límites y 'uso' la memoria (global, sesión)
+    de las demás cargas al decidir.
+    """
+    with store['lock']:
+        trabajo = store['trabajos'].get(clave)
+        return _snapshot(trabajo) if trabajo is not None else None
+
+
+def upload_progress(estado):
+    """
+    Fracción de hojas leídas (0 a 1) de un trabajo.
+    """
+    if estado is None:
+        return 0.0
+    if estado['estado'] != 'leyendo':
+        return 1.0
+    hojas = estado['hojas']
+    if not hojas:
+        return 0.0
+    return sum(1 for e in hojas.values() if e == HOJA_LISTA) / (len(hojas) + 1)
@@ -0,0 +1,194 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from .calculations import ESTADOS_COBERTURA, calculate_cobertura_array, categorize_cobertura_series
+from .granularity import month_codes
+from .timing import timed
+
+
+# Métricas que se comparan entre versiones (si existen en ambos libros)
+DIFF_VALUE_COLUMNS = ['FCST', 'Inv Kg-L', 'Despachos KL']
+
+CAMBIOS = ['Nuevo', 'Eliminado', 'Modificado', 'Sin cambio']
+
+
+def version_label(nombre):
+    """
+    Extrae la versión del nombre del archivo (ej. 'Master ACOL FEB-2026 V2.xlsx' -> 'FEB-2026 V2').
+    Si no se reconoce el patrón se usa el nombre sin extensión.
+    """
+    base = re.sub(r'\.xlsx?$', '', str(nombre), flags=re.IGNORECASE)
+    encontrado = re.search(r'([A-Z]{3}-\d{4})?\s*(V\d+)', base, flags=re.IGNORECASE)
+    if encontrado:
+        return encontrado.group(0).strip().upper()
+    return base
+
+
+def _keyed_sums(df, mat_codes, value_cols, n_meses, mes_min):
+    """
+    Agrega una versión por clave entera (material × mes). Filas duplicadas se suman.
+    Retorna (claves únicas ordenadas, dict columna -> suma por clave, estado por clave).
+    """
+    meses = month_codes(df['Fecha']) - mes_min
+    claves = mat_codes.astype(np.int64) * n_meses + meses
+    unicas, inversa = np.unique(claves, return_inverse=True)
+
+    sumas = {}
+    for col in value_cols:
+        valores = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy() if col in df.columns else np.zeros(len(df))
+        sumas[col] = np.bincount(inversa, weights=valores, minlength=len(unicas))
+
+    estados = np.full(len(unicas), 'Sin Dato', dtype=object)
+    if 'Estado_Cobertura' in df.columns:
+        # Estado de la última fila de cada clave (primera aparición en el recorrido inverso)
+        _, desde_el_final = np.unique(claves[::-1], return_index=True)
+        ultima = len(claves) - 1 - desde_el_final
+        estados = df['Estado_Cobertura'].astype(object).fillna('Sin Dato').to_numpy()[ultima]
+    return unicas, sumas, estados
+
+
+@timed()
+def compare_versions(df_anterior, df_actual, value_cols=None, tolerancia=1e-6):
+    """
+    Compara dos versiones del libro por (Material, Fecha).
+
+    Ambas versiones se codifican con el mismo diccionario de materiales y códigos enteros de mes,
+    de modo que cada par Material/Fecha es una sola clave int64. El cruce es un hash join sobre
+    esas claves (pd.Index.get_indexer), sin merges sobre texto.
+
+    Retorna un diccionario con:
+    - 'detalle': una fila por Material/Fecha de la unión con valores V1, V2, deltas, estados y tipo de cambio
+    - 'por_sku': una fila por SKU con totales, deltas, estado de cobertura en cada versión y tipo de cambio
+    - 'por_mes': totales de FCST/Inventario por mes en ambas versiones
+    - 'resumen': conteos de SKUs nuevos, eliminados, modificados y con cambio de estado
+    """
+    for df in (df_anterior, df_actual):
+        if df is None or df.empty or 'Material' not in df.columns or 'Fecha' not in df.columns:
+            return None
+
+    if value_cols is None:
+        value_cols = [c for c in DIFF_VALUE_COLUMNS if c in df_anterior.columns or c in df_actual.columns]
+
+    df_anterior = df_anterior.dropna(subset=['Material', 'Fecha'])
+    df_actual = df_actual.dropna(subset=['Material', 'Fecha'])
+
+    # Diccionario común de materiales y rango común de meses
+    materiales_ant = df_anterior['Material'].astype(str).str.strip()
+    materiales_act = df_actual['Material'].astype(str).str.strip()
+    codigos, materiales = pd.factorize(pd.concat([materiales_ant, materiales_act], ignore_index=True), sort=True)
+    cod_ant, cod_act = codigos[:len(materiales_ant)], codigos[len(materiales_ant):]
+
+    meses_ant = month_codes(df_anterior['Fecha'])
+    meses_act = month_codes(df_actual['Fecha'])
+    mes_min = min(meses_ant.min(), meses_act.min())
+    n_meses = max(meses_ant.max(), meses_act.max()) - mes_min + 1
+
+    claves_ant, sumas_ant, estados_ant = _keyed_sums(df_anterior, cod_ant, value_cols, n_meses, mes_min)
+    claves_act, sumas_act, estados_act = _keyed_sums(df_actual, cod_act, value_cols, n_meses, mes_min)
+
+    # Hash join: posición de cada clave de la unión en cada versión (-1 si no existe)
+    union = np.union1d(claves_ant, claves_act)
+    pos_ant = pd.Index(claves_ant).get_indexer(union)
+    pos_act = pd.Index(claves_act).get_indexer(union)
+    en_ant, en_act = pos_ant >= 0, pos_act >= 0
+
+    mat_idx = union // n_meses
+    detalle = pd.DataFrame({
+        'Material': np.asarray(materiales)[mat_idx],
+        'Fecha': pd.to_datetime((union % n_meses + mes_min).astype('datetime64[M]')),
+    })
+
+    modificado = np.zeros(len(union), dtype=bool)
+    for col in value_cols:
+        v1 = np.where(en_ant, sumas_ant[col][np.maximum(pos_ant, 0)], 0.0)
+        v2 = np.where(en_act, sumas_act[col][np.maximum(pos_act, 0)], 0.0)
+        detalle[f'{col} V1'] = v1
+        detalle[f'{col} V2'] = v2
+        detalle[f'Δ {col}'] = v2 - v1
+        modificado |= np.abs(v2 - v1) > tolerancia
+
+    estado_v1 = np.where(en_ant, estados_ant[np.maximum(pos_ant, 0)], 'Sin Dato')
+    estado_v2 = np.where(en_act, estados_act[np.maximum(pos_act, 0)], 'Sin Dato')
+    detalle['Estado V1'] = estado_v1
+    detalle['Estado V2'] = estado_v2
+    modificado |= estado_v1 != estado_v2
+
+    cambio = np.select([~en_ant, ~en_act, modificado], ['Nuevo', 'Eliminado', 'Modificado'], default='Sin cambio')
+    detalle['Cambio'] = pd.Categorical(cambio, categories=CAMBIOS)
+
+    # Nivel SKU: presencia en cada versión, totales y estado por cobertura del SKU
+    n_sku = len(materiales)
+    sku_en_ant = np.bincount(mat_idx[en_ant], minlength=n_sku) > 0
+    sku_en_act = np.bincount(mat_idx[en_act], minlength=n_sku) > 0
+    meses_sku_ant = np.maximum(np.bincount(mat_idx[en_ant], minlength=n_sku), 1)
+    meses_sku_act = np.maximum(np.bincount(mat_idx[en_act], minlength=n_sku), 1)
+
+    por_sku = pd.DataFrame({'Material': np.asarray(materiales)})
+    for col in value_cols:
+        if col == 'Inv Kg-L':
+            # El inventario es una foto repetida en cada mes: por SKU se toma el máximo
+            v1 = np.zeros(n_sku)
+            v2 = np.zeros(n_sku)
+            np.maximum.at(v1, mat_idx, detalle[f'{col} V1'].to_numpy())
+            np.maximum.at(v2, mat_idx, detalle[f'{col} V2'].to_numpy())
+        else:
+            v1 = np.bincount(mat_idx, weights=detalle[f'{col} V1'].to_numpy(), minlength=n_sku)
+            v2 = np.bincount(mat_idx, weights=detalle[f'{col} V2'].to_numpy(), minlength=n_sku)
+        por_sku[f'{col} V1'] = v1
+        por_sku[f'{col} V2'] = v2
+        por_sku[f'Δ {col}'] = v2 - v1
+        if col == 'FCST':
+            por_sku['Δ FCST %'] = np.where(v1 != 0, (v2 - v1) / np.where(v1 != 0, np.abs(v1), 1) * 100, np.nan)
+
+    if 'FCST' in value_cols and 'Inv Kg-L' in value_cols:
+        for sufijo, en_version, n_meses_sku in (('V1', sku_en_ant, meses_sku_ant), ('V2', sku_en_act, meses_sku_act)):
+            dias = calculate_cobertura_array(por_sku[f'Inv Kg-L {sufijo}'].to_numpy(), por_sku[f'FCST {sufijo}'].to_numpy() / n_meses_sku)
+            estado = categorize_cobertura_series(dias).to_numpy()
+            estado[~en_version] = 'Sin Dato'
+            por_sku[f'Cob(D) {sufijo}'] = np.where(en_version, np.round(dias, 1), np.nan)
+            por_sku[f'Estado {sufijo}'] = estado
+        cambio_estado = (por_sku['Estado V1'] != por_sku['Estado V2']).to_numpy() & sku_en_ant & sku_en_act
+        por_sku['Cambio Estado'] = np.where(cambio_estado, por_sku['Estado V1'] + ' → ' + por_sku['Estado V2'], '')
+        pasan_a_critico = cambio_estado & (por_sku['Estado V2'] == ESTADOS_COBERTURA[0]).to_numpy()
+    else:
+        cambio_estado = np.zeros(n_sku, dtype=bool)
+        pasan_a_critico = cambio_estado
+        por_sku['Cambio Estado'] = ''
+
+    sku_modificado = np.bincount(mat_idx, weights=(cambio == 'Modificado'), minlength=n_sku) > 0
+    por_sku['Cambio'] = pd.Categorical(
+        np.select([~sku_en_ant, ~sku_en_act, sku_modificado | cambio_estado], ['Nuevo', 'Eliminado', 'Modificado'], default='Sin cambio'),
+        categories=CAMBIOS
+    )
+
+    # Totales por mes
+    mes_idx = union % n_meses
+    meses_unicos, mes_inv = np.unique(mes_idx, return_inverse=True)
+    por_mes = pd.DataFrame({'Fecha': pd.to_datetime((meses_unicos + mes_min).astype('datetime64[M]'))})
+    for col in value_cols:
+        for sufijo in ('V1', 'V2'):
+            por_mes[f'{col} {sufijo}'] = np.bincount(mes_inv, weights=detalle[f'{col} {sufijo}'].to_numpy(), minlength=len(meses_unicos))
+        por_mes[f'Δ {col}'] = por_mes[f'{col} V2'] - por_mes[f'{col} V1']
+
+    resumen = {
+        'skus_v1': int(sku_en_ant.sum()),
+        'skus_v2': int(sku_en_act.sum()),
+        'nuevos': int((por_sku['Cambio'] == 'Nuevo').sum()),
+        'eliminados': int((por_sku['Cambio'] == 'Eliminado').sum()),
+        'modificados': int((por_sku['Cambio'] == 'Modificado').sum()),
+        'cambio_estado': int(cambio_estado.sum()),
+        'pasan_a_critico': int(np.sum(pasan_a_critico)),
+        'celdas_modificadas': int((cambio == 'Modificado').sum()),
+    }
+    for col in value_cols:
+        resumen[f'total_{col}_v1'] = float(por_mes[f'{col} V1'].sum())
+        resumen[f'total_{col}_v2'] = float(por_mes[f'{col} V2'].sum())
+
+    return {
+        'detalle': detalle,
+        'por_sku': por_sku.round({c: 2 for c in por_sku.select_dtypes('number').columns}),
+        'por_mes': por_mes,
+        'resumen': resumen,
+    }
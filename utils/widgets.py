@@ -0,0 +1,213 @@
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+from .calculations import ESTADOS_COBERTURA
+from .grid import PAGE_SIZES, filter_table, sort_positions, page_bounds, style_page
+from .exports import DEFAULT_EXPORT_FORMATS, EXPORT_FORMATS, export_file, safe_name
+from .charts import reduce_figure
+from .cache import cached_figure, background_upload_status
+from .uploads import TIPOS_HOJA, HOJA_LISTA, HOJA_LEYENDO, upload_progress
+from .memory_guard import MODO_DISCO, MODO_ESPERA, format_bytes, size_report
+from .timing import ETAPA_CACHE, stage
+
+
+def paginated_grid(tabla, key, cob_col=None, height=650, orden_inicial=None):
+    """
+    Grilla paginada con filtro y orden del lado del servidor.
+    Solo la página visible se envía al navegador; los colores de cobertura (cob_col)
+    se calculan de forma vectorizada para esas filas. Si la tabla trae 'Estado_Cobertura',
+    el filtro y los colores usan ese estado (umbrales por SKU) en vez de los umbrales fijos.
+    """
+    if tabla is None or tabla.empty:
+        st.info("No hay datos disponibles")
+        return
+
+    con_estado = bool(cob_col) and cob_col in tabla.columns
+    columnas = list(tabla.columns)
+
+    # Fila de controles: filtro, estado de cobertura y orden
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        texto = st.text_input("Filtrar", key=f"{key}_filtro", placeholder="Buscar Material")
+    with col2:
+        estados = st.multiselect("Estado", options=ESTADOS_COBERTURA, key=f"{key}_estado") if con_estado else []
+    with col3:
+        orden = st.selectbox(
+            "Ordenar por", options=columnas,
+            index=columnas.index(orden_inicial) if orden_inicial in columnas else 0,
+            key=f"{key}_orden"
+        )
+    with col4:
+        descendente = st.toggle("Desc.", key=f"{key}_desc")
+
+    posiciones = filter_table(tabla, texto, cob_col=cob_col if con_estado else None, estados=estados)
+    posiciones = sort_positions(tabla, posiciones, orden, ascendente=not descendente)
+
+    # Fila de paginación
+    col1, col2, col3 = st.columns([1, 1, 3])
+    with col1:
+        tamano = st.selectbox("Filas por página", options=PAGE_SIZES, index=1, key=f"{key}_tamano")
+    _, _, n_paginas = page_bounds(len(posiciones), 1, tamano)
+    with col2:
+        pagina = st.number_input("Página", min_value=1, max_value=n_paginas, value=1, step=1, key=f"{key}_pagina")
+    inicio, fin, n_paginas = page_bounds(len(posiciones), pagina, tamano)
+    with col3:
+        st.caption(f"Filas {inicio + 1 if fin else 0:,}–{fin:,} de {len(posiciones):,} · página {min(pagina, n_paginas)} de {n_paginas}")
+
+    visible = tabla.iloc[posiciones[inicio:fin]]
+    st.dataframe(style_page(visible, cob_col if con_estado else None), use_container_width=True, height=height, hide_index=True)
+
+
+def export_buttons(tabla, nombre, key, huella, fecha_col=None, formatos=None):
+    """
+    Exportación bajo demanda: el archivo solo se genera al pulsar "Preparar descarga"
+    y queda cacheado en disco por huella (mismos filtros, mismo archivo).
+    huella identifica el contenido de la tabla sin hashearla (ver exports.export_key).
+    La descarga se ofrece mientras la huella y el formato sean los preparados; si cambian,
+    hay que volver a preparar. Mientras se ofrece, cada rerun lee el archivo preparado.
+    """
+    if tabla is None or tabla.empty:
+        return
+
+    col1, col2 = st.columns([2, 3])
+    with col1:
+        formato = st.selectbox("Formato de descarga", options=formatos or DEFAULT_EXPORT_FORMATS,
+                               key=f"{key}_formato")
+    with col2:
+        st.write("")
+        preparar = st.button("📦 Preparar descarga", key=f"{key}_preparar")
+
+    if preparar:
+        with st.spinner("Generando archivo..."):
+            path = export_file(tabla, huella, nombre, formato, fecha_col)
+        st.session_state[f"{key}_listo"] = {'huella': huella, 'formato': formato, 'path': path}
+
+    listo = st.session_state.get(f"{key}_listo")
+    if listo is None:
+        return
+    if listo['formato'] != formato or listo['huella'] != huella or not os.path.exists(listo['path']):
+        del st.session_state[f"{key}_listo"]
+        return
+
+    extension, mime = EXPORT_FORMATS[formato]
+    with open(listo['path'], 'rb') as archivo:
+        st.download_button(
+            label=f"📥 Descargar {formato}",
+            data=archivo,
+            file_name=f"{safe_name(nombre)}.{extension}",
+            mime=mime,
+            key=f"{key}_descargar"
+        )
+
+
+def plot_chart(fig, cache_key=None):
+    """
+    Muestra una figura plotly reducida para el navegador (ver charts.reduce_figure).
+    Con cache_key (huella de datos + parámetros del gráfico) la figura reducida se reutiliza entre reruns.
+    """
+    with stage(f"grafico.{cache_key.split(':')[0]}" if cache_key else "grafico"):
+        figura = cached_figure(fig, cache_key) if cache_key else reduce_figure(fig)
+        st.plotly_chart(figura, use_container_width=True)
+
+
+def show_notices(avisos):
+    """
+    Muestra los avisos de carga y procesamiento (ver data_loader) con el elemento de su nivel.
+    """
+    for aviso in avisos:
+        getattr(st, aviso['nivel'], st.info)(aviso['mensaje'])
+        if aviso.get('detalle'):
+            st.text(aviso['detalle'])
+
+
+# Intervalo de sondeo de una carga en segundo plano
+UPLOAD_POLL_SECONDS = 1.0
+
+
+def upload_panel(estado):
+    """
+    Progreso de una carga en segundo plano: barra general y estado de cada hoja.
+    """
+    st.progress(upload_progress(estado), text=f"Leyendo {estado['nombre']}...")
+    informe = estado.get('informe')
+    if estado.get('modo') == MODO_ESPERA:
+        st.caption("⏸️ Esperando memoria: otras cargas en curso ocupan el presupuesto")
+    elif informe is not None:
+        modo = " · por bloques en disco" if estado.get('modo') == MODO_DISCO else ""
+        st.caption(f"~{informe['filas_largas']:,} filas · {format_bytes(informe['resultado'])}{modo}")
+    for tipo, hoja in estado['hojas'].items():
+        icono = "✅" if hoja == HOJA_LISTA else "⏳" if hoja == HOJA_LEYENDO else "▫️"
+        st.caption(f"{icono} {TIPOS_HOJA.get(tipo, tipo)}")
+
+
+def upload_size_report(estado):
+    """
+    Informe de tamaño de una carga (estimación del libro y presupuesto de memoria), si existe.
+    """
+    if estado.get('informe') is None:
+        return
+    uso_global, uso_sesion = estado['uso']
+    st.dataframe(
+        size_report(estado['informe'], estado['presupuestos'], uso_global, uso_sesion),
+        hide_index=True, use_container_width=True
+    )
+
+
+def _upload_changed(clave, version):
+    """
+    Relanza la app completa cuando el trabajo de carga publica un cambio (hoja lista, vista previa o fin).
+    """
+    estado = background_upload_status(clave)
+    if estado is not None and estado['version'] != version:
+        st.rerun()
+
+
+if hasattr(st, 'fragment'):
+    _upload_watcher = st.fragment(run_every=UPLOAD_POLL_SECONDS)(_upload_changed)
+else:
+    _upload_watcher = None
+
+
+def watch_upload(estado, bloqueante=False):
+    """
+    Sondea la carga sin bloquear la sesión: con st.fragment solo se re-ejecuta el sondeo cada segundo.
+    En versiones sin fragmentos se espera y relanza (bloqueante, sin dashboard aún) o se ofrece un botón.
+    """
+    if _upload_watcher is not None:
+        _upload_watcher(estado['clave'], estado['version'])
+    elif bloqueante:
+        time.sleep(UPLOAD_POLL_SECONDS)
+        st.rerun()
+    elif st.button("🔄 Cargar datos completos", key="actualizar_carga"):
+        st.rerun()
+
+
+def performance_panel(traza):
+    """
+    Panel opcional "Rendimiento" de la barra lateral: etapas, cálculos y secciones del rerun
+    (ver timing.py) con su duración, filas y resultado de caché.
+    """
+    if traza is None or not st.sidebar.toggle("⏱️ Mostrar rendimiento", key="panel_rendimiento"):
+        return
+    with st.sidebar.expander("⏱️ Rendimiento", expanded=True):
+        aciertos = sum(a for a, _ in traza['cache'].values())
+        fallos = sum(f for _, f in traza['cache'].values())
+        col1, col2 = st.columns(2)
+        col1.metric("Rerun", f"{traza['segundos'] * 1000:,.0f} ms")
+        col2.metric("Caché", f"{aciertos}/{aciertos + fallos}", help="Aciertos / llamadas a funciones cacheadas y precálculo")
+        tabla = pd.DataFrame([{
+            'Etapa': '· ' * etapa['nivel'] + etapa['etapa'],
+            'ms': round(etapa['segundos'] * 1000, 1),
+            'Filas': etapa['filas'],
+            'Caché': ('acierto' if etapa['acierto'] else 'fallo') if 'acierto' in etapa else '',
+        } for etapa in traza['etapas']])
+        if tabla.empty:
+            return
+        tabla['Filas'] = tabla['Filas'].astype('Int64')
+        solo_lentas = st.checkbox("Solo etapas de 10 ms o más", value=True, key="panel_rendimiento_lentas")
+        if solo_lentas:
+            tabla = tabla[(tabla['ms'] >= 10) | tabla['Etapa'].str.contains(ETAPA_CACHE, regex=False)]
+        st.dataframe(tabla, hide_index=True, use_container_width=True, height=400)
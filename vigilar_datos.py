@@ -0,0 +1,36 @@
+"""
+Trabajador de precálculo: se inicia junto al dashboard y vigila la carpeta data. Cuando aparece un libro
+nuevo o cambia el actual, lo lee y precalcula el dataset y los agregados (igual que precalcular.py) antes
+de que alguien abra el dashboard. Las sesiones nuevas usan la versión nueva apenas está lista; las sesiones
+abiertas siguen con la suya y ven un aviso para cambiar.
+
+Uso:
+    python vigilar_datos.py
+    python vigilar_datos.py --intervalo 60
+    python vigilar_datos.py --una-vez        (revisa una vez y termina, ej. desde una tarea programada)
+"""
+import argparse
+import sys
+
+from utils.precompute import DEFAULT_N_PATHS, PRECOMPUTE_DIR, WATCH_INTERVAL_SECONDS, watch_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vigila la carpeta data y precalcula los libros nuevos o modificados")
+    parser.add_argument('--salida', default=str(PRECOMPUTE_DIR), help="Carpeta del precálculo (por defecto data/precalculado)")
+    parser.add_argument('--intervalo', type=float, default=WATCH_INTERVAL_SECONDS, help="Segundos entre revisiones")
+    parser.add_argument('--trayectorias', type=int, default=DEFAULT_N_PATHS, help="Trayectorias de Monte Carlo del riesgo de quiebre")
+    parser.add_argument('--una-vez', action='store_true', help="Revisar una sola vez y terminar")
+    args = parser.parse_args()
+
+    print(f"Vigilando la carpeta data cada {args.intervalo:g} s (Ctrl+C para detener)", flush=True)
+    try:
+        estado = watch_data(args.salida, args.intervalo, args.trayectorias,
+                            registro=lambda mensaje: print(mensaje, flush=True), una_vez=args.una_vez)
+    except KeyboardInterrupt:
+        return 0
+    return 1 if estado and estado.get('estado') == 'error' else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())